@@ -0,0 +1,396 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, UTC
+from motor.motor_asyncio import AsyncIOMotorClient
+from playwright.async_api import Error as PlaywrightError, async_playwright
+from crawler_config import (
+    CRAWL_CONCURRENCY, DOMAIN_CONCURRENCY, DOMAIN_DELAY_SECONDS, HTTP_FAST_PATH, SEEN_FILTER,
+    CONDITIONAL_RECRAWL, SIMHASH_MAX_DISTANCE, USER_AGENT, GATE_HEAD_REQUESTS, MAX_PAGE_BYTES, RESPECT_ROBOTS,
+    FRONTIER_PARTITIONED, URL_POLICY,
+)
+from db_config import MONGO_URI, DB_NAME, client_options
+from db_handler import DatabaseHandler
+import extractor  # noqa: F401 registers the page extractors
+from http_fetcher import REDIRECT_STATUSES, HTTPFetcher, FetchResult, response_validators
+from fingerprint import simhash, hamming_distance
+from interception import InterceptionStats, get_profile
+from gating import SKIPPED_CONTENT_TYPE, TRUNCATED, gate_response, skip_by_extension
+from discovery import DISALLOWED, RobotsCache
+from fetch_settings import DomainFetchSettings
+from requests.structures import CaseInsensitiveDict
+from parsed_page import ParsedPage
+from link_writer import LinkWriter
+from seen_filter import SeenURLFilter
+from frontier import Frontier, get_locked_by
+from partition import NodeMembership
+from url_policy import URLPolicy
+from scheduler import RevisitScheduler
+from content_store import get_content_store
+from url import (
+    build_completed_update, build_unchanged_update, build_failed_update, build_skipped_update, build_link_upsert,
+)
+import canonical
+from metrics import BROWSER_LAUNCHES, FETCH_SECONDS, FETCHED_BYTES, PAGES, LINKS
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCrawler:
+    """Crawls many URLs at once with a global and a per-domain concurrency cap."""
+
+    def __init__(self, concurrency=CRAWL_CONCURRENCY, domain_concurrency=DOMAIN_CONCURRENCY,
+                 domain_delay=DOMAIN_DELAY_SECONDS):
+        # The process's synchronous client, for GridFS uploads from worker threads; DatabaseHandler checks
+        # the schema version on it first, exactly as the threaded crawler does at startup
+        self.sync_client = DatabaseHandler().client
+        self.client = AsyncIOMotorClient(MONGO_URI, **client_options())
+        self.db = self.client[DB_NAME]
+        self.urls_collection = self.db["urls"]
+        self.domains_collection = self.db["domains"]
+        self.locked_by = get_locked_by()
+        # Heartbeats run on their own thread with the synchronous client; claims only read the owned list
+        self.membership = None
+        if FRONTIER_PARTITIONED:
+            self.membership = NodeMembership(self.sync_client[DB_NAME]["crawler_nodes"], self.locked_by)
+            self.membership.join()
+        self.frontier = Frontier(self.urls_collection, self.domains_collection, membership=self.membership)
+        self.scheduler = RevisitScheduler()
+        self.content_store = get_content_store(self.sync_client[DB_NAME])
+        self.link_writer = LinkWriter(self.urls_collection)
+        # Bloom hits can't be double-checked with a synchronous lookup from the event loop
+        self.seen_filter = SeenURLFilter(self.urls_collection, verify_rate=0) if SEEN_FILTER else None
+        self.http_fetcher = HTTPFetcher(pool_size=concurrency) if HTTP_FAST_PATH else None
+        self.head_fetcher = (self.http_fetcher or HTTPFetcher(pool_size=concurrency)) if GATE_HEAD_REQUESTS else None
+        # Rules are cached in memory; only a new origin's robots.txt is fetched, from a worker thread
+        self.robots = RobotsCache(self.sync_client[DB_NAME]["domains"], self.head_fetcher) if RESPECT_ROBOTS else None
+        # Like robots.txt checks, URL policy lookups and learning run in worker threads on the synchronous client
+        self.url_policy = URLPolicy(self.sync_client[DB_NAME]) if URL_POLICY else None
+        self.fetch_settings = DomainFetchSettings(self.domains_collection)
+        self.concurrency = concurrency
+        self.domain_concurrency = domain_concurrency
+        self.domain_delay = domain_delay
+
+        self._fetch_slots = asyncio.Semaphore(concurrency)
+        self._domain_slots = {}
+        self._domain_locks = {}
+        self._domain_next_start = {}
+        self._playwright = None
+        self._browser = None
+
+    async def start(self):
+        if self.seen_filter:
+            await self.seen_filter.async_warm_start()
+        self._playwright = await async_playwright().start()
+        await self._launch()
+
+    async def _launch(self):
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        BROWSER_LAUNCHES.inc()
+
+    async def close(self):
+        if self.seen_filter:
+            logger.info("Seen-URL filter: %s", self.seen_filter.stats())
+            self.seen_filter.save_snapshot()
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+        if self.http_fetcher:
+            self.http_fetcher.close()
+        if self.head_fetcher and self.head_fetcher is not self.http_fetcher:
+            self.head_fetcher.close()
+        if self.robots:
+            self.robots.close()
+        if self.membership:
+            self.membership.leave()
+        self.client.close()
+
+    @asynccontextmanager
+    async def domain_slot(self, domain):
+        """Holds one of the domain's slots and spaces request starts by domain_delay."""
+        if domain not in self._domain_slots:
+            self._domain_slots[domain] = asyncio.Semaphore(self.domain_concurrency)
+            self._domain_locks[domain] = asyncio.Lock()
+
+        async with self._domain_slots[domain]:
+            async with self._domain_locks[domain]:
+                wait = self._domain_next_start.get(domain, 0) - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._domain_next_start[domain] = time.monotonic() + self.domain_delay
+            yield
+
+    async def fetch_page(self, url, domain_id=None, validators=None):
+        """Fetches a URL over plain HTTP unless the domain needs a browser; returns a FetchResult."""
+        if skip_by_extension(url):
+            return FetchResult(None, None, url, [], {}, SKIPPED_CONTENT_TYPE)
+        if self.robots and not await asyncio.to_thread(self.robots.allowed, url):
+            return FetchResult(None, None, url, [], {}, DISALLOWED)
+        headers_seen = False
+        if self.http_fetcher and not await self.fetch_settings.async_requires_js(domain_id):
+            try:
+                with FETCH_SECONDS.time(tier="http"):
+                    result = await asyncio.to_thread(self.http_fetcher.fetch, url, validators)
+            except Exception as e:
+                logger.warning("Plain fetch failed for %s, retrying in browser: %s", url, e)
+            else:
+                if await self.fetch_settings.async_accept(domain_id, result):
+                    return result
+                headers_seen = True
+
+        if self.head_fetcher and not headers_seen:
+            with FETCH_SECONDS.time(tier="head"):
+                outcome = await asyncio.to_thread(self.head_fetcher.head, url)
+            if outcome:
+                return FetchResult(None, None, url, [], {}, outcome)
+
+        profile = await self.fetch_settings.async_profile(domain_id)
+        with FETCH_SECONDS.time(tier="browser"):
+            return await self.fetch_in_browser(url, profile)
+
+    async def fetch_in_browser(self, url, profile=None):
+        try:
+            if not self._browser.is_connected():
+                await self._launch()
+
+            profile = profile or get_profile()
+            stats = InterceptionStats(profile)
+            context = await self._browser.new_context(user_agent=USER_AGENT)
+            if profile.intercepts:
+                async def route_request(route):
+                    if stats.allow(route.request):
+                        await route.continue_()
+                    else:
+                        await route.abort()
+                await context.route("**/*", route_request)
+
+            # The top-level document goes through the route so non-HTML and oversize bodies are aborted
+            # before the browser parses or renders them (see BrowserPool.fetch)
+            gated = {}
+
+            async def gate_document(route):
+                request = route.request
+                if not request.is_navigation_request() or request.frame.parent_frame is not None:
+                    await route.fallback()
+                    return
+                try:
+                    response = await route.fetch(max_redirects=0)
+                except PlaywrightError:
+                    await route.fallback()
+                    return
+                headers = CaseInsensitiveDict(response.headers)
+                outcome = None
+                if response.status not in REDIRECT_STATUSES:
+                    outcome = gate_response(headers, await response.body())
+                if outcome:
+                    gated.update(outcome=outcome, request=request, status=response.status, headers=headers)
+                    await route.abort()
+                else:
+                    await route.fulfill(response=response)
+
+            try:
+                page = await context.new_page()
+                await page.route("**/*", gate_document)
+                try:
+                    response = await page.goto(url, timeout=30000, wait_until='domcontentloaded')
+                except PlaywrightError:
+                    if not gated:
+                        raise
+                if gated:
+                    request = gated["request"]
+                    final_url, status_code, headers = request.url, gated["status"], gated["headers"]
+                    html_content, outcome = None, gated["outcome"]
+                    redirect_chain = [{"url": request.url, "status": status_code}]
+                    request = request.redirected_from
+                else:
+                    headers = CaseInsensitiveDict(response.headers if response else {})
+                    # Scripts can still grow the DOM past the cap after the document itself passed
+                    html_content = await page.content()
+                    outcome = None
+                    if MAX_PAGE_BYTES and len(html_content.encode("utf-8")) > MAX_PAGE_BYTES:
+                        html_content, outcome = None, TRUNCATED
+                    final_url = page.url
+                    status_code = response.status if response else None
+                    redirect_chain = []
+                    request = response.request if response else None
+
+                # Walk the redirect chain back from the final document response
+                while request is not None:
+                    hop = await request.response()
+                    redirect_chain.append({
+                        "url": request.url,
+                        "status": hop.status if hop else None
+                    })
+                    request = request.redirected_from
+                redirect_chain.reverse()
+
+                return FetchResult(html_content, status_code, final_url, redirect_chain, headers, outcome)
+            finally:
+                stats.finish()
+                await context.close()
+
+        except Exception as e:
+            logger.error("Error fetching %s: %s", url, e)
+            return FetchResult(None, None, None, [], {})
+
+    async def claim_urls(self, num_of_urls):
+        """Leases up to num_of_urls due URLs to this process, same protocol as URLHandler."""
+        return await self.frontier.async_claim(self.locked_by, num_of_urls)
+
+    async def process_url(self, url):
+        domain = canonical.host(url["url"])
+        validators = None
+        if CONDITIONAL_RECRAWL:
+            validators = {"etag": url.get("etag"), "last_modified": url.get("last_modified")}
+        async with self._fetch_slots:
+            async with self.domain_slot(domain):
+                result = await self.fetch_page(url["url"], url.get("domain_id"), validators)
+
+        if result.status_code == 304:
+            await self.record_unchanged(url, result)
+            return
+
+        if result.outcome:
+            PAGES.inc(outcome=result.outcome)
+            await self.urls_collection.update_one(
+                {"_id": url["_id"], "locked_by": url["locked_by"]},
+                build_skipped_update(
+                    result.outcome, result.status_code, result.final_url, result.redirect_chain, result.headers,
+                    self.scheduler.schedule(url, changed=None, now=datetime.now(UTC))
+                )
+            )
+            return
+
+        if not result.html:
+            logger.warning("Error processing URL %s", url["url"])
+            PAGES.inc(outcome="failed")
+            await self.urls_collection.update_one(
+                {"_id": url["_id"], "locked_by": url["locked_by"]},
+                build_failed_update(
+                    result.status_code, result.redirect_chain,
+                    self.scheduler.schedule(url, changed=None, now=datetime.now(UTC))
+                )
+            )
+            return
+
+        FETCHED_BYTES.inc(len(result.html.encode("utf-8")))
+        # Parsing and NER are CPU bound, keep them off the event loop
+        extracted = await asyncio.to_thread(self.extract, result.html, url)
+        if extracted is None:
+            await self.record_unchanged(url, result)
+            return
+        emails, names, extracted_links, fingerprint = extracted
+
+        content = await asyncio.to_thread(self.content_store.put, result.html)
+        if self.url_policy:
+            await asyncio.to_thread(self.url_policy.observe, url, fingerprint)
+        await self.store_extracted_links(extracted_links["internal"] | extracted_links["external"], url)
+
+        await self.urls_collection.update_one(
+            {"_id": url["_id"], "locked_by": url["locked_by"]},
+            build_completed_update(
+                content, result.status_code, result.final_url, result.redirect_chain, emails, names,
+                fingerprint, response_validators(result.headers),
+                self.scheduler.schedule(url, changed=True, now=datetime.now(UTC))
+            )
+        )
+        PAGES.inc(outcome="changed")
+        logger.info("Successfully processed and completed URL: %s", url["url"])
+
+    async def record_unchanged(self, url, result):
+        await self.urls_collection.update_one(
+            {"_id": url["_id"], "locked_by": url["locked_by"]},
+            build_unchanged_update(
+                result.status_code, response_validators(result.headers),
+                self.scheduler.schedule(url, changed=False, now=datetime.now(UTC))
+            )
+        )
+        PAGES.inc(outcome="unchanged")
+        logger.info("Unchanged since last crawl: %s", url["url"])
+
+    @staticmethod
+    def extract(html_content, url):
+        """Returns (emails, names, links, fingerprint), or None when the text matches the previous crawl."""
+        parsed = ParsedPage(html_content, url["url"])
+        fingerprint = simhash(parsed.text)
+        if (CONDITIONAL_RECRAWL and fingerprint and url.get("content_fingerprint")
+                and hamming_distance(fingerprint, url["content_fingerprint"]) <= SIMHASH_MAX_DISTANCE):
+            return None
+        return parsed.extract("emails"), parsed.extract("person_names"), parsed.extract("links"), fingerprint
+
+    async def store_extracted_links(self, extracted_links, url):
+        domain_from_url = canonical.registrable_domain(canonical.host(url["url"]))
+        deferred = {}
+        if self.url_policy:
+            extracted_links, deferred = await asyncio.to_thread(
+                self.url_policy.filter_links, extracted_links, url, domain_from_url
+            )
+        if self.robots:
+            extracted_links = await asyncio.to_thread(self.robots.filter_links, extracted_links, domain_from_url)
+        for link in extracted_links:
+            link_filter, link_update = build_link_upsert(link, url, domain_from_url, deferred.get(link))
+            if self.seen_filter:
+                if self.seen_filter.seen(link_filter["md5_url"]):
+                    LINKS.inc(result="skipped")
+                    continue
+                self.seen_filter.add(link_filter["md5_url"])
+            if self.link_writer.add(link_filter, link_update):
+                await self.flush_links()
+
+    async def flush_links(self):
+        inserted, matched = await self.link_writer.async_flush()
+        if inserted or matched:
+            LINKS.inc(inserted, result="new")
+            LINKS.inc(matched, result="known")
+            logger.info("Links stored: %d new, %d already known.", inserted, matched)
+
+    async def renew_leases(self):
+        """Pushes the lease forward on every URL this process holds, a few times per lease period.
+
+        Claims run ahead of the fetch slots, so URLs can wait behind slow domains for longer than a lease.
+        """
+        while True:
+            await asyncio.sleep(self.frontier.lease.total_seconds() / 3)
+            try:
+                await self.frontier.async_renew(self.locked_by)
+            except Exception as e:
+                logger.warning("Lease renewal failed: %s", e)
+
+    async def crawl(self, max_urls=None):
+        """Keeps claiming and processing URLs until none are due or max_urls have been started."""
+        in_flight = set()
+        started = 0
+        exhausted = False
+        renewer = asyncio.create_task(self.renew_leases())
+        try:
+            while True:
+                # Claim more work whenever fewer than two claims' worth of pages are queued
+                while not exhausted and len(in_flight) < self.concurrency * 2:
+                    want = self.concurrency
+                    if max_urls is not None:
+                        want = min(want, max_urls - started)
+                    if want <= 0:
+                        exhausted = True
+                        break
+                    claimed = await self.claim_urls(want)
+                    if not claimed:
+                        exhausted = True
+                        break
+                    for url in claimed:
+                        in_flight.add(asyncio.create_task(self.process_url(url)))
+                    started += len(claimed)
+
+                if not in_flight:
+                    await self.flush_links()
+                    break
+
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception():
+                        logger.error("Error processing URL: %s", task.exception())
+        finally:
+            renewer.cancel()
+
+        return started
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+"""
+Async crawl entry point: keeps many fetches in flight from a single process.
+Usage: python async_main.py [max_urls]
+Seed domains/homepages first with main.py or add_seed_url.py.
+"""
+
+import sys
+import asyncio
+from async_crawler import AsyncCrawler
+from metrics import setup_logging, start_metrics
+
+async def run(max_urls=None):
+    crawler = AsyncCrawler()
+    await crawler.start()
+    try:
+        processed = await crawler.crawl(max_urls)
+    finally:
+        await crawler.close()
+    print(f"Crawling process completed. {processed} URLs processed.")
+
+def main():
+    """Main function to run the async crawler."""
+    max_urls = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    setup_logging()
+    start_metrics()
+    asyncio.run(run(max_urls))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Compares pages/sec of launching Chromium per fetch against the shared BrowserPool.
+Usage: python -m benchmarks.bench_browser_pool [pages]
+"""
+
+import sys
+import time
+from playwright.sync_api import sync_playwright
+from browser_pool import BrowserPool
+from crawler_config import USER_AGENT
+from benchmarks.fixture_server import start_fixture_server, PAGE_COUNT
+
+
+def cold_fetch(url):
+    """The pre-pool behaviour: a fresh Playwright driver and Chromium for every URL."""
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        context = browser.new_context(user_agent=USER_AGENT)
+        page = context.new_page()
+        response = page.goto(url, timeout=30000, wait_until='domcontentloaded')
+        html_content = page.content()
+        browser.close()
+        return html_content, response.status if response else None
+
+
+def run(label, fetch, urls):
+    start = time.perf_counter()
+    for url in urls:
+        fetch(url)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {len(urls)} pages in {elapsed:.2f}s -> {len(urls) / elapsed:.2f} pages/sec")
+    return len(urls) / elapsed
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    server, base_url = start_fixture_server()
+    urls = [f"{base_url}/page/{i % PAGE_COUNT}" for i in range(pages)]
+
+    try:
+        before = run("per-fetch", cold_fetch, urls)
+
+        pool = BrowserPool()
+        try:
+            after = run("pooled", pool.fetch, urls)
+        finally:
+            pool.close()
+        print(f"Browser launches with pool: {pool.launch_count}")
+        print(f"Speedup: {after / before:.1f}x")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
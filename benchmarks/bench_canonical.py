@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Link canonicalization micro-benchmark: the old urljoin/lower/normalize_url/parse_domain path
+against Extractor.links_from_hrefs on canonical.py, over a large href corpus.
+Usage: python -m benchmarks.bench_canonical [hrefs_file] [--count N]
+hrefs_file has one "base_url<TAB>href" per line (e.g. dumped from crawled pages); hrefs of the
+same base should be adjacent. Without it a synthetic mix of real-world href shapes is generated.
+"""
+
+import itertools
+import random
+import re
+import sys
+import time
+from urllib.parse import urljoin, urlparse, urlunparse
+from extractor import Extractor
+import canonical
+
+SYNTHETIC_HREFS = [
+    "/", "/about", "/About-Us/", "contact.html", "../products/Widget-42?ref=nav", "./team/#bios",
+    "#top", "?page=2", "/blog/2024/05/post-title/", "https://www.Example.com/Careers",
+    "//cdn.example.com/assets/app.js", "https://twitter.com/example", "http://www.linkedin.com/company/example",
+    "mailto:info@example.com", "tel:+15555550100", "javascript:void(0)", "/search?q=caf%c3%a9&x=%7e",
+    "/%7Euser/files/Report%20Q1.pdf", "https://shop.example.co.uk/cart/../checkout", "xyz.com/a.html",
+    "HTTPS://EXAMPLE.COM:443/Index.HTML", "/en/Über uns", "https://sub.domain.example.com:8443/api/v1/items",
+]
+SYNTHETIC_BASES = [
+    "https://www.example.com/", "https://example.com/company/about/index.html",
+    "https://blog.example.com/2024/05/", "http://shop.example.co.uk/category/shoes?sort=price",
+]
+
+
+def legacy_parse_domain(url):
+    """utils.parse_domain before canonical.py."""
+    try:
+        domain = urlparse(url).netloc
+        if domain.startswith('www.'):
+            domain = domain[4:]
+        return domain.lower()
+    except Exception:
+        match = re.search(r'^(?:https?://)?([^/]+)', url)
+    return match.group(1) if match else None
+
+
+def legacy_normalize_url(url):
+    parsed = urlparse(url)
+    domain = parsed.netloc.lower()
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return urlunparse((parsed.scheme, domain, parsed.path, '', '', ''))
+
+
+def legacy_links(hrefs, base_url):
+    """Extractor.links_from_hrefs before canonical.py."""
+    internal_links, external_links = set(), set()
+    for href in hrefs:
+        href = href.split("#")[0].strip()
+        if not href or href.lower().startswith(("javascript:", "mailto:", "tel:")):
+            continue
+        try:
+            if not href.startswith(("http://", "https://", "/")) and '.' in href.split('/')[0]:
+                href = "http://" + href
+            full_url = urljoin(base_url, href).strip().lower()
+            normalized = legacy_normalize_url(full_url)
+            if legacy_parse_domain(base_url) == legacy_parse_domain(full_url):
+                internal_links.add(normalized)
+            else:
+                external_links.add(normalized)
+        except ValueError:
+            continue
+    return {"internal": internal_links, "external": external_links}
+
+
+def load_pages(path, count):
+    """[(base_url, [hrefs])] totalling about count hrefs."""
+    pages = []
+    if path:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            rows = (line.rstrip("\n").split("\t", 1) for line in f)
+            for base_url, group in itertools.groupby((row for row in rows if len(row) == 2), key=lambda row: row[0]):
+                pages.append((base_url, [href for _, href in group]))
+    else:
+        rng = random.Random(0)
+        for page_id in range(max(1, count // 100)):
+            base_url = rng.choice(SYNTHETIC_BASES)
+            # Vary paths so the corpus isn't a handful of strings the caches trivially absorb
+            hrefs = [rng.choice(SYNTHETIC_HREFS).replace("42", str(rng.randrange(100000))) for _ in range(100)]
+            pages.append((base_url, hrefs))
+    total = sum(len(hrefs) for _, hrefs in pages)
+    if path and total < count:
+        pages = pages * (count // max(total, 1) + 1)
+    return pages
+
+
+def measure(label, func, pages):
+    hrefs = sum(len(page_hrefs) for _, page_hrefs in pages)
+    start = time.perf_counter()
+    for base_url, page_hrefs in pages:
+        func(page_hrefs, base_url)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {hrefs:,} hrefs in {elapsed:.2f}s -> {hrefs / elapsed:,.0f} hrefs/sec")
+    return elapsed
+
+
+def main():
+    args = sys.argv[1:]
+    count = 1_000_000
+    if "--count" in args:
+        index = args.index("--count")
+        count = int(args[index + 1])
+        del args[index:index + 2]
+
+    pages = load_pages(args[0] if args else None, count)
+    before = measure("legacy", legacy_links, pages)
+    after = measure("canonical", Extractor.links_from_hrefs, pages)
+    print(f"Speedup: {before / after:.2f}x")
+    for name, info in canonical.cache_stats().items():
+        lookups = info["hits"] + info["misses"]
+        print(f"  {name:<18} cache hit rate {info['hits'] / max(lookups, 1):.1%} ({info['currsize']} entries)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Multi-process claim benchmark against a local mongod.
+Seeds a throwaway database, checks that the claim query's plan merges index scans instead of
+sorting in memory, lets several worker processes drain it with either the old find/update_many/find
+claim or Frontier.claim, and reports claims/sec and duplicate claims.
+Usage: python -m benchmarks.bench_claim [--mongo-uri URI] [--urls N] [--domains N] [--workers N] [--batch N]
+"""
+
+import argparse
+import os
+import time
+from collections import Counter
+from datetime import datetime, UTC
+from multiprocessing import Pool
+from pymongo import MongoClient
+from frontier import Frontier, CLAIM_INDEXES, CLAIM_PROJECTION, CLAIM_SORT, build_claim_filter
+
+
+def legacy_claim(urls, locked_by, num_of_urls):
+    """The claim URLHandler used before Frontier: find, update_many, then find what was won."""
+    now = datetime.now(UTC)
+    ids = [doc["_id"] for doc in urls.find(
+        {"$or": [{"last_crawled": {"$exists": False}}, {"status": {"$in": ["pending", ""]}}], "domain_id": {"$ne": 0}},
+        {"_id": 1}
+    ).sort({"last_crawled": 1}).limit(num_of_urls)]
+    if not ids:
+        return []
+    urls.update_many(
+        {"_id": {"$in": ids}, "status": {"$ne": "processing"}},
+        {"$set": {"status": "processing", "locked_at": now, "locked_by": locked_by}}
+    )
+    return list(urls.find({"_id": {"$in": ids}, "status": "processing", "locked_by": locked_by}, CLAIM_PROJECTION))
+
+
+def worker(args):
+    mongo_uri, db_name, mode, batch = args
+    urls = MongoClient(mongo_uri)[db_name]["urls"]
+    frontier = Frontier(urls)
+    locked_by = f"bench_{os.getpid()}"
+    claimed_ids = []
+    empty_rounds = 0
+
+    while empty_rounds < 3:
+        if mode == "legacy":
+            docs = legacy_claim(urls, locked_by, batch)
+        else:
+            docs = frontier.claim(locked_by, batch)
+        if not docs:
+            empty_rounds += 1
+            continue
+        empty_rounds = 0
+        claimed_ids.extend(str(doc["_id"]) for doc in docs)
+        # Simulate the crawl finishing so the documents leave the queue
+        urls.update_many(
+            {"_id": {"$in": [doc["_id"] for doc in docs]}, "locked_by": locked_by},
+            {"$set": {"status": "completed", "last_crawled": datetime.now(UTC), "locked_by": None}}
+        )
+    return claimed_ids
+
+
+def seed(urls, count, domains):
+    urls.delete_many({})
+    for index in [[("md5_url", 1)], *CLAIM_INDEXES]:
+        urls.create_index(index, unique=index == [("md5_url", 1)])
+    urls.insert_many(
+        [{"md5_url": f"{i:032x}", "url": f"http://d{i % domains}.test/{i}", "domain_id": i % domains + 1,
+          "status": "pending"} for i in range(count)],
+        ordered=False,
+    )
+
+
+def plan_stages(plan):
+    """Every stage name in an explain() plan, depth first."""
+    plan = plan.get("queryPlan", plan)  # slot-based engine wraps the classic tree
+    stages = [plan["stage"]]
+    for child in plan.get("inputStages", []) + [plan[key] for key in ("inputStage",) if key in plan]:
+        stages.extend(plan_stages(child))
+    return stages
+
+
+def check_claim_plan(urls, batch):
+    """Exits if the claim query needs a blocking in-memory SORT; it runs on every claim round."""
+    cursor = urls.find(build_claim_filter(datetime.now(UTC)), {"_id": 1, "domain_id": 1}).sort(CLAIM_SORT).limit(batch)
+    stages = plan_stages(cursor.explain()["queryPlanner"]["winningPlan"])
+    if "SORT" in stages:
+        raise SystemExit(f"Claim query sorts in memory: {' <- '.join(stages)}")
+    print(f"claim plan: {' <- '.join(stages)}")
+
+
+def run(mode, options):
+    client = MongoClient(options.mongo_uri)
+    db_name = f"crawler_bench_{os.getpid()}"
+    try:
+        seed(client[db_name]["urls"], options.urls, options.domains)
+        if mode == "frontier":
+            check_claim_plan(client[db_name]["urls"], options.batch)
+        start = time.perf_counter()
+        with Pool(options.workers) as pool:
+            results = pool.map(worker, [(options.mongo_uri, db_name, mode, options.batch)] * options.workers)
+        elapsed = time.perf_counter() - start
+    finally:
+        client.drop_database(db_name)
+
+    claims = Counter(doc_id for ids in results for doc_id in ids)
+    total = sum(claims.values())
+    duplicates = sum(count - 1 for count in claims.values() if count > 1)
+    print(f"{mode:<9} {total} claims in {elapsed:.2f}s -> {total / elapsed:,.0f} claims/sec, "
+          f"{len(claims)}/{options.urls} URLs claimed, duplicate-claim rate {duplicates / max(total, 1):.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/")
+    parser.add_argument("--urls", type=int, default=20000)
+    parser.add_argument("--domains", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=100)
+    options = parser.parse_args()
+
+    run("legacy", options)
+    run("frontier", options)
+
+
+if __name__ == "__main__":
+    main()
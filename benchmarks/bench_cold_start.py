@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Worker cold-start benchmark: starts N worker processes at once and measures how long each takes
+until its database handle is ready, for the old per-worker index setup (own MongoClient,
+index_information, drop/create_index on every start) against the current DatabaseHandler,
+which shares one pooled client and only checks the schema version.
+Usage: python -m benchmarks.bench_cold_start [--workers N] [--rounds N] [--mongo-uri URI]
+Without --mongo-uri a mongod from PATH is started on a temporary dbpath and removed afterwards.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pymongo import MongoClient
+from benchmarks.bench_crawl import percentile, throwaway_mongod
+
+DB_NAME = "crawler_bench_cold_start"
+
+LEGACY_PROBE = """
+import json, time
+start = time.perf_counter()
+import pymongo
+from frontier import CLAIM_INDEXES
+client = pymongo.MongoClient({mongo_uri!r})
+urls = client[{db_name!r}]["urls"]
+if "url_1" in urls.index_information():
+    urls.drop_index("url_1")
+urls.create_index("md5_url", unique=True)
+for index in CLAIM_INDEXES:
+    urls.create_index(index)
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+CURRENT_PROBE = """
+import json, time
+start = time.perf_counter()
+from db_handler import DatabaseHandler
+DatabaseHandler()
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+
+def run_round(probe, mongo_uri, workers):
+    """Starts every worker at once; returns (per-worker ready seconds, wall seconds for all)."""
+    env = dict(os.environ, CRAWLER_DB_SERVER=mongo_uri, CRAWLER_DB_NAME=DB_NAME, CRAWLER_NER_ENABLED="0")
+    code = probe.format(mongo_uri=mongo_uri, db_name=DB_NAME)
+    start = time.perf_counter()
+    processes = [
+        subprocess.Popen([sys.executable, "-c", code], env=env, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    seconds = []
+    for process in processes:
+        output, _ = process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"worker exited with {process.returncode}")
+        seconds.append(json.loads(output.strip().splitlines()[-1])["seconds"])
+    return seconds, time.perf_counter() - start
+
+
+def measure(label, probe, mongo_uri, workers, rounds):
+    seconds, walls = [], []
+    for _ in range(rounds):
+        ready, wall = run_round(probe, mongo_uri, workers)
+        seconds.extend(ready)
+        walls.append(wall)
+    print(f"{label:<8} ready p50 {percentile(seconds, 0.5) * 1000:.0f} ms, "
+          f"p99 {percentile(seconds, 0.99) * 1000:.0f} ms, "
+          f"all {workers} workers up in {sum(walls) / len(walls):.2f}s")
+    return percentile(seconds, 0.5)
+
+
+def benchmark(mongo_uri, options):
+    from migrations import migrate
+
+    client = MongoClient(mongo_uri)
+    client.drop_database(DB_NAME)
+    migrate(client[DB_NAME])
+
+    before = measure("legacy", LEGACY_PROBE, mongo_uri, options.workers, options.rounds)
+    after = measure("current", CURRENT_PROBE, mongo_uri, options.workers, options.rounds)
+    print(f"Speedup (p50 ready time): {before / after:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--mongo-uri", help="use this MongoDB instead of starting one")
+    options = parser.parse_args()
+
+    if options.mongo_uri:
+        benchmark(options.mongo_uri, options)
+    else:
+        with throwaway_mongod() as mongo_uri:
+            benchmark(mongo_uri, options)
+
+
+if __name__ == "__main__":
+    main()
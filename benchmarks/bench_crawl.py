@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+"""
+End-to-end crawl benchmark: runs the real URLHandler against the fixture site and a throwaway
+mongod, then reports pages/sec, p50/p99 fetch latency, extraction time, Mongo ops per page and
+peak RSS. Results are saved per commit under benchmarks/results/ so runs can be compared.
+Usage: python -m benchmarks.bench_crawl [--pages N] [--page-bytes N] [--fanout N] [--redirect-ratio R]
+       [--slow-ratio R] [--slow-ms MS] [--max-pages N] [--batch N] [--ner] [--mongo-uri URI]
+       [--compare RESULTS_JSON]
+Without --mongo-uri a mongod from PATH is started on a temporary dbpath and removed afterwards.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from pymongo import MongoClient
+from benchmarks.fixture_server import SiteGraph, start_fixture_server
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def throwaway_mongod():
+    """Starts mongod on a temporary dbpath and yields its URI."""
+    dbpath = tempfile.mkdtemp(prefix="crawler_bench_mongod_")
+    port = free_port()
+    process = subprocess.Popen(
+        ["mongod", "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("mongod did not start")
+                time.sleep(0.2)
+        yield f"mongodb://127.0.0.1:{port}/"
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(dbpath, ignore_errors=True)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def git_revision():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+        dirty = subprocess.call(["git", "diff", "--quiet", "HEAD"]) != 0
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def timing(func, durations):
+    """Wraps func so every call's duration is appended to durations."""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            durations.append(time.perf_counter() - start)
+    return wrapper
+
+
+def crawl(mongo_uri, base_url, options):
+    # Configuration is read at import time, so point the crawler at the throwaway database first
+    os.environ.update({
+        "CRAWLER_DB_SERVER": mongo_uri,
+        "CRAWLER_DB_NAME": "crawler_bench",
+        "CRAWLER_NER_ENABLED": "1" if options.ner else "0",
+        "CRAWLER_SEEN_SNAPSHOT_PATH": "",
+        "CRAWLER_CONTENT_STORE": "gridfs",
+        "CRAWLER_LOG_LEVEL": "WARNING",
+    })
+    from metrics import MONGO_COMMANDS, BROWSER_LAUNCHES, setup_logging
+    from db_config import get_db
+    from migrations import migrate
+    from url import URLHandler
+
+    setup_logging()
+    MongoClient(mongo_uri).drop_database("crawler_bench")
+    migrate(get_db())
+    handler = URLHandler()
+    homepage = f"{base_url}/page/0"
+    handler.domains_collection.insert_one({"_id": 1, "url": homepage})
+    handler.initialize_homepage_urls()
+
+    fetch_times, extract_times = [], []
+    handler.fetch_page = timing(handler.fetch_page, fetch_times)
+    handler.extract_page = timing(handler.extract_page, extract_times)
+
+    commands_before = MONGO_COMMANDS.total()
+    start = time.perf_counter()
+    crawled = 0
+    try:
+        while crawled < options.max_pages:
+            claimed = handler.get_url_list_last_crawled_48hrs_before(min(options.batch, options.max_pages - crawled))
+            if not claimed:
+                break
+            crawled += len(claimed)
+    finally:
+        handler.close()
+    elapsed = time.perf_counter() - start
+    commands = MONGO_COMMANDS.total() - commands_before
+
+    return {
+        "pages": crawled,
+        "seconds": elapsed,
+        "pages_per_second": crawled / elapsed if elapsed else 0.0,
+        "fetch_p50_ms": percentile(fetch_times, 0.5) * 1000,
+        "fetch_p99_ms": percentile(fetch_times, 0.99) * 1000,
+        "extract_mean_ms": sum(extract_times) / len(extract_times) * 1000 if extract_times else 0.0,
+        "extract_p99_ms": percentile(extract_times, 0.99) * 1000,
+        "mongo_ops_per_page": commands / crawled if crawled else 0.0,
+        "browser_launches": BROWSER_LAUNCHES.total(),
+        # ru_maxrss is in KB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def compare(results, baseline_path):
+    baseline = json.loads(Path(baseline_path).read_text())
+    print(f"\nAgainst {baseline['revision']}:")
+    for key, value in results["metrics"].items():
+        before = baseline["metrics"].get(key)
+        if isinstance(before, (int, float)) and before:
+            print(f"  {key:<20} {before:>10.2f} -> {value:>10.2f}  ({(value - before) / before:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=500, help="pages in the generated site")
+    parser.add_argument("--page-bytes", type=int, default=20000)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--redirect-ratio", type=float, default=0.05)
+    parser.add_argument("--slow-ratio", type=float, default=0.05)
+    parser.add_argument("--slow-ms", type=int, default=200)
+    parser.add_argument("--max-pages", type=int, default=300, help="stop after crawling this many URLs")
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--ner", action="store_true", help="include NER (needs the model)")
+    parser.add_argument("--mongo-uri", help="use this MongoDB instead of starting one")
+    parser.add_argument("--compare", help="results JSON from an earlier run")
+    options = parser.parse_args()
+
+    site = SiteGraph(options.pages, options.page_bytes, options.fanout, options.redirect_ratio,
+                     options.slow_ratio, options.slow_ms)
+    server, base_url = start_fixture_server(site=site)
+    try:
+        if options.mongo_uri:
+            metrics = crawl(options.mongo_uri, base_url, options)
+        else:
+            with throwaway_mongod() as mongo_uri:
+                metrics = crawl(mongo_uri, base_url, options)
+    finally:
+        server.shutdown()
+
+    results = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "options": vars(options),
+        "metrics": metrics,
+    }
+    for key, value in metrics.items():
+        print(f"{key:<20} {value:,.2f}")
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f"bench_crawl_{results['revision']}.json"
+    path.write_text(json.dumps(results, indent=2))
+    print(f"Saved {path}")
+    if options.compare:
+        compare(results, options.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Contact export benchmark: seeds a throwaway mongod with millions of crawled url documents (with
+inline page bodies, as older crawls stored them) and compares the old pattern of materializing the
+collection with list(find()) against export_contacts.py, each in its own process so peak RSS is its own.
+Usage: python -m benchmarks.bench_export [--docs N] [--domains N] [--body-bytes N] [--format jsonl|parquet]
+       [--skip-legacy] [--mongo-uri URI]
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, UTC
+from pymongo import MongoClient, InsertOne
+from benchmarks.bench_crawl import throwaway_mongod
+
+DB_NAME = "crawler_bench_export"
+INSERT_BATCH = 10_000
+
+LEGACY_PROBE = """
+import json, resource, time
+from pymongo import MongoClient
+start = time.perf_counter()
+docs = list(MongoClient({mongo_uri!r})[{db_name!r}]["urls"].find({{}}))
+contacts = {{}}
+for doc in docs:
+    contacts.setdefault(doc["domain_id"], set()).update(doc.get("emails") or [])
+print(json.dumps({{"seconds": time.perf_counter() - start, "docs": len(docs),
+                  "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+EXPORT_PROBE = """
+import json, resource, time
+from export_contacts import ContactExporter
+start = time.perf_counter()
+exporter = ContactExporter({output_dir!r}, {fmt!r})
+exporter.run(full=True)
+print(json.dumps({{"seconds": time.perf_counter() - start, "docs": exporter.pages,
+                  "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def seed(db, docs, domains, body_bytes):
+    rng = random.Random(0)
+    db["domains"].insert_many([{"_id": i, "normalized_domain": f"site{i}.example"} for i in range(1, domains + 1)])
+    crawled = datetime.now(UTC) - timedelta(days=1)
+    body = "<p>" + "x" * body_bytes + "</p>"
+    ops = []
+    start = time.perf_counter()
+    for i in range(docs):
+        domain_id = rng.randrange(1, domains + 1)
+        ops.append(InsertOne({
+            "md5_url": f"{i:032x}",
+            "url": f"https://site{domain_id}.example/page/{i}",
+            "domain_id": domain_id,
+            "status": "completed",
+            "last_crawled": crawled,
+            "html_content": body,
+            "emails": [f"person{rng.randrange(50)}@site{domain_id}.example"] if rng.random() < 0.3 else [],
+            "person_names": [f"Person {rng.randrange(50)}"] if rng.random() < 0.2 else [],
+        }))
+        if len(ops) == INSERT_BATCH:
+            db["urls"].bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        db["urls"].bulk_write(ops, ordered=False)
+    print(f"Seeded {docs:,} url documents over {domains:,} domains in {time.perf_counter() - start:.0f}s")
+
+
+def run_probe(code, mongo_uri):
+    env = dict(os.environ, CRAWLER_DB_SERVER=mongo_uri, CRAWLER_DB_NAME=DB_NAME, CRAWLER_NER_ENABLED="0")
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def report(label, result):
+    print(f"{label:<8} {result['docs']:,} docs in {result['seconds']:.1f}s "
+          f"({result['docs'] / max(result['seconds'], 1e-9):,.0f} docs/sec), peak RSS {result['peak_rss_mb']:,.0f} MB")
+
+
+def benchmark(mongo_uri, options):
+    from migrations import migrate
+
+    client = MongoClient(mongo_uri)
+    client.drop_database(DB_NAME)
+    migrate(client[DB_NAME])
+    seed(client[DB_NAME], options.docs, options.domains, options.body_bytes)
+
+    if not options.skip_legacy:
+        report("list()", run_probe(LEGACY_PROBE.format(mongo_uri=mongo_uri, db_name=DB_NAME), mongo_uri))
+    with tempfile.TemporaryDirectory(prefix="crawler_bench_export_") as output_dir:
+        report("export", run_probe(EXPORT_PROBE.format(output_dir=output_dir, fmt=options.format), mongo_uri))
+        size = sum(entry.stat().st_size for entry in os.scandir(output_dir) if entry.is_file())
+        print(f"Output: {size / 1e6:.1f} MB of {options.format}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2_000_000)
+    parser.add_argument("--domains", type=int, default=20_000)
+    parser.add_argument("--body-bytes", type=int, default=2_000, help="inline html_content per document")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--skip-legacy", action="store_true", help="skip list(find()), which needs RAM for everything")
+    parser.add_argument("--mongo-uri", help="use this MongoDB instead of starting one")
+    options = parser.parse_args()
+
+    if options.mongo_uri:
+        benchmark(options.mongo_uri, options)
+    else:
+        with throwaway_mongod() as mongo_uri:
+            benchmark(mongo_uri, options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Per-page extraction time and allocations: the old three-pass path against one shared ParsedPage.
+NER is left out since both paths feed it the same text.
+Usage: python -m benchmarks.bench_extract [corpus_dir] [--base-url URL]
+corpus_dir holds saved *.html pages; without it a synthetic corpus is generated.
+Needs beautifulsoup4 for the old path: pip install -r benchmarks/requirements.txt
+"""
+
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from urllib.parse import urljoin, urlparse, urlunparse
+from bs4 import BeautifulSoup
+import extractor  # noqa: F401 registers the page extractors
+from parsed_page import ParsedPage
+from benchmarks.fixture_server import render_page
+
+
+def legacy_normalize_url(url):
+    """Extractor.normalize_url before canonical.py: lowercased everything and dropped the query."""
+    parsed = urlparse(url)
+    domain = parsed.netloc.lower()
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return urlunparse((parsed.scheme, domain, parsed.path, '', '', ''))
+
+
+def three_pass(html, base_url):
+    """The pre-ParsedPage path: a regex over the raw HTML plus two html.parser trees."""
+    emails = re.findall(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}", html)
+    text = BeautifulSoup(html, "html.parser").get_text(separator=" ", strip=True)
+    links = set()
+    for a_tag in BeautifulSoup(html, "html.parser").find_all("a", href=True):
+        href = a_tag["href"].split("#")[0].strip()
+        if href:
+            links.add(legacy_normalize_url(urljoin(base_url, href).lower()))
+    return emails, text, links
+
+
+def single_pass(html, base_url):
+    page = ParsedPage(html, base_url)
+    return page.extract("emails"), page.text, page.extract("links")
+
+
+def load_corpus(corpus_dir):
+    if corpus_dir:
+        return [path.read_text(encoding="utf-8", errors="replace") for path in sorted(Path(corpus_dir).glob("*.html"))]
+    # Pad the fixture pages so they are closer to real page sizes
+    filler = "<p>" + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40 + "</p>"
+    return [render_page(i).replace("</body>", filler * 20 + "</body>") for i in range(200)]
+
+
+def measure(label, extract, corpus, base_url):
+    start = time.perf_counter()
+    for html in corpus:
+        extract(html, base_url)
+    elapsed = time.perf_counter() - start
+
+    peaks = []
+    for html in corpus:
+        tracemalloc.start()
+        extract(html, base_url)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    per_page_ms = elapsed / len(corpus) * 1000
+    mean_peak_kb = sum(peaks) / len(peaks) / 1024
+    print(f"{label:<12} {per_page_ms:7.2f} ms/page   peak alloc {mean_peak_kb:9.1f} KB/page")
+    return per_page_ms
+
+
+def main():
+    args = sys.argv[1:]
+    base_url = "https://example.com/"
+    if "--base-url" in args:
+        index = args.index("--base-url")
+        base_url = args[index + 1]
+        del args[index:index + 2]
+
+    corpus = load_corpus(args[0] if args else None)
+    if not corpus:
+        print("No *.html pages found in corpus")
+        return
+
+    print(f"{len(corpus)} pages")
+    before = measure("three-pass", three_pass, corpus, base_url)
+    after = measure("ParsedPage", single_pass, corpus, base_url)
+    print(f"Speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
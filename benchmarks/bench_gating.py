@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Content gating benchmark: time and peak Python memory to fetch a normal page, a huge generated
+HTML page and a large binary download, reading the whole body (the old fetch) against the
+streamed, gated HTTPFetcher.
+Usage: python -m benchmarks.bench_gating [--megabytes N] [--max-bytes N]
+"""
+
+import argparse
+import time
+import tracemalloc
+from crawler_config import MAX_PAGE_BYTES
+from http_fetcher import HTTPFetcher
+from benchmarks.fixture_server import SiteGraph, start_fixture_server
+
+
+def legacy_fetch(fetcher, url):
+    """The pre-gating fetch: whole body downloaded and decoded whatever it is."""
+    response = fetcher.session.get(url, timeout=fetcher.timeout)
+    return response.text
+
+
+def measure(func, url):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(url)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=int, default=200, help="size of the huge page and the download")
+    parser.add_argument("--max-bytes", type=int, default=MAX_PAGE_BYTES)
+    options = parser.parse_args()
+
+    server, base_url = start_fixture_server(site=SiteGraph())
+    fetcher = HTTPFetcher(max_bytes=options.max_bytes)
+    targets = {
+        "page": f"{base_url}/page/1",
+        "huge html": f"{base_url}/big/{options.megabytes}",
+        "download": f"{base_url}/download/{options.megabytes}",
+    }
+    try:
+        for label, url in targets.items():
+            before_seconds, before_mb, _ = measure(lambda u: legacy_fetch(fetcher, u), url)
+            after_seconds, after_mb, result = measure(fetcher.fetch, url)
+            print(f"{label:<10} full read {before_seconds:6.2f}s {before_mb:7.1f} MB peak | "
+                  f"gated {after_seconds:6.2f}s {after_mb:7.1f} MB peak, outcome={result.outcome or 'fetched'}")
+    finally:
+        fetcher.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Browser fetch cost per interception profile: pages/sec, subresource requests that reached the
+server, and requests/bytes the profile aborted, over fixture pages carrying stylesheets, scripts,
+fonts and images.
+Usage: python -m benchmarks.bench_interception [pages] [--assets N] [--asset-bytes N]
+"""
+
+import argparse
+import time
+from browser_pool import BrowserPool
+from interception import PROFILES
+from benchmarks.fixture_server import SiteGraph, start_fixture_server
+
+
+def run(profile, urls, server):
+    pool = BrowserPool()
+    blocked = bytes_saved = 0
+    try:
+        pool.fetch(urls[0], profile=profile)  # Launch Chromium outside the timing
+        server.asset_requests = 0
+        start = time.perf_counter()
+        for url in urls:
+            pool.fetch(url, profile=profile)
+            blocked += pool.last_interception.blocked
+            bytes_saved += pool.last_interception.bytes_saved
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.close()
+    print(f"{profile.name:<10} {len(urls) / elapsed:6.2f} pages/sec, "
+          f"{server.asset_requests / len(urls):5.1f} subresources served/page, "
+          f"{blocked / len(urls):5.1f} aborted/page, ~{bytes_saved / len(urls) / 1024:,.0f} KB saved/page")
+    return len(urls) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pages", nargs="?", type=int, default=30)
+    parser.add_argument("--assets", type=int, default=12, help="subresources per page")
+    parser.add_argument("--asset-bytes", type=int, default=50_000)
+    options = parser.parse_args()
+
+    site = SiteGraph(assets=options.assets, asset_bytes=options.asset_bytes)
+    server, base_url = start_fixture_server(site=site)
+    urls = [f"{base_url}/page/{i % site.pages}" for i in range(options.pages)]
+    try:
+        rates = {name: run(profile, urls, server) for name, profile in PROFILES.items()}
+        print(f"html-only vs full: {rates['html-only'] / rates['full']:.2f}x")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
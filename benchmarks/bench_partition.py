@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+Partitioned frontier benchmark: drains the same seeded queue with 1, 2, 4, ... worker processes,
+claiming either from the global frontier or only from each worker's own partitions, and reports
+URLs/sec, scaling against one worker, and how many domains were crawled by more than one worker.
+Usage: python -m benchmarks.bench_partition [--workers 1,2,4,8] [--urls N] [--domains N] [--batch N]
+       [--work-ms MS] [--mongo-uri URI]
+"""
+
+import argparse
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, UTC
+from multiprocessing import Pool
+from pymongo import MongoClient
+from benchmarks.bench_crawl import throwaway_mongod
+from frontier import Frontier, CLAIM_INDEXES, PARTITION_CLAIM_INDEXES
+from partition import NodeMembership, partition_of
+
+DB_NAME = "crawler_bench_partition"
+HEARTBEAT_SECONDS = 0.5
+
+
+def worker(args):
+    mongo_uri, mode, workers, batch, work_ms = args
+    db = MongoClient(mongo_uri)[DB_NAME]
+    urls = db["urls"]
+    locked_by = f"bench_{os.getpid()}"
+    membership = None
+    if mode == "partitioned":
+        membership = NodeMembership(db["crawler_nodes"], locked_by, HEARTBEAT_SECONDS, timeout_seconds=10)
+        membership.join()
+        # Start claiming once every worker is in the ring, so the run measures the settled assignment
+        while len(membership.nodes) < workers:
+            time.sleep(0.05)
+            membership.refresh()
+    frontier = Frontier(urls, membership=membership)
+
+    domains = set()
+    claimed = 0
+    empty_rounds = 0
+    start = time.perf_counter()
+    while empty_rounds < 3:
+        docs = frontier.claim(locked_by, batch)
+        if not docs:
+            empty_rounds += 1
+            time.sleep(0.05)
+            continue
+        empty_rounds = 0
+        claimed += len(docs)
+        domains.update(doc["domain_id"] for doc in docs)
+        # Stands in for fetching and extracting the pages
+        time.sleep(work_ms * len(docs) / 1000)
+        urls.update_many(
+            {"_id": {"$in": [doc["_id"] for doc in docs]}, "locked_by": locked_by},
+            {"$set": {"status": "completed", "last_crawled": datetime.now(UTC), "locked_by": None,
+                      "next_crawl_at": datetime(2100, 1, 1, tzinfo=UTC)}}
+        )
+    elapsed = time.perf_counter() - start
+    if membership:
+        membership.leave()
+    return locked_by, claimed, sorted(domains), elapsed
+
+
+def seed(db, count, domains):
+    db["urls"].drop()
+    db["crawler_nodes"].drop()
+    urls = db["urls"]
+    urls.create_index([("md5_url", 1)], unique=True)
+    for index in [*CLAIM_INDEXES, *PARTITION_CLAIM_INDEXES]:
+        urls.create_index(index)
+    urls.insert_many(
+        [{"md5_url": f"{i:032x}", "url": f"http://d{i % domains}.test/{i}", "domain_id": i % domains + 1,
+          "partition": partition_of(i % domains + 1), "status": "pending"} for i in range(count)],
+        ordered=False,
+    )
+
+
+def run(mongo_uri, mode, workers, options):
+    seed(MongoClient(mongo_uri)[DB_NAME], options.urls, options.domains)
+    start = time.perf_counter()
+    with Pool(workers) as pool:
+        results = pool.map(worker, [(mongo_uri, mode, workers, options.batch, options.work_ms)] * workers)
+    elapsed = time.perf_counter() - start
+
+    total = sum(claimed for _, claimed, _, _ in results)
+    owners = defaultdict(set)
+    for locked_by, _, domains, _ in results:
+        for domain_id in domains:
+            owners[domain_id].add(locked_by)
+    shared = sum(1 for workers_seen in owners.values() if len(workers_seen) > 1)
+    busiest = max(claimed for _, claimed, _, _ in results)
+    return {"urls": total, "seconds": elapsed, "rate": total / elapsed, "shared_domains": shared,
+            "domains": len(owners), "skew": busiest / max(total / workers, 1)}
+
+
+def benchmark(mongo_uri, options):
+    for mode in ("global", "partitioned"):
+        baseline = None
+        for workers in options.workers:
+            result = run(mongo_uri, mode, workers, options)
+            baseline = baseline or result["rate"]
+            print(f"{mode:<12} {workers:>2} workers: {result['urls']:,} URLs in {result['seconds']:.1f}s -> "
+                  f"{result['rate']:,.0f} URLs/sec ({result['rate'] / baseline:.2f}x), "
+                  f"{result['shared_domains']}/{result['domains']} domains crawled by several workers, "
+                  f"busiest worker {result['skew']:.2f}x its fair share")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=lambda value: [int(n) for n in value.split(",")], default=[1, 2, 4, 8])
+    parser.add_argument("--urls", type=int, default=20000)
+    parser.add_argument("--domains", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--work-ms", type=float, default=1.0, help="simulated crawl time per URL")
+    parser.add_argument("--mongo-uri", help="use this MongoDB instead of starting one")
+    options = parser.parse_args()
+
+    if options.mongo_uri:
+        benchmark(options.mongo_uri, options)
+    else:
+        with throwaway_mongod() as mongo_uri:
+            benchmark(mongo_uri, options)
+
+
+if __name__ == "__main__":
+    main()
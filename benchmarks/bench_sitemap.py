@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Sitemap parsing benchmark: discovery.parse_sitemap streaming a gzipped sitemap against loading the
+whole document with etree.fromstring, reporting entries/sec and peak Python memory.
+Usage: python -m benchmarks.bench_sitemap [--urls N]
+"""
+
+import argparse
+import gzip
+import io
+import time
+import tracemalloc
+from lxml import etree
+from discovery import parse_sitemap, parse_lastmod
+
+NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def build_sitemap(count):
+    """A gzipped urlset with count entries, each with a lastmod and an image:loc that must be ignored."""
+    entries = "".join(
+        f"<url><loc>https://example.com/products/{i}</loc><lastmod>2025-01-{i % 28 + 1:02d}</lastmod>"
+        f"<image:image><image:loc>https://cdn.example.com/{i}.jpg</image:loc></image:image></url>"
+        for i in range(count)
+    )
+    xml = (
+        f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{NAMESPACE}" '
+        f'xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">{entries}</urlset>'
+    )
+    return gzip.compress(xml.encode("utf-8"))
+
+
+def whole_tree(data):
+    """Parse everything at once, the simple way."""
+    root = etree.fromstring(gzip.decompress(data))
+    return [
+        ("url", entry.findtext(f"{{{NAMESPACE}}}loc"), parse_lastmod(entry.findtext(f"{{{NAMESPACE}}}lastmod")))
+        for entry in root.iterfind(f"{{{NAMESPACE}}}url")
+    ]
+
+
+def streamed(data):
+    return list(parse_sitemap(gzip.GzipFile(fileobj=io.BytesIO(data))))
+
+
+def measure(label, func, data):
+    tracemalloc.start()
+    start = time.perf_counter()
+    entries = func(data)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {len(entries):,} entries in {elapsed:.2f}s -> {len(entries) / elapsed:,.0f}/sec, "
+          f"peak {peak / (1024 * 1024):.1f} MB")
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", type=int, default=50_000)
+    options = parser.parse_args()
+
+    data = build_sitemap(options.urls)
+    print(f"Sitemap: {options.urls:,} URLs, {len(data) / 1024:,.0f} KB gzipped")
+    expected = measure("tree", whole_tree, data)
+    actual = measure("streamed", streamed, data)
+    if actual != expected:
+        print("❌ Streamed parse disagrees with the whole-tree parse")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+Measures the cost of importing url.py with NER disabled and enabled.
+Fails if the disabled import pulls in transformers or torch.
+Usage: python -m benchmarks.bench_startup [--with-model]
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import url
+elapsed = time.perf_counter() - start
+if {load_model}:
+    import ner
+    ner.get_ner_pipeline()
+    elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "transformers": "transformers" in sys.modules,
+    "torch": "torch" in sys.modules,
+}}))
+"""
+
+
+def measure(ner_enabled):
+    env = dict(os.environ, CRAWLER_NER_ENABLED="1" if ner_enabled else "0")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(load_model=ner_enabled)],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    disabled = measure(ner_enabled=False)
+    print(f"NER disabled: {disabled['seconds']:.2f}s, {disabled['max_rss_mb']:.0f} MB, "
+          f"transformers={disabled['transformers']} torch={disabled['torch']}")
+
+    if disabled["transformers"] or disabled["torch"]:
+        print("❌ Importing url.py with NER disabled loaded transformers/torch")
+        sys.exit(1)
+
+    if "--with-model" in sys.argv:
+        enabled = measure(ner_enabled=True)
+        print(f"NER loaded:   {enabled['seconds']:.2f}s, {enabled['max_rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
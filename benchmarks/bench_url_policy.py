@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+URL policy benchmark: crawls a simulated dynamic site (product pages linked with ref/session/utm
+parameters, paginated lists, an endless events calendar and a relative link that nests /docs forever)
+with a fixed fetch budget, three ways: dropping every query string (the old behaviour), keeping queries
+as they are, and keeping them through url_policy.URLPolicy. Reports how many real products were reached,
+how many fetches returned content already seen, and how large the frontier grew.
+Usage: python -m benchmarks.bench_url_policy [--fetches N] [--items N] [--max-urls N] [--max-variants N]
+       [--mongo-uri URI]
+"""
+
+import argparse
+import random
+import time
+from collections import deque, Counter
+from urllib.parse import urlsplit, parse_qsl
+from pymongo import MongoClient
+import canonical
+from benchmarks.bench_crawl import throwaway_mongod
+from fingerprint import simhash
+from migrations import migrate
+from url_policy import URLPolicy
+from utils import generate_md5
+
+DB_NAME = "crawler_bench_url_policy"
+SITE = "https://shop.example"
+LIST_PAGE_SIZE = 20
+
+
+def content_key(url):
+    """What the page at url actually shows: ref, session and tracking parameters change nothing."""
+    parts = urlsplit(url)
+    params = dict(parse_qsl(parts.query))
+    if parts.path == "/item":
+        return f"item:{params.get('id')}"
+    if parts.path == "/list":
+        return f"list:{params.get('page', '1')}"
+    if parts.path == "/events":
+        return f"events:{params.get('month', '2025-01')}"
+    if parts.path.startswith("/docs"):
+        return "docs"
+    return parts.path
+
+
+def page_text(key):
+    rng = random.Random(key)
+    return f"{key} " + " ".join(f"word{rng.randrange(5000)}" for _ in range(300))
+
+
+def page_links(url, items):
+    """Raw hrefs on the page at url, the way a dynamic shop renders them."""
+    rng = random.Random(url)
+    key = content_key(url)
+    hrefs = ["/", "/list", "/events", "/docs/"]
+    # Each block links products with its own ref, and every link carries the visitor's session
+    session = rng.getrandbits(32)
+    for block in ("nav", "related", "footer"):
+        hrefs += [f"/item?id={rng.randrange(items)}&ref={block}&sessionid={session:x}&utm_source=site"
+                  for _ in range(3)]
+    if key.startswith("list:"):
+        page = int(key.split(":")[1])
+        if page * LIST_PAGE_SIZE < items:
+            hrefs.append(f"/list?page={page + 1}")
+        hrefs += [f"/item?id={i}" for i in range((page - 1) * LIST_PAGE_SIZE, min(page * LIST_PAGE_SIZE, items))]
+    elif key.startswith("events:"):
+        year, month = map(int, key.split(":")[1].split("-"))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        hrefs.append(f"/events?month={year}-{month:02d}")
+    elif key == "docs":
+        hrefs.append("more/")
+    return hrefs
+
+
+def crawl(mode, options, db=None):
+    keep_query = mode != "strip"
+    policy = None
+    if mode == "policy":
+        db["urls"].delete_many({})
+        policy = URLPolicy(db, max_urls=options.max_urls, max_variants=options.max_variants, state_seconds=5)
+    domain_url = {"domain_id": 1, "url": f"{SITE}/"}
+    queue, deferred = deque([f"{SITE}/"]), deque()
+    known = {f"{SITE}/"}
+    seen_content = Counter()
+    trapped = Counter()
+    start = time.perf_counter()
+
+    for _ in range(options.fetches):
+        if not queue and not deferred:
+            break
+        url = queue.popleft() if queue else deferred.popleft()
+        key = content_key(url)
+        seen_content[key] += 1
+        url_doc = dict(domain_url, url=url)
+        if policy:
+            fingerprint = simhash(page_text(key))
+            policy.observe(url_doc, fingerprint)
+            db["urls"].update_one({"md5_url": generate_md5(url)}, {"$set": {"content_fingerprint": fingerprint}})
+
+        links = set()
+        for href in page_links(url, options.items):
+            link = canonical.canonicalize_link(href, url, keep_query)
+            if link:
+                links.add(link[0])
+        later = {}
+        if policy:
+            links, later = policy.filter_links(links, url_doc, "shop.example")
+        new = [link for link in links if link not in known]
+        known.update(new)
+        trapped.update(later[link]["trap_reason"] for link in new if link in later)
+        for link in new:
+            (deferred if link in later else queue).append(link)
+        if policy and new:
+            db["urls"].insert_many([{"md5_url": generate_md5(link), "url": link, "domain_id": 1} for link in new])
+
+    fetches = sum(seen_content.values())
+    items = sum(1 for key in seen_content if key.startswith("item:"))
+    wasted = sum(count - 1 for count in seen_content.values())
+    print(f"{mode:<7} {fetches:,} fetches in {time.perf_counter() - start:.1f}s: {items:,}/{options.items:,} products, "
+          f"{wasted:,} fetches of content already seen ({wasted / max(fetches, 1):.0%}), "
+          f"frontier {len(queue):,} queued + {len(deferred):,} deferred"
+          + (f", deferred by reason {dict(trapped)}" if trapped else ""))
+
+
+def benchmark(mongo_uri, options):
+    client = MongoClient(mongo_uri)
+    client.drop_database(DB_NAME)
+    db = client[DB_NAME]
+    migrate(db)
+    db["domains"].insert_one({"_id": 1, "normalized_domain": "shop.example", "url": f"{SITE}/"})
+    for mode in ("strip", "keep", "policy"):
+        crawl(mode, options, db)
+    client.drop_database(DB_NAME)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fetches", type=int, default=5000, help="fetch budget per mode")
+    parser.add_argument("--items", type=int, default=500, help="distinct product pages on the site")
+    parser.add_argument("--max-urls", type=int, default=20000, help="per-domain URL cap for the policy run")
+    parser.add_argument("--max-variants", type=int, default=1000, help="query variants per path before deferring")
+    parser.add_argument("--mongo-uri", help="use this MongoDB instead of starting one")
+    options = parser.parse_args()
+
+    if options.mongo_uri:
+        benchmark(options.mongo_uri, options)
+    else:
+        with throwaway_mongod() as mongo_uri:
+            benchmark(mongo_uri, options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Local HTTP fixture server for crawler benchmarks.
+Serves a small generated site so benchmarks never touch the network.
+"""
+
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+PAGE_COUNT = 50
+ASSET_KINDS = ("css", "js", "woff2", "png", "png", "png")
+ASSET_TYPES = {"css": "text/css", "js": "text/javascript", "woff2": "font/woff2", "png": "image/png"}
+
+
+def render_page(page_id, page_count=PAGE_COUNT):
+    """Builds a simple HTML page linking to its neighbours."""
+    links = "".join(
+        f'<a href="/page/{(page_id + step) % page_count}">page {(page_id + step) % page_count}</a>\n'
+        for step in (1, 2, 3)
+    )
+    return (
+        f"<html><head><title>Page {page_id}</title></head><body>"
+        f"<h1>Page {page_id}</h1>"
+        f"<p>Contact John Doe at john{page_id}@example.com for more info.</p>"
+        f"{links}</body></html>"
+    )
+
+
+class SiteGraph:
+    """A generated site: page count, padded page size, links per page, and how many links redirect
+    or pages respond slowly. Everything is derived from the seed, so runs are repeatable."""
+
+    def __init__(self, pages=PAGE_COUNT, page_bytes=0, fanout=3, redirect_ratio=0.0, slow_ratio=0.0,
+                 slow_ms=200, seed=0, assets=0, asset_bytes=20_000):
+        self.pages = pages
+        self.page_bytes = page_bytes
+        self.fanout = fanout
+        self.redirect_ratio = redirect_ratio
+        self.slow_ratio = slow_ratio
+        self.slow_ms = slow_ms
+        self.seed = seed
+        self.assets = assets
+        self.asset_bytes = asset_bytes
+
+    def _rng(self, page_id):
+        return random.Random(self.seed * 1_000_003 + page_id)
+
+    def is_slow(self, page_id):
+        return self._rng(page_id).random() < self.slow_ratio
+
+    def links(self, page_id):
+        rng = self._rng(page_id)
+        rng.random()  # The first draw decides is_slow
+        targets = []
+        for _ in range(self.fanout):
+            target = rng.randrange(self.pages)
+            prefix = "/redirect/" if rng.random() < self.redirect_ratio else "/page/"
+            targets.append(f"{prefix}{target}")
+        return targets
+
+    def asset_tags(self, page_id):
+        """Subresources a browser would fetch: a stylesheet, script, font and images, cycling through them."""
+        tags = []
+        for index in range(self.assets):
+            kind = ASSET_KINDS[index % len(ASSET_KINDS)]
+            src = f"/asset/{page_id}-{index}.{kind}"
+            if kind == "css":
+                tags.append(f'<link rel="stylesheet" href="{src}">')
+            elif kind == "js":
+                tags.append(f'<script src="{src}"></script>')
+            elif kind == "woff2":
+                tags.append(f'<link rel="preload" as="font" crossorigin href="{src}">')
+            else:
+                tags.append(f'<img src="{src}">')
+        return "".join(tags)
+
+    def render(self, page_id):
+        links = "".join(f'<a href="{href}">{href}</a>\n' for href in self.links(page_id))
+        html = (
+            f"<html><head><title>Page {page_id}</title>{self.asset_tags(page_id)}</head><body>"
+            f"<h1>Page {page_id}</h1>"
+            f"<p>Contact John Doe at john{page_id}@example.com for more info.</p>"
+            f"{links}"
+        )
+        filler = "<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>\n"
+        missing = self.page_bytes - len(html) - len("</body></html>")
+        if missing > 0:
+            html += filler * (missing // len(filler) + 1)
+        return html + "</body></html>"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        site = self.server.site
+        if self.path.startswith("/redirect/"):
+            self.send_response(301)
+            self.send_header("Location", "/page/" + self.path.rsplit("/", 1)[1])
+            self.end_headers()
+            return
+
+        if self.path.startswith("/asset/") and site is not None:
+            kind = self.path.rsplit(".", 1)[-1]
+            # Blank padding is valid (empty) CSS and JS; images and fonts just fail to decode
+            body = b" " * site.asset_bytes
+            self.server.asset_requests += 1
+            self.send_response(200)
+            self.send_header("Content-Type", ASSET_TYPES.get(kind, "application/octet-stream"))
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if self.path.startswith(("/big/", "/download/")):
+            # /big/<MB> is an endless-looking generated HTML page, /download/<MB> a binary file
+            try:
+                megabytes = int(self.path.rsplit("/", 1)[1])
+            except ValueError:
+                megabytes = 1
+            html = self.path.startswith("/big/")
+            chunk = (b"<p>" + b"x" * 1017 + b"</p>") * 1024 if html else b"\0" * (1024 * 1024)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8" if html else "application/pdf")
+            self.send_header("Content-Length", str(len(chunk) * megabytes))
+            self.end_headers()
+            try:
+                for _ in range(megabytes):
+                    self.wfile.write(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # The client gave up, which is the point
+            return
+
+        if self.path.startswith("/page/"):
+            try:
+                page_id = int(self.path.rsplit("/", 1)[1])
+            except ValueError:
+                page_id = None
+            if page_id is not None:
+                if site is None:
+                    body = render_page(page_id).encode("utf-8")
+                else:
+                    if site.is_slow(page_id):
+                        time.sleep(site.slow_ms / 1000)
+                    body = site.render(page_id).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+        self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server(port=0, site=None):
+    """Starts the server on a background thread and returns (server, base_url).
+
+    Without a SiteGraph every page is render_page's three-neighbour ring.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    server.site = site
+    server.asset_requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
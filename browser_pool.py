@@ -0,0 +1,210 @@
+import logging
+import os
+from contextlib import contextmanager
+from playwright.sync_api import Error as PlaywrightError, sync_playwright
+from requests.structures import CaseInsensitiveDict
+from crawler_config import BROWSER_MAX_PAGES, BROWSER_MAX_MEMORY_MB, MAX_PAGE_BYTES, USER_AGENT
+from gating import TRUNCATED, gate_response
+from http_fetcher import REDIRECT_STATUSES, FetchResult
+from interception import InterceptionStats, get_profile
+from metrics import BROWSER_LAUNCHES
+
+logger = logging.getLogger(__name__)
+
+# Walking /proc is not free, so memory is only sampled every few pages
+MEMORY_CHECK_INTERVAL = 10
+
+
+def descendant_rss_mb(root_pid=None):
+    """Sums the resident memory (MB) of every process below root_pid. Linux only, 0 elsewhere."""
+    root_pid = root_pid or os.getpid()
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return 0
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    children = {}
+    rss = {}
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces, so split after its closing paren
+        fields = stat.rsplit(")", 1)[1].split()
+        pid = int(entry)
+        children.setdefault(int(fields[1]), []).append(pid)
+        rss[pid] = int(fields[21]) * page_size
+
+    total = 0
+    stack = list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total / (1024 * 1024)
+
+
+class BrowserPool:
+    """Keeps one Chromium instance alive and hands out a fresh isolated context per page."""
+
+    def __init__(self, max_pages=BROWSER_MAX_PAGES, max_memory_mb=BROWSER_MAX_MEMORY_MB, headless=True):
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.headless = headless
+        self._playwright = None
+        self._browser = None
+        self.pages_served = 0
+        self.launch_count = 0
+        self.last_interception = None  # InterceptionStats of the most recent page
+
+    def _launch(self):
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=self.headless)
+        self.pages_served = 0
+        self.launch_count += 1
+        BROWSER_LAUNCHES.inc()
+
+    def _close_browser(self):
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+
+    def _should_recycle(self):
+        if self._browser is None or not self._browser.is_connected():
+            return True
+        if self.max_pages and self.pages_served >= self.max_pages:
+            return True
+        if (self.max_memory_mb and self.pages_served % MEMORY_CHECK_INTERVAL == 0
+                and descendant_rss_mb() > self.max_memory_mb):
+            logger.info("♻️ Browser memory above %s MB, recycling", self.max_memory_mb)
+            return True
+        return False
+
+    @contextmanager
+    def page(self, profile=None):
+        """Yields a new page in its own browser context; the context is closed afterwards.
+
+        Requests the interception profile rules out are aborted before they leave the browser.
+        """
+        if self._should_recycle():
+            self._close_browser()
+            self._launch()
+
+        profile = profile or get_profile()
+        stats = InterceptionStats(profile)
+        context = self._browser.new_context(user_agent=USER_AGENT)
+        if profile.intercepts:
+            context.route("**/*", lambda route: route.continue_() if stats.allow(route.request) else route.abort())
+        try:
+            yield context.new_page()
+        finally:
+            self.pages_served += 1
+            stats.finish()
+            self.last_interception = stats
+            try:
+                context.close()
+            except Exception:
+                pass
+
+    def fetch(self, url, timeout=30000, profile=None):
+        """Loads url and returns a FetchResult (html, status, final_url, redirect_chain, headers).
+
+        profile is an interception.InterceptionProfile; the configured default when omitted.
+        Non-HTML and oversize documents come back with html=None and a gating outcome.
+        """
+        redirect_chain_info = []
+
+        with self.page(profile) as page:
+            seen_urls = set()
+
+            def handle_response(response):
+                req = response.request
+                if req.resource_type != "document":
+                    return
+
+                redirected_from = req.redirected_from
+
+                if redirected_from:
+                    orig_url = redirected_from.url
+                    if orig_url not in seen_urls:
+                        seen_urls.add(orig_url)
+                        orig_resp = redirected_from.response()
+                        redirect_chain_info.append({
+                            "url": orig_url,
+                            "status": orig_resp.status if orig_resp else None
+                        })
+
+                if response.url not in seen_urls:
+                    seen_urls.add(response.url)
+                    redirect_chain_info.append({
+                        "url": response.url,
+                        "status": response.status
+                    })
+
+            page.on("response", handle_response)
+
+            # The top-level document is fetched through the route so non-HTML and oversize bodies are
+            # aborted before the browser parses or renders them; the driver has still downloaded them
+            gated = {}
+
+            def gate_document(route):
+                request = route.request
+                if not request.is_navigation_request() or request.frame.parent_frame is not None:
+                    route.fallback()
+                    return
+                try:
+                    response = route.fetch(max_redirects=0)
+                except PlaywrightError:
+                    # Let the browser make the request itself and report the failure as usual
+                    route.fallback()
+                    return
+                headers = CaseInsensitiveDict(response.headers)
+                outcome = None
+                if response.status not in REDIRECT_STATUSES:
+                    outcome = gate_response(headers, response.body())
+                if outcome:
+                    gated.update(outcome=outcome, url=request.url, status=response.status, headers=headers)
+                    route.abort()
+                else:
+                    route.fulfill(response=response)
+
+            page.route("**/*", gate_document)
+
+            try:
+                response = page.goto(url, timeout=timeout, wait_until='domcontentloaded')
+            except PlaywrightError:
+                if not gated:
+                    raise
+            if gated:
+                redirect_chain_info.append({"url": gated["url"], "status": gated["status"]})
+                return FetchResult(None, gated["status"], gated["url"], redirect_chain_info, gated["headers"],
+                                   gated["outcome"])
+
+            final_url = page.url
+            status_code = response.status if response else None
+            headers = CaseInsensitiveDict(response.headers if response else {})
+
+            # Scripts can still grow the DOM past the cap after the document itself passed
+            html_content = page.content()
+            if MAX_PAGE_BYTES and len(html_content.encode("utf-8")) > MAX_PAGE_BYTES:
+                html_content, outcome = None, TRUNCATED
+            else:
+                outcome = None
+
+            return FetchResult(html_content, status_code, final_url, redirect_chain_info, headers, outcome)
+
+    def close(self):
+        """Shuts down the browser and the Playwright driver."""
+        self._close_browser()
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
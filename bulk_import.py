@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+"""
+Bulk import of domains and seed URLs from CSV, JSONL or plain text (one per line), file or stdin.
+Each batch resolves its domains with one bulk upsert and inserts its URL documents with one
+unordered bulk_write. Progress is checkpointed after every batch, so an interrupted import
+resumes where it stopped when run again with the same arguments.
+Usage: python bulk_import.py [path|-] [--format csv|jsonl|txt] [--batch-size N] [--checkpoint PATH]
+CSV needs a header with a `url` and/or `domain` column (optional `notes`); JSONL lines are objects
+with the same keys or plain strings.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime, UTC
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+from canonical import canonicalize, host
+from db_handler import DatabaseHandler
+from domain import DomainHandler, normalize_domain
+from link_writer import DUPLICATE_KEY_ERROR
+from partition import partition_of
+from utils import generate_md5
+
+REPORT_SECONDS = 5
+
+
+def read_rows(stream, fmt):
+    """Yields {"url"/"domain"/"notes": ...} dicts from an open text stream."""
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            yield {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+    elif fmt == "jsonl":
+        for line in stream:
+            line = line.strip()
+            if not line:
+                yield {}
+                continue
+            try:
+                value = json.loads(line)
+            except json.JSONDecodeError:
+                yield {}
+                continue
+            yield value if isinstance(value, dict) else {"url": str(value)}
+    else:
+        for line in stream:
+            yield {"url": line.strip()}
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    return {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(extension, "txt")
+
+
+def build_seed_document(url, domain_id, normalized_domain, now):
+    return {
+        "md5_url": generate_md5(url),
+        "url": url,
+        "domain_id": domain_id,
+        "partition": partition_of(domain_id),
+        "normalized_domain": normalized_domain,
+        "discovered_at": now,
+        "last_updated": now,
+        "status": "pending",
+    }
+
+
+class Checkpoint:
+    """Number of input rows already imported, stored next to the input (or wherever --checkpoint says)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)["rows"]
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def save(self, rows):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"rows": rows, "updated_at": datetime.now(UTC).isoformat()}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BulkImporter:
+    """Normalizes rows, upserts their domains and inserts seed URL documents, a batch at a time."""
+
+    def __init__(self, db_handler=None, batch_size=1000):
+        self.db_handler = db_handler or DatabaseHandler()
+        self.domain_handler = DomainHandler(self.db_handler)
+        self.urls_collection = self.db_handler.urls_collection
+        self.batch_size = batch_size
+        self.rows = 0
+        self.invalid = 0
+        self.domains = 0
+        self.inserted = 0
+        self.existing = 0
+
+    def normalize(self, row):
+        """Returns (normalized_domain, homepage, seed_url, notes), or None if the row has nothing usable."""
+        url = canonicalize(row["url"]) if row.get("url") else None
+        domain_name = row.get("domain") or (host(url) if url else None)
+        if not domain_name:
+            return None
+        normalized_domain, homepage = normalize_domain(domain_name)
+        if normalized_domain is None:
+            return None
+        return normalized_domain, homepage, url or homepage, row.get("notes") or None
+
+    def import_batch(self, rows):
+        normalized = []
+        for row in rows:
+            entry = self.normalize(row)
+            if entry is None:
+                self.invalid += 1
+            else:
+                normalized.append(entry)
+        if not normalized:
+            return
+
+        domains = {name: (homepage, notes) for name, homepage, _, notes in normalized}
+        domain_ids = self.domain_handler.bulk_add_domains(domains)
+        self.domains += len(domains)
+
+        now = datetime.now(UTC)
+        seeds = {url: name for name, _, url, _ in normalized}
+        ops = [
+            InsertOne(build_seed_document(url, domain_ids[name], name, now))
+            for url, name in seeds.items() if name in domain_ids
+        ]
+        try:
+            result = self.urls_collection.bulk_write(ops, ordered=False)
+            inserted = result.inserted_count
+        except BulkWriteError as e:
+            # URLs that are already queued (or crawled) are left alone
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details["writeErrors"]):
+                raise
+            inserted = e.details["nInserted"]
+        self.inserted += inserted
+        self.existing += len(ops) - inserted
+
+    def run(self, rows, checkpoint=None):
+        skip = checkpoint.load() if checkpoint else 0
+        if skip:
+            print(f"Resuming after {skip} rows")
+        start = last_report = time.perf_counter()
+        batch = []
+        self.rows = skip
+        for index, row in enumerate(rows):
+            if index < skip:
+                continue
+            batch.append(row)
+            if len(batch) < self.batch_size:
+                continue
+            self.import_batch(batch)
+            self.rows += len(batch)
+            batch = []
+            if checkpoint:
+                checkpoint.save(self.rows)
+            if time.perf_counter() - last_report >= REPORT_SECONDS:
+                last_report = time.perf_counter()
+                self.report(last_report - start, skip)
+        if batch:
+            self.import_batch(batch)
+            self.rows += len(batch)
+        if checkpoint:
+            checkpoint.clear()
+        self.report(time.perf_counter() - start, skip)
+
+    def report(self, elapsed, skipped=0):
+        done = self.rows - skipped
+        print(f"{self.rows} rows ({done / max(elapsed, 1e-9):,.0f} rows/sec): {self.inserted} URLs inserted, "
+              f"{self.existing} already present, {self.domains} domain upserts, {self.invalid} invalid rows")
+
+
+def main():
+    """Main function to bulk import domains and seed URLs."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", nargs="?", default="-", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=["csv", "jsonl", "txt"])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <path>.checkpoint; none for stdin)")
+    options = parser.parse_args()
+
+    fmt = options.format or ("txt" if options.path == "-" else detect_format(options.path))
+    checkpoint_path = options.checkpoint or (None if options.path == "-" else f"{options.path}.checkpoint")
+    checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+
+    importer = BulkImporter(batch_size=options.batch_size)
+    if options.path == "-":
+        importer.run(read_rows(sys.stdin, fmt), checkpoint)
+    else:
+        with open(options.path, newline="", encoding="utf-8", errors="replace") as stream:
+            importer.run(read_rows(stream, fmt), checkpoint)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit, quote
+import tldextract
+from crawler_config import CANONICAL_BASE_CACHE_SIZE, CANONICAL_HOST_CACHE_SIZE
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+CRAWLABLE_SCHEMES = {"http", "https"}
+UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+
+_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+# Anything outside RFC 3986 pchar, "/", "?" and existing escapes has to be percent-encoded
+_NEEDS_QUOTING = re.compile(r"[^A-Za-z0-9\-._~!$&'()*+,;=:@/?%]")
+_PATH_SAFE = "/!$&'()*+,;=:@%-._~"
+_QUERY_SAFE = _PATH_SAFE + "?"
+# Session ids some servers put in the path instead of a cookie: /cart;jsessionid=0A1B...
+_SESSION_PATH_PARAM = re.compile(r";(?:jsessionid|phpsessid|sid)=[^/]*", re.IGNORECASE)
+# A leading "scheme:" (RFC 3986 section 3.1), except the "host:port" of a bare "example.com:8080/path"
+_SCHEME_PREFIX = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*:(?!\d+(?:[/?#]|$))")
+
+# Query parameters that only track the visitor or the click, never the page; utm_* is matched by prefix
+TRACKING_PARAMS = frozenset({
+    "gclid", "dclid", "gbraid", "wbraid", "fbclid", "msclkid", "yclid", "twclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "_hsenc", "_hsmi", "ref_src", "sessionid", "session_id", "sid", "phpsessid", "jsessionid",
+    "aspsessionid", "cfid", "cftoken",
+})
+
+_tld_extractor = None
+
+
+def _unescape_unreserved(match):
+    char = chr(int(match.group(1), 16))
+    return char if char in UNRESERVED else f"%{match.group(1).upper()}"
+
+
+def _normalize_escapes(component, safe):
+    """Uppercases percent-escapes, decodes the ones for unreserved characters and encodes anything illegal."""
+    if "%" in component:
+        component = _ESCAPE.sub(_unescape_unreserved, component)
+    if _NEEDS_QUOTING.search(component):
+        component = quote(component, safe=safe)
+    return component
+
+
+def remove_dot_segments(path):
+    """RFC 3986 section 5.2.4."""
+    if "." not in path:
+        return path
+    output = []
+    for segment in path.split("/"):
+        if segment == "..":
+            if len(output) > 1:
+                output.pop()
+        elif segment != ".":
+            output.append(segment)
+    if path.endswith(("/.", "/..")):
+        output.append("")
+    return "/".join(output)
+
+
+@lru_cache(maxsize=CANONICAL_HOST_CACHE_SIZE)
+def normalize_netloc(netloc, scheme):
+    """Returns (netloc, host): host lowercased, IDNA-encoded, without a trailing dot or "www.", default port dropped."""
+    userinfo, _, hostport = netloc.rpartition("@")
+    if hostport.startswith("["):
+        end = hostport.find("]") + 1
+        host, port = hostport[:end], hostport[end + 1:]
+    else:
+        host, _, port = hostport.partition(":")
+    host = host.lower().rstrip(".")
+    if not host.isascii():
+        try:
+            host = host.encode("idna").decode("ascii")
+        except UnicodeError:
+            pass
+    # Not RFC 3986: the crawler has always treated www.example.com and example.com as one site
+    if host.startswith("www."):
+        host = host[4:]
+    if port == DEFAULT_PORTS.get(scheme):
+        port = ""
+    netloc = f"{host}:{port}" if port else host
+    return (f"{userinfo}@{netloc}" if userinfo else netloc), host
+
+
+@lru_cache(maxsize=CANONICAL_BASE_CACHE_SIZE)
+def split_base(base_url):
+    """urlsplit() of a base URL with scheme and path normalized; bases repeat for every link on a page."""
+    parts = urlsplit(base_url)
+    return parts.scheme.lower(), parts.netloc, parts.path or "/", parts.query
+
+
+def split_query(query):
+    """[(name, "name=value"), ...] for the non-empty pairs of a query string, in order."""
+    return [(pair.partition("=")[0], pair) for pair in query.split("&") if pair]
+
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith("utm_")
+
+
+def normalize_query(query, ignore=frozenset()):
+    """Drops tracking parameters and those in ignore, and sorts the rest by name (stable for repeated names)."""
+    pairs = [(name, pair) for name, pair in split_query(query) if name not in ignore and not is_tracking_param(name)]
+    pairs.sort(key=lambda entry: entry[0])
+    return "&".join(pair for _, pair in pairs)
+
+
+def _merge(base_path, path):
+    return base_path[:base_path.rfind("/") + 1] + path
+
+
+def canonicalize_link(href, base_url=None, keep_query=False):
+    """Resolves href against base_url (RFC 3986 section 5.2) and normalizes it (section 6.2.2).
+
+    Returns (url, host), or None for non-HTTP schemes and unparseable input. The fragment
+    is always dropped and, unless keep_query is set, so is the query string; a kept query
+    loses its tracking parameters and is sorted (see normalize_query).
+    """
+    try:
+        scheme, netloc, path, query, _ = urlsplit(href)
+    except ValueError:
+        return None
+    scheme = scheme.lower()
+
+    if not scheme:
+        if base_url is None:
+            return None
+        try:
+            base_scheme, base_netloc, base_path, base_query = split_base(base_url)
+        except ValueError:
+            return None
+        scheme = base_scheme
+        if not netloc:
+            netloc = base_netloc
+            if not path:
+                path = base_path
+                query = query or base_query
+            elif not path.startswith("/"):
+                path = _merge(base_path, path)
+
+    if scheme not in CRAWLABLE_SCHEMES or not netloc:
+        return None
+
+    netloc, host = normalize_netloc(netloc, scheme)
+    if not host:
+        return None
+    if ";" in path:
+        path = _SESSION_PATH_PARAM.sub("", path)
+    path = remove_dot_segments(_normalize_escapes(path, _PATH_SAFE)) or "/"
+    url = f"{scheme}://{netloc}{path}"
+    if keep_query and query:
+        query = normalize_query(_normalize_escapes(query, _QUERY_SAFE))
+        if query:
+            url = f"{url}?{query}"
+    return url, host
+
+
+def canonicalize(url, base_url=None, keep_query=False):
+    """Canonical form of url (see canonicalize_link), or None if it can't be crawled.
+
+    A bare "example.com/path" without a base is read as http://example.com/path; anything
+    else without a base needs an http(s) scheme and a "//" authority, so "mailto:x@y.com"
+    or "http:example.com" is dropped rather than read as a host.
+    """
+    url = url.strip()
+    if base_url is None:
+        scheme = _SCHEME_PREFIX.match(url)
+        if scheme is None:
+            url = f"http://{url.lstrip('/')}"
+        elif not url.startswith("//", scheme.end()):
+            return None
+    result = canonicalize_link(url, base_url, keep_query)
+    return result[0] if result else None
+
+
+def host(url):
+    """Normalized host of an absolute URL (no port, no "www."), or None."""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    if not parts.netloc:
+        return None
+    return normalize_netloc(parts.netloc, parts.scheme.lower())[1]
+
+
+@lru_cache(maxsize=CANONICAL_HOST_CACHE_SIZE)
+def registrable_domain(hostname):
+    """The public-suffix-plus-one domain of a host (blog.example.co.uk -> example.co.uk).
+
+    Uses the public suffix list snapshot bundled with tldextract, never the network.
+    IP addresses and single-label hosts are returned unchanged.
+    """
+    global _tld_extractor
+    if not hostname:
+        return hostname
+    if _tld_extractor is None:
+        _tld_extractor = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+    return _tld_extractor(hostname).registered_domain or hostname
+
+
+def same_site(url_a, url_b):
+    """True if both URLs belong to the same registrable domain."""
+    return registrable_domain(host(url_a)) == registrable_domain(host(url_b))
+
+
+def cache_stats():
+    return {
+        "base": split_base.cache_info()._asdict(),
+        "netloc": normalize_netloc.cache_info()._asdict(),
+        "registrable_domain": registrable_domain.cache_info()._asdict(),
+    }
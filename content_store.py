@@ -0,0 +1,120 @@
+import abc
+import hashlib
+import os
+import gridfs
+import zstandard
+from pymongo.errors import DuplicateKeyError
+from crawler_config import CONTENT_STORE, CONTENT_STORE_PATH, CONTENT_ZSTD_LEVEL
+
+GRIDFS_BUCKET = "page_content"
+
+
+def content_hash(data):
+    """Content address of a page body: sha256 of its UTF-8 bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ContentStore(abc.ABC):
+    """zstd-compressed page bodies keyed by content hash; identical bodies are stored once."""
+
+    def __init__(self, level=CONTENT_ZSTD_LEVEL):
+        self.level = level
+
+    def put(self, html):
+        """Stores html unless an identical body is already stored; returns the fields kept on the urls document."""
+        data = html.encode("utf-8")
+        digest = content_hash(data)
+        stored_size = self._stored_size(digest)
+        if stored_size is None:
+            # Compressor objects aren't thread safe, and creating one is cheap next to compressing a page
+            compressed = zstandard.ZstdCompressor(level=self.level).compress(data)
+            self._write(digest, compressed, len(data))
+            stored_size = len(compressed)
+        return {
+            "content_hash": digest,
+            "content_size": len(data),
+            "content_stored_size": stored_size,
+        }
+
+    def get(self, digest):
+        """Returns the stored body as text, or None if it isn't there."""
+        compressed = self._read(digest)
+        if compressed is None:
+            return None
+        return zstandard.ZstdDecompressor().decompress(compressed).decode("utf-8")
+
+    @abc.abstractmethod
+    def _stored_size(self, digest):
+        """Size in bytes of the stored body, or None if it isn't stored."""
+
+    @abc.abstractmethod
+    def _write(self, digest, compressed, size):
+        """Stores a compressed body; size is its uncompressed length."""
+
+    @abc.abstractmethod
+    def _read(self, digest):
+        """Returns the compressed body, or None if it isn't stored."""
+
+
+class FileContentStore(ContentStore):
+    """Local store sharded two levels deep by hash prefix: root/ab/cd/abcd....zst"""
+
+    def __init__(self, root=CONTENT_STORE_PATH, level=CONTENT_ZSTD_LEVEL):
+        super().__init__(level)
+        self.root = root
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}.zst")
+
+    def _stored_size(self, digest):
+        try:
+            return os.path.getsize(self.path(digest))
+        except OSError:
+            return None
+
+    def _write(self, digest, compressed, size):
+        path = self.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+
+    def _read(self, digest):
+        try:
+            with open(self.path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+class GridFSContentStore(ContentStore):
+    """Store in a GridFS bucket, using the content hash as the file _id."""
+
+    def __init__(self, db, level=CONTENT_ZSTD_LEVEL):
+        super().__init__(level)
+        self.bucket = gridfs.GridFSBucket(db, bucket_name=GRIDFS_BUCKET)
+        self.files = db[f"{GRIDFS_BUCKET}.files"]
+
+    def _stored_size(self, digest):
+        doc = self.files.find_one({"_id": digest}, {"length": 1})
+        return doc["length"] if doc else None
+
+    def _write(self, digest, compressed, size):
+        try:
+            self.bucket.upload_from_stream_with_id(digest, digest, compressed, metadata={"size": size})
+        except (DuplicateKeyError, gridfs.errors.FileExists):
+            pass  # Another worker stored the same body first
+
+    def _read(self, digest):
+        try:
+            return self.bucket.open_download_stream(digest).read()
+        except gridfs.errors.NoFile:
+            return None
+
+
+def get_content_store(db):
+    """Builds the store selected by CRAWLER_CONTENT_STORE ("gridfs" or "file")."""
+    if CONTENT_STORE == "file":
+        return FileContentStore()
+    return GridFSContentStore(db)
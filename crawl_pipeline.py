@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+"""
+Staged crawl: claim -> fetch -> parse -> extract -> persist, each stage on its own threads
+with bounded queues in between, so a slow stage applies backpressure instead of piling up work
+and the browser keeps fetching while NER runs.
+Usage: python crawl_pipeline.py [max_urls]
+"""
+
+import sys
+import logging
+import time
+import queue
+import signal
+import threading
+from collections import deque
+from crawler_config import (
+    CONDITIONAL_RECRAWL, NER_PAGES_PER_BATCH, PIPELINE_QUEUE_SIZE, PIPELINE_CLAIM_BATCH,
+    PIPELINE_FETCH_WORKERS, PIPELINE_PARSE_WORKERS, PIPELINE_EXTRACT_WORKERS, PIPELINE_PERSIST_WORKERS,
+    PIPELINE_REPORT_SECONDS,
+)
+from browser_pool import BrowserPool
+from frontier import get_locked_by
+from url import URLHandler
+from metrics import REGISTRY, setup_logging, start_metrics
+
+logger = logging.getLogger(__name__)
+QUEUE_DEPTH = REGISTRY.gauge("crawler_pipeline_queue_depth", "Items waiting in front of each pipeline stage")
+STAGE_SECONDS = REGISTRY.histogram("crawler_pipeline_stage_seconds", "Per-item latency of each pipeline stage")
+
+STOP = object()  # End-of-stream marker; each stage forwards one per downstream worker once it has drained
+
+
+class StageStats:
+    """Item count, errors and a window of recent per-item latencies for one stage."""
+
+    def __init__(self, window=1000):
+        self.processed = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, items=1, failed=False):
+        with self._lock:
+            self.processed += items
+            self.errors += failed
+            self.latencies.extend([seconds / items] * items)
+
+    def percentile(self, fraction):
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+
+class Stage:
+    """Runs func over items from inbox on `workers` threads and passes non-None results to outbox.
+
+    With batch_size > 1 func receives a list of up to batch_size items that were already
+    waiting and returns a list of results.
+    """
+
+    def __init__(self, name, func, workers, inbox, outbox=None, batch_size=1, on_exit=None):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.inbox = inbox
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self.on_exit = on_exit  # Called on each worker thread as it finishes, for thread-bound resources
+        self.stats = StageStats()
+        self.downstream_workers = 0
+        self._running = workers
+        self._lock = threading.Lock()
+        self.threads = []
+
+    def start(self, downstream_workers=0):
+        self.downstream_workers = downstream_workers
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name}-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _take(self):
+        """Next batch of items, and whether the end-of-stream marker was reached."""
+        item = self.inbox.get()
+        if item is STOP:
+            return [], True
+        items = [item]
+        while len(items) < self.batch_size:
+            try:
+                item = self.inbox.get_nowait()
+            except queue.Empty:
+                break
+            if item is STOP:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _run(self):
+        try:
+            stopped = False
+            while not stopped:
+                items, stopped = self._take()
+                if not items:
+                    continue
+                start = time.perf_counter()
+                try:
+                    results = self.func(items) if self.batch_size > 1 else [self.func(items[0])]
+                except Exception as e:
+                    logger.error("%s stage failed on %d items: %s", self.name, len(items), e)
+                    self.stats.record(time.perf_counter() - start, len(items), failed=True)
+                    continue
+                elapsed = time.perf_counter() - start
+                self.stats.record(elapsed, len(items))
+                STAGE_SECONDS.observe(elapsed / len(items), stage=self.name)
+                for result in results:
+                    if result is not None and self.outbox is not None:
+                        self.outbox.put(result)
+        finally:
+            if self.on_exit:
+                self.on_exit()
+            self._worker_done()
+
+    def _worker_done(self):
+        with self._lock:
+            self._running -= 1
+            last = self._running == 0
+        if last and self.outbox is not None:
+            for _ in range(self.downstream_workers):
+                self.outbox.put(STOP)
+
+    def join(self):
+        for thread in self.threads:
+            thread.join()
+
+
+class CrawlPipeline:
+    """Drives one URLHandler through the staged crawl; stages share its database handles and link writer."""
+
+    def __init__(self, url_handler=None, queue_size=PIPELINE_QUEUE_SIZE, claim_batch=PIPELINE_CLAIM_BATCH,
+                 fetch_workers=PIPELINE_FETCH_WORKERS, parse_workers=PIPELINE_PARSE_WORKERS,
+                 extract_workers=PIPELINE_EXTRACT_WORKERS, persist_workers=PIPELINE_PERSIST_WORKERS,
+                 report_seconds=PIPELINE_REPORT_SECONDS):
+        self.url_handler = url_handler or URLHandler()
+        self.claim_batch = claim_batch
+        self.report_seconds = report_seconds
+        self.locked_by = get_locked_by()
+        self.claim_stats = StageStats()
+        self._browser = threading.local()
+        self._done = threading.Event()
+
+        fetch_queue, parse_queue, extract_queue, persist_queue = (queue.Queue(queue_size) for _ in range(4))
+        self.fetch_queue = fetch_queue
+        self.stages = [
+            Stage("fetch", self.fetch, fetch_workers, fetch_queue, parse_queue, on_exit=self.close_browser),
+            Stage("parse", self.parse, parse_workers, parse_queue, extract_queue),
+            Stage("extract", self.extract, extract_workers, extract_queue, persist_queue,
+                  batch_size=NER_PAGES_PER_BATCH),
+            Stage("persist", self.persist, persist_workers, persist_queue),
+        ]
+
+    def browser_pool(self):
+        """Playwright's sync API is bound to the thread that started it, so each fetch thread gets its own pool."""
+        if not hasattr(self._browser, "pool"):
+            self._browser.pool = BrowserPool()
+        return self._browser.pool
+
+    def close_browser(self):
+        if hasattr(self._browser, "pool"):
+            self._browser.pool.close()
+
+    def fetch(self, url):
+        validators = None
+        if CONDITIONAL_RECRAWL:
+            validators = {"etag": url.get("etag"), "last_modified": url.get("last_modified")}
+        result = self.url_handler.fetch_page(url["url"], url.get("domain_id"), validators, self.browser_pool())
+        return url, result
+
+    def parse(self, fetched):
+        return self.url_handler.extract_page(*fetched)
+
+    def extract(self, pages):
+        try:
+            batch_names = self.url_handler.ner_batcher.submit([page["text"] for page in pages]).result()
+        except Exception as e:
+            logger.error("NER failed for a batch of %d pages: %s", len(pages), e)
+            batch_names = [[] for _ in pages]
+        for page, person_names in zip(pages, batch_names):
+            page["person_names"] = person_names
+        return pages
+
+    def persist(self, page):
+        self.url_handler.store_page_content(page)
+        self.url_handler.complete_url(page, {"person_names": page.pop("person_names")})
+
+    def claim(self, max_urls=None):
+        """Feeds claimed URLs into the fetch queue until the frontier is empty, max_urls is reached or a stop is requested."""
+        claimed = 0
+        while not self.url_handler.stop_requested and (max_urls is None or claimed < max_urls):
+            batch = self.claim_batch if max_urls is None else min(self.claim_batch, max_urls - claimed)
+            start = time.perf_counter()
+            urls = self.url_handler.frontier.claim(self.locked_by, batch)
+            if not urls:
+                break
+            self.claim_stats.record(time.perf_counter() - start, len(urls))
+            claimed += len(urls)
+            for url in urls:
+                # Blocks while the fetch stage is behind; claimed URLs keep their lease through report()
+                self.fetch_queue.put(url)
+        for _ in range(self.stages[0].workers):
+            self.fetch_queue.put(STOP)
+        return claimed
+
+    def report(self):
+        """One line per stage: queue depth in front of it, items done, latency percentiles and errors."""
+        logger.info("Pipeline claim: %d URLs, p50 %.1f ms/URL",
+                    self.claim_stats.processed, self.claim_stats.percentile(0.5) * 1000)
+        for stage in self.stages:
+            stats = stage.stats
+            QUEUE_DEPTH.set(stage.inbox.qsize(), stage=stage.name)
+            logger.info("  %-8s queue %4d/%-4d done %6d  p50 %7.1f ms  p95 %7.1f ms  errors %d",
+                        stage.name, stage.inbox.qsize(), stage.inbox.maxsize, stats.processed,
+                        stats.percentile(0.5) * 1000, stats.percentile(0.95) * 1000, stats.errors)
+
+    def _monitor(self):
+        while not self._done.wait(self.report_seconds):
+            self.url_handler.frontier.renew(self.locked_by)
+            self.report()
+
+    def run(self, max_urls=None):
+        for stage, downstream in zip(self.stages, self.stages[1:] + [None]):
+            stage.start(downstream.workers if downstream else 0)
+        monitor = threading.Thread(target=self._monitor, name="pipeline-monitor", daemon=True)
+        monitor.start()
+        start = time.perf_counter()
+        try:
+            claimed = self.claim(max_urls)
+            for stage in self.stages:
+                stage.join()
+        finally:
+            self._done.set()
+            self.url_handler.flush_links()
+            # Anything a failed stage dropped goes back to the queue instead of waiting out its lease
+            self.url_handler.frontier.release(self.locked_by)
+        elapsed = time.perf_counter() - start
+        self.report()
+        logger.info("Pipeline finished: %d URLs in %.1fs (%.2f URLs/sec)", claimed, elapsed, claimed / max(elapsed, 1e-9))
+        return claimed
+
+
+def main():
+    """Main function to run one staged crawl."""
+    max_urls = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    setup_logging()
+    start_metrics()
+    url_handler = URLHandler()
+
+    def request_stop(signum, frame):
+        # Stop claiming; everything already claimed still runs through the stages
+        url_handler.stop_requested = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    try:
+        url_handler.initialize_homepage_urls()
+        CrawlPipeline(url_handler).run(max_urls)
+    finally:
+        url_handler.close()
+    print("Crawling process completed.")
+
+
+if __name__ == "__main__":
+    main()
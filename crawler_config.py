@@ -0,0 +1,143 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+USER_AGENT = os.getenv("CRAWLER_USER_AGENT", "Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
+
+# Browser pool: recycle Chromium after this many pages or once its memory grows past the limit
+BROWSER_MAX_PAGES = int(os.getenv("CRAWLER_BROWSER_MAX_PAGES", "200"))
+BROWSER_MAX_MEMORY_MB = int(os.getenv("CRAWLER_BROWSER_MAX_MEMORY_MB", "1024"))
+# Requests the browser aborts ("html-only", "scripts" or "full", see interception.py) unless the domain
+# document sets `interception_profile`; domains known to need JavaScript get "scripts"
+BROWSER_INTERCEPTION_PROFILE = os.getenv("CRAWLER_BROWSER_INTERCEPTION_PROFILE", "html-only")
+
+# Async crawl mode: pages in flight overall, per normalized_domain, and the pause between hits on one domain
+CRAWL_CONCURRENCY = int(os.getenv("CRAWLER_CONCURRENCY", "32"))
+DOMAIN_CONCURRENCY = int(os.getenv("CRAWLER_DOMAIN_CONCURRENCY", "2"))
+DOMAIN_DELAY_SECONDS = float(os.getenv("CRAWLER_DOMAIN_DELAY_SECONDS", "1.0"))
+
+# Plain-HTTP fast path tried before the browser; set CRAWLER_HTTP_FAST_PATH=0 to always use Chromium
+HTTP_FAST_PATH = os.getenv("CRAWLER_HTTP_FAST_PATH", "1") == "1"
+HTTP_TIMEOUT_SECONDS = float(os.getenv("CRAWLER_HTTP_TIMEOUT_SECONDS", "30"))
+HTTP_POOL_SIZE = int(os.getenv("CRAWLER_HTTP_POOL_SIZE", "20"))
+
+# Content gating: bodies larger than this many bytes are abandoned mid-download and recorded as "truncated";
+# before a URL is opened in the browser a HEAD request checks its Content-Type and Content-Length. In the browser
+# the document is fetched in full but checked before it is parsed, and the rendered DOM is checked again
+MAX_PAGE_BYTES = int(os.getenv("CRAWLER_MAX_PAGE_BYTES", str(5 * 1024 * 1024)))
+GATE_HEAD_REQUESTS = os.getenv("CRAWLER_GATE_HEAD_REQUESTS", "1") == "1"
+
+# robots.txt (discovery.py): checked before fetching a URL and before queueing discovered links; parsed rules
+# are reused for this many hours, and matched against this user agent token
+RESPECT_ROBOTS = os.getenv("CRAWLER_RESPECT_ROBOTS", "1") == "1"
+ROBOTS_TTL_HOURS = float(os.getenv("CRAWLER_ROBOTS_TTL_HOURS", "24"))
+ROBOTS_USER_AGENT = os.getenv("CRAWLER_ROBOTS_USER_AGENT", "*")
+
+# Sitemap seeding (python discovery.py): how often a domain's sitemaps are re-read, and at most how many
+# URLs and sitemap files are taken from one domain per run
+SITEMAP_REFRESH_HOURS = float(os.getenv("CRAWLER_SITEMAP_REFRESH_HOURS", "24"))
+SITEMAP_MAX_URLS = int(os.getenv("CRAWLER_SITEMAP_MAX_URLS", "50000"))
+SITEMAP_MAX_FILES = int(os.getenv("CRAWLER_SITEMAP_MAX_FILES", "100"))
+
+# Batched NER: token window per chunk (BERT allows 512 incl. special tokens), overlap between windows,
+# chunks per pipeline call, pages handed to the model at once, and the pool running it ("thread" or "process")
+NER_MAX_TOKENS = int(os.getenv("CRAWLER_NER_MAX_TOKENS", "500"))
+NER_STRIDE = int(os.getenv("CRAWLER_NER_STRIDE", "50"))
+NER_BATCH_SIZE = int(os.getenv("CRAWLER_NER_BATCH_SIZE", "16"))
+NER_PAGES_PER_BATCH = int(os.getenv("CRAWLER_NER_PAGES_PER_BATCH", "10"))
+NER_WORKERS = int(os.getenv("CRAWLER_NER_WORKERS", "1"))
+NER_EXECUTOR = os.getenv("CRAWLER_NER_EXECUTOR", "thread")
+
+# NER is loaded lazily; disable it for link-only crawls. Backend: "torch", "quantized" (int8 dynamic) or "onnx"
+NER_ENABLED = os.getenv("CRAWLER_NER_ENABLED", "1") == "1"
+NER_BACKEND = os.getenv("CRAWLER_NER_BACKEND", "torch")
+
+# Discovered links are upserted in unordered bulk writes once this many are buffered or the oldest is this old
+LINK_BATCH_SIZE = int(os.getenv("CRAWLER_LINK_BATCH_SIZE", "1000"))
+LINK_FLUSH_SECONDS = float(os.getenv("CRAWLER_LINK_FLUSH_SECONDS", "5"))
+
+# In-process seen-URL filter: recent-hit LRU size, Bloom filter sizing, share of Bloom hits double-checked
+# against Mongo, and where the filter is snapshotted between runs (empty disables snapshots)
+SEEN_FILTER = os.getenv("CRAWLER_SEEN_FILTER", "1") == "1"
+SEEN_LRU_SIZE = int(os.getenv("CRAWLER_SEEN_LRU_SIZE", "100000"))
+SEEN_BLOOM_CAPACITY = int(os.getenv("CRAWLER_SEEN_BLOOM_CAPACITY", "1000000"))
+SEEN_BLOOM_ERROR_RATE = float(os.getenv("CRAWLER_SEEN_BLOOM_ERROR_RATE", "0.001"))
+SEEN_VERIFY_RATE = float(os.getenv("CRAWLER_SEEN_VERIFY_RATE", "0.01"))
+SEEN_SNAPSHOT_PATH = os.getenv("CRAWLER_SEEN_SNAPSHOT_PATH", "seen_urls.bloom")
+
+# Frontier claims: a lease older than this is considered abandoned and can be reclaimed;
+# a single claim batch takes at most this many URLs from one domain_id
+LEASE_SECONDS = int(os.getenv("CRAWLER_LEASE_SECONDS", "900"))
+CLAIM_PER_DOMAIN = int(os.getenv("CRAWLER_CLAIM_PER_DOMAIN", "10"))
+# Partitioned frontier (partition.py): workers register in crawler_nodes, heartbeat every NODE_HEARTBEAT_SECONDS,
+# count as gone after NODE_TIMEOUT_SECONDS without one, and only claim URLs of the domain partitions they own
+FRONTIER_PARTITIONED = os.getenv("CRAWLER_FRONTIER_PARTITIONED", "0") == "1"
+NODE_HEARTBEAT_SECONDS = float(os.getenv("CRAWLER_NODE_HEARTBEAT_SECONDS", "10"))
+NODE_TIMEOUT_SECONDS = float(os.getenv("CRAWLER_NODE_TIMEOUT_SECONDS", "45"))
+
+# Page bodies live outside the urls documents: "gridfs" or "file" (sharded under CRAWLER_CONTENT_STORE_PATH)
+CONTENT_STORE = os.getenv("CRAWLER_CONTENT_STORE", "gridfs")
+CONTENT_STORE_PATH = os.getenv("CRAWLER_CONTENT_STORE_PATH", "content_store")
+CONTENT_ZSTD_LEVEL = int(os.getenv("CRAWLER_CONTENT_ZSTD_LEVEL", "3"))
+
+# Recrawls send ETag/Last-Modified validators and treat pages whose SimHash moved by at most this many bits as unchanged
+CONDITIONAL_RECRAWL = os.getenv("CRAWLER_CONDITIONAL_RECRAWL", "1") == "1"
+SIMHASH_MAX_DISTANCE = int(os.getenv("CRAWLER_SIMHASH_MAX_DISTANCE", "3"))
+
+# Adaptive revisit scheduling: first interval and bounds, the freshness a fetch must buy to be worth it
+# (in page-hours; higher means fewer revisits), how much a late crawl may raise that, and crawls remembered per URL
+REVISIT_INITIAL_HOURS = float(os.getenv("CRAWLER_REVISIT_INITIAL_HOURS", "48"))
+REVISIT_MIN_HOURS = float(os.getenv("CRAWLER_REVISIT_MIN_HOURS", "6"))
+REVISIT_MAX_HOURS = float(os.getenv("CRAWLER_REVISIT_MAX_HOURS", "720"))
+REVISIT_FETCH_COST_HOURS = float(os.getenv("CRAWLER_REVISIT_FETCH_COST_HOURS", "2.5"))
+REVISIT_MAX_OVERDUE = float(os.getenv("CRAWLER_REVISIT_MAX_OVERDUE", "5"))
+REVISIT_HISTORY = int(os.getenv("CRAWLER_REVISIT_HISTORY", "12"))
+# Fetches per domain per day unless the domain document sets its own `crawl_budget`
+DOMAIN_DAILY_BUDGET = int(os.getenv("CRAWLER_DOMAIN_DAILY_BUDGET", "5000"))
+
+# supervisor.py: worker processes (default one per core), URLs claimed per loop, and pause when the queue is empty
+WORKERS = int(os.getenv("CRAWLER_WORKERS", "0")) or os.cpu_count() or 1
+WORKER_BATCH = int(os.getenv("CRAWLER_WORKER_BATCH", "100"))
+WORKER_IDLE_SECONDS = float(os.getenv("CRAWLER_WORKER_IDLE_SECONDS", "30"))
+# Seconds a worker gets to finish its current pages after SIGTERM before it is killed
+WORKER_DRAIN_SECONDS = float(os.getenv("CRAWLER_WORKER_DRAIN_SECONDS", "120"))
+
+# crawl_pipeline.py: bounded queue size between stages, URLs per claim, threads per stage and stats interval
+PIPELINE_QUEUE_SIZE = int(os.getenv("CRAWLER_PIPELINE_QUEUE_SIZE", "50"))
+PIPELINE_CLAIM_BATCH = int(os.getenv("CRAWLER_PIPELINE_CLAIM_BATCH", "20"))
+PIPELINE_FETCH_WORKERS = int(os.getenv("CRAWLER_PIPELINE_FETCH_WORKERS", "4"))
+PIPELINE_PARSE_WORKERS = int(os.getenv("CRAWLER_PIPELINE_PARSE_WORKERS", "2"))
+PIPELINE_EXTRACT_WORKERS = int(os.getenv("CRAWLER_PIPELINE_EXTRACT_WORKERS", "1"))
+PIPELINE_PERSIST_WORKERS = int(os.getenv("CRAWLER_PIPELINE_PERSIST_WORKERS", "2"))
+PIPELINE_REPORT_SECONDS = float(os.getenv("CRAWLER_PIPELINE_REPORT_SECONDS", "30"))
+
+# Logging level (per-link detail is DEBUG) and metrics exposition: a Prometheus text endpoint on
+# localhost:CRAWLER_METRICS_PORT and/or a JSON stats file ({pid} is replaced per process); 0/empty disables
+LOG_LEVEL = os.getenv("CRAWLER_LOG_LEVEL", "INFO")
+METRICS_PORT = int(os.getenv("CRAWLER_METRICS_PORT", "0"))
+METRICS_JSON_PATH = os.getenv("CRAWLER_METRICS_JSON_PATH", "")
+METRICS_JSON_SECONDS = float(os.getenv("CRAWLER_METRICS_JSON_SECONDS", "30"))
+
+# URL canonicalization caches: parsed base URLs (one per page being extracted) and host/registrable-domain lookups
+CANONICAL_BASE_CACHE_SIZE = int(os.getenv("CRAWLER_CANONICAL_BASE_CACHE_SIZE", "1024"))
+CANONICAL_HOST_CACHE_SIZE = int(os.getenv("CRAWLER_CANONICAL_HOST_CACHE_SIZE", "65536"))
+
+# Discovered links keep their query string, minus tracking parameters and the ones url_policy.py learned to ignore;
+# without CRAWLER_KEEP_QUERY every query is dropped, as before
+KEEP_QUERY = os.getenv("CRAWLER_KEEP_QUERY", "1") == "1"
+# Crawler trap detection (url_policy.py): links with more path segments, a segment repeated this often or more
+# query parameters than these are dropped; a path gets URL_MAX_QUERY_VARIANTS query variants before further ones
+# are deferred by URL_TRAP_DEFER_HOURS; a domain stops taking new links at DOMAIN_MAX_URLS URLs (0 disables;
+# a domain document's `max_urls` overrides it)
+URL_POLICY = os.getenv("CRAWLER_URL_POLICY", "1") == "1"
+URL_MAX_DEPTH = int(os.getenv("CRAWLER_URL_MAX_DEPTH", "12"))
+URL_MAX_SEGMENT_REPEATS = int(os.getenv("CRAWLER_URL_MAX_SEGMENT_REPEATS", "3"))
+URL_MAX_QUERY_PARAMS = int(os.getenv("CRAWLER_URL_MAX_QUERY_PARAMS", "8"))
+URL_MAX_QUERY_VARIANTS = int(os.getenv("CRAWLER_URL_MAX_QUERY_VARIANTS", "1000"))
+URL_TRAP_DEFER_HOURS = float(os.getenv("CRAWLER_URL_TRAP_DEFER_HOURS", "168"))
+DOMAIN_MAX_URLS = int(os.getenv("CRAWLER_DOMAIN_MAX_URLS", "100000"))
+# A query parameter is decided after this many comparisons of crawled variants that differ only in its value,
+# and stripped from new links if at most this share of them had different content
+PARAM_LEARN_SAMPLES = int(os.getenv("CRAWLER_PARAM_LEARN_SAMPLES", "5"))
+PARAM_MAX_DIFFERENT = float(os.getenv("CRAWLER_PARAM_MAX_DIFFERENT", "0.2"))
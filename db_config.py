@@ -1,9 +1,49 @@
-import os
-from pymongo import MongoClient
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# Environment Variables for MongoDB Connection
-MONGO_URI = os.getenv("CRAWLER_DB_SERVER")
-DB_NAME = os.getenv("CRAWLER_DB_NAME")
+import os
+import threading
+from pymongo import MongoClient
+from dotenv import load_dotenv
+from metrics import MONGO_LISTENER
+
+load_dotenv()
+
+# Environment Variables for MongoDB Connection
+MONGO_URI = os.getenv("CRAWLER_DB_SERVER", "mongodb://localhost:27017/")
+DB_NAME = os.getenv("CRAWLER_DB_NAME", "crawler")
+
+# Connection pool per process, write concern ("1", "majority", ...) and wire compression (zstd needs zstandard)
+MAX_POOL_SIZE = int(os.getenv("CRAWLER_DB_MAX_POOL_SIZE", "50"))
+MIN_POOL_SIZE = int(os.getenv("CRAWLER_DB_MIN_POOL_SIZE", "0"))
+WRITE_CONCERN = os.getenv("CRAWLER_DB_WRITE_CONCERN", "1")
+COMPRESSORS = os.getenv("CRAWLER_DB_COMPRESSORS", "zstd,zlib")
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def client_options():
+    """Keyword arguments shared by every client this process opens, sync or Motor."""
+    w = int(WRITE_CONCERN) if WRITE_CONCERN.isdigit() else WRITE_CONCERN
+    options = {
+        "maxPoolSize": MAX_POOL_SIZE,
+        "minPoolSize": MIN_POOL_SIZE,
+        "w": w,
+        "event_listeners": [MONGO_LISTENER],
+    }
+    if COMPRESSORS:
+        options["compressors"] = COMPRESSORS
+    return options
+
+
+def get_client():
+    """The process-wide pooled MongoClient; a forked child gets its own instead of the parent's sockets."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = MongoClient(MONGO_URI, **client_options())
+            _client_pid = os.getpid()
+        return _client
+
+
+def get_db():
+    return get_client()[DB_NAME]
@@ -1,25 +1,28 @@
-import pymongo
-from datetime import datetime, timedelta, UTC
-from db_config import MONGO_URI, DB_NAME
-from  hashlib import md5
-
-class DatabaseHandler:
-    def __init__(self):
-        try:
-            self.client = pymongo.MongoClient(MONGO_URI)
-            self.db = self.client[DB_NAME]
-            self.domains_collection = self.db["domains"]
-            self.urls_collection = self.db["urls"]
-
-            existing_indexes = self.urls_collection.index_information()
-            if "url_1" in existing_indexes:
-                self.urls_collection.drop_index("url_1")
-
-                    # Create a new unique index on `md5_url`
-            self.urls_collection.create_index("md5_url", unique=True)
-            
-        except pymongo.errors.ConnectionFailure as e:
-            print(f"❌ Could not connect to MongoDB: {e}")
-            exit()
-
-    
\ No newline at end of file
+import pymongo
+from db_config import DB_NAME, get_client
+from migrations import check_schema, SchemaVersionError
+
+# Every handler in a process shares one client, so the schema only has to be checked once
+_schema_checked = False
+
+
+class DatabaseHandler:
+    def __init__(self):
+        global _schema_checked
+        try:
+            self.client = get_client()
+            self.db = self.client[DB_NAME]
+            self.domains_collection = self.db["domains"]
+            self.urls_collection = self.db["urls"]
+
+            # Indexes are created by migrations (init_db.py); startup only checks they've been applied
+            if not _schema_checked:
+                check_schema(self.db)
+                _schema_checked = True
+
+        except pymongo.errors.ConnectionFailure as e:
+            print(f"❌ Could not connect to MongoDB: {e}")
+            exit(1)
+        except SchemaVersionError as e:
+            print(f"❌ {e}")
+            exit(1)
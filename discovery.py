@@ -0,0 +1,415 @@
+#!/usr/bin/env python
+"""
+robots.txt and sitemap driven URL discovery.
+RobotsCache keeps each origin's parsed robots.txt in memory (and the raw file on its domain document),
+so fetches and discovered links can be checked without a request per URL. SitemapDiscovery reads a
+domain's sitemaps (plain, gzipped and sitemap indexes) with a streaming parser and bulk-seeds the
+urls collection; <lastmod> pushes back URLs that haven't changed since they were crawled and makes
+changed ones due right away.
+Usage: python discovery.py [domain ...] [--force] [--max-urls N]
+Without domains, every domain whose sitemaps haven't been read within CRAWLER_SITEMAP_REFRESH_HOURS is processed.
+"""
+
+import argparse
+import gzip
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, UTC
+from urllib.robotparser import RobotFileParser
+from lxml import etree
+import canonical
+from crawler_config import (
+    ROBOTS_TTL_HOURS, ROBOTS_USER_AGENT, SITEMAP_REFRESH_HOURS, SITEMAP_MAX_URLS, SITEMAP_MAX_FILES,
+    REVISIT_INITIAL_HOURS, KEEP_QUERY,
+)
+from db_handler import DatabaseHandler
+from http_fetcher import HTTPFetcher
+from link_writer import LinkWriter
+from metrics import LINKS, setup_logging
+from partition import partition_of
+from utils import generate_md5
+
+logger = logging.getLogger(__name__)
+
+DISALLOWED = "disallowed"
+
+# Google reads at most 500 KiB of robots.txt; the sitemap protocol caps a file at 50 MB uncompressed
+ROBOTS_MAX_BYTES = 500 * 1024
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+
+
+def origin(url):
+    """scheme://netloc of an absolute URL; robots.txt applies per origin."""
+    scheme, _, rest = url.partition("://")
+    return f"{scheme.lower()}://{rest.split('/', 1)[0].lower()}"
+
+
+def parse_robots(text):
+    parser = RobotFileParser()
+    parser.parse(text.splitlines())
+    return parser
+
+
+def parse_lastmod(value):
+    """W3C datetime from <lastmod> as an aware UTC datetime, or None."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=UTC)
+    return parsed.astimezone(UTC)
+
+
+def read_capped(response, max_bytes):
+    """Body of a streamed response as bytes, cut off at max_bytes."""
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(READ_CHUNK_BYTES):
+        chunks.append(chunk[:max_bytes - size])
+        size += len(chunks[-1])
+        if size >= max_bytes:
+            break
+    return b"".join(chunks)
+
+
+class RobotsCache:
+    """Parsed robots.txt rules per origin, reused for ttl_hours.
+
+    A domain's own origin is also stored on its document (robots_txt, robots_fetched_at), so
+    workers starting later reuse it instead of fetching it again.
+    """
+
+    def __init__(self, domains_collection=None, fetcher=None, ttl_hours=ROBOTS_TTL_HOURS,
+                 user_agent=ROBOTS_USER_AGENT):
+        self.domains_collection = domains_collection
+        self._owns_fetcher = fetcher is None
+        self.fetcher = fetcher or HTTPFetcher()
+        self.ttl = timedelta(hours=ttl_hours)
+        self.user_agent = user_agent
+        self._rules = {}  # origin -> (RobotFileParser, monotonic expiry)
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def rules(self, url):
+        key = origin(url)
+        with self._lock:
+            entry = self._rules.get(key)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        # Loaded outside the lock; two threads may both fetch a new origin once, which is harmless
+        parser = self._load(key)
+        with self._lock:
+            self._rules[key] = (parser, time.monotonic() + self.ttl.total_seconds())
+        return parser
+
+    def _load(self, key):
+        host = canonical.host(key)
+        doc = None
+        if self.domains_collection is not None and host:
+            doc = self.domains_collection.find_one(
+                {"normalized_domain": host}, {"robots_txt": 1, "robots_origin": 1, "robots_fetched_at": 1}
+            )
+            if (doc and doc.get("robots_origin") == key and doc.get("robots_fetched_at")
+                    and doc["robots_fetched_at"].replace(tzinfo=UTC) > datetime.now(UTC) - self.ttl):
+                return parse_robots(doc.get("robots_txt") or "")
+
+        text = self._fetch(key)
+        if text is None:
+            # Unreachable robots.txt: crawl as if there were none, but try again next time
+            return parse_robots("")
+        if doc:
+            self.domains_collection.update_one({"_id": doc["_id"]}, {"$set": {
+                "robots_txt": text, "robots_origin": key, "robots_fetched_at": datetime.now(UTC),
+            }})
+        return parse_robots(text)
+
+    def _fetch(self, key):
+        """robots.txt text, "" when there is none (4xx), None when it couldn't be fetched."""
+        self.fetches += 1
+        try:
+            with self.fetcher.session.get(f"{key}/robots.txt", timeout=self.fetcher.timeout, stream=True) as response:
+                if 400 <= response.status_code < 500:
+                    return ""
+                if response.status_code != 200:
+                    return None
+                return read_capped(response, ROBOTS_MAX_BYTES).decode("utf-8", errors="replace")
+        except Exception as e:
+            logger.warning("Could not fetch robots.txt for %s: %s", key, e)
+            return None
+
+    def allowed(self, url):
+        return self.rules(url).can_fetch(self.user_agent, url)
+
+    def sitemaps(self, url):
+        return self.rules(url).site_maps() or []
+
+    def close(self):
+        if self._owns_fetcher:
+            self.fetcher.close()
+
+    def filter_links(self, links, site):
+        """Drops links on registrable domain `site` that robots.txt disallows; links elsewhere aren't crawled yet."""
+        allowed = []
+        for link in links:
+            if canonical.registrable_domain(canonical.host(link)) != site or self.allowed(link):
+                allowed.append(link)
+            else:
+                LINKS.inc(result="disallowed")
+        return allowed
+
+
+class _Prefixed:
+    """A stream with bytes already read from it put back in front."""
+
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def read(self, size=-1):
+        if self.prefix:
+            if size < 0:
+                data, self.prefix = self.prefix + self.stream.read(), b""
+                return data
+            data, self.prefix = self.prefix[:size], self.prefix[size:]
+            return data
+        return self.stream.read(size)
+
+
+class _Capped:
+    """Reads at most max_bytes from a stream, then reports end of file."""
+
+    def __init__(self, stream, max_bytes):
+        self.stream = stream
+        self.remaining = max_bytes
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def _localname(element):
+    return etree.QName(element).localname
+
+
+def parse_sitemap(stream):
+    """Yields ("sitemap" | "url", loc, lastmod) from a sitemap index or urlset without building the tree."""
+    loc = lastmod = None
+    try:
+        for _, element in etree.iterparse(stream, events=("end",), resolve_entities=False, no_network=True):
+            name = _localname(element)
+            parent = element.getparent()
+            if name in ("loc", "lastmod") and parent is not None and _localname(parent) in ("url", "sitemap"):
+                # image:loc and friends sit deeper and are ignored
+                if name == "loc":
+                    loc = (element.text or "").strip()
+                else:
+                    lastmod = parse_lastmod(element.text)
+            elif name in ("url", "sitemap"):
+                if loc:
+                    yield name, loc, lastmod
+                loc = lastmod = None
+                element.clear()
+                while element.getprevious() is not None:
+                    del parent[0]
+    except etree.XMLSyntaxError as e:
+        # Truncated (over the size cap) or malformed; whatever parsed so far is still used
+        logger.info("Sitemap parse stopped early: %s", e)
+
+
+def build_sitemap_upsert(url, domain_id, normalized_domain, lastmod, now, initial_interval):
+    """Returns (filter, pipeline update) seeding a sitemap URL, or applying its <lastmod> to the known one.
+
+    A URL crawled after its lastmod isn't due until its revisit interval has passed again;
+    one modified after its last crawl becomes due now.
+    """
+    md5_url = generate_md5(url)
+    fields = {
+        "url": {"$ifNull": ["$url", url]},
+        # A URL first seen as an external link (domain_id 0) belongs to the domain whose sitemap lists it
+        "domain_id": {"$cond": [{"$gt": ["$domain_id", 0]}, "$domain_id", domain_id]},
+        "partition": {"$cond": [{"$gt": ["$domain_id", 0]}, "$partition", partition_of(domain_id)]},
+        "normalized_domain": {"$ifNull": ["$normalized_domain", normalized_domain]},
+        "status": {"$ifNull": ["$status", "pending"]},
+        "discovered_at": {"$ifNull": ["$discovered_at", now]},
+    }
+    if lastmod is not None:
+        crawled = {"$ne": [{"$type": "$last_crawled"}, "missing"]}
+        not_due_until = {"$add": [now, {"$multiply": [{"$ifNull": ["$revisit_interval", initial_interval]}, 1000]}]}
+        fields["sitemap_lastmod"] = lastmod
+        fields["next_crawl_at"] = {"$switch": {"branches": [
+            {"case": {"$and": [crawled, {"$lte": [lastmod, "$last_crawled"]}]},
+             "then": {"$max": ["$next_crawl_at", not_due_until]}},
+            {"case": crawled, "then": now},
+        ], "default": "$next_crawl_at"}}
+    return {"md5_url": md5_url}, [{"$set": fields}]
+
+
+class SitemapDiscovery:
+    """Seeds the urls collection from each domain's sitemaps, honouring robots.txt."""
+
+    def __init__(self, db_handler=None, robots=None, max_urls=SITEMAP_MAX_URLS, max_files=SITEMAP_MAX_FILES):
+        self.db_handler = db_handler or DatabaseHandler()
+        self.urls_collection = self.db_handler.urls_collection
+        self.domains_collection = self.db_handler.domains_collection
+        self.fetcher = HTTPFetcher()
+        self.robots = robots or RobotsCache(self.domains_collection, self.fetcher)
+        self.link_writer = LinkWriter(self.urls_collection)
+        self.max_urls = max_urls
+        self.max_files = max_files
+
+    def domain_ids(self, names=None, force=False):
+        """_ids of the named domains, of every domain (force), or of those whose sitemaps are due for a re-read.
+
+        Ids are read up front because a cursor held open across slow sitemap downloads would time out.
+        """
+        if names:
+            query = {"normalized_domain": {"$in": names}}
+        elif force:
+            query = {}
+        else:
+            cutoff = datetime.now(UTC) - timedelta(hours=SITEMAP_REFRESH_HOURS)
+            query = {"$or": [{"sitemaps_checked_at": {"$lt": cutoff}}, {"sitemaps_checked_at": None}]}
+        return [doc["_id"] for doc in self.domains_collection.find(query, {"_id": 1})]
+
+    def open_sitemap(self, sitemap_url, cached):
+        """Streams one sitemap; returns (response, readable) or None when unchanged or unavailable."""
+        headers = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+        response = self.fetcher.session.get(sitemap_url, timeout=self.fetcher.timeout, headers=headers, stream=True)
+        if response.status_code != 200:
+            response.close()
+            return None
+        raw = response.raw
+        raw.decode_content = True  # Undo Content-Encoding; a .xml.gz payload is still gzip after that
+        magic = raw.read(2)
+        stream = _Prefixed(magic, raw)
+        if magic == b"\x1f\x8b":
+            stream = gzip.GzipFile(fileobj=stream)
+        return response, _Capped(stream, SITEMAP_MAX_BYTES)
+
+    def discover(self, domain):
+        """Reads one domain's sitemaps and queues its URLs; returns how many were seeded."""
+        homepage = canonical.canonicalize(domain["url"])
+        if not homepage:
+            return 0
+        site = canonical.registrable_domain(canonical.host(homepage))
+        normalized_domain = domain.get("normalized_domain") or canonical.host(homepage)
+        now = datetime.now(UTC)
+        initial_interval = REVISIT_INITIAL_HOURS * 3600
+        cache = {entry["url"]: entry for entry in domain.get("sitemap_cache") or []}
+
+        queue = deque(self.robots.sitemaps(homepage) or [f"{origin(homepage)}/sitemap.xml"])
+        visited = []
+        new_cache = []
+        seeded = 0
+        while queue and len(visited) < self.max_files and seeded < self.max_urls:
+            sitemap_url = queue.popleft().strip()
+            if sitemap_url in visited:
+                continue
+            visited.append(sitemap_url)
+            cached = cache.get(sitemap_url, {})
+            try:
+                opened = self.open_sitemap(sitemap_url, cached)
+            except Exception as e:
+                logger.warning("Could not fetch sitemap %s: %s", sitemap_url, e)
+                continue
+            if opened is None:
+                # Unchanged since last time: its URLs are already seeded, but an index's children may have changed
+                if cached:
+                    new_cache.append(cached)
+                    queue.extend(cached.get("children", []))
+                continue
+
+            response, stream = opened
+            children = []
+            with response:
+                for kind, loc, lastmod in parse_sitemap(stream):
+                    if kind == "sitemap":
+                        children.append(loc)
+                        continue
+                    url = canonical.canonicalize(loc, keep_query=KEEP_QUERY)
+                    if not url or canonical.registrable_domain(canonical.host(url)) != site:
+                        continue
+                    if not self.robots.allowed(url):
+                        LINKS.inc(result="disallowed")
+                        continue
+                    if self.link_writer.add(*build_sitemap_upsert(
+                        url, domain["_id"], normalized_domain, lastmod, now, initial_interval
+                    )):
+                        self.flush()
+                    seeded += 1
+                    if seeded >= self.max_urls:
+                        break
+            queue.extend(children)
+            new_cache.append({
+                "url": sitemap_url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "children": children[:self.max_files],
+            })
+
+        self.flush()
+        self.domains_collection.update_one({"_id": domain["_id"]}, {"$set": {
+            "sitemaps": visited,
+            "sitemap_cache": new_cache,
+            "sitemaps_checked_at": datetime.now(UTC),
+            "sitemap_urls_seeded": seeded,
+        }})
+        return seeded
+
+    def flush(self):
+        inserted, matched = self.link_writer.flush()
+        LINKS.inc(inserted, result="new")
+        LINKS.inc(matched, result="known")
+
+    def run(self, domain_ids):
+        start = time.perf_counter()
+        total = 0
+        for domain_id in domain_ids:
+            domain = self.domains_collection.find_one(
+                {"_id": domain_id}, {"url": 1, "normalized_domain": 1, "sitemap_cache": 1}
+            )
+            if domain is None:
+                continue
+            seeded = self.discover(domain)
+            total += seeded
+            logger.info("%s: %d sitemap URLs", domain.get("normalized_domain") or domain["url"], seeded)
+        elapsed = time.perf_counter() - start
+        logger.info("%d URLs from sitemaps in %.1fs (%d new, %d already known, %d robots.txt fetches)",
+                    total, elapsed, self.link_writer.inserted, self.link_writer.matched, self.robots.fetches)
+
+    def close(self):
+        self.fetcher.close()
+
+
+def main():
+    """Main function to seed URLs from sitemaps."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("domains", nargs="*", help="normalized domain names (default: every domain that is due)")
+    parser.add_argument("--force", action="store_true", help="ignore CRAWLER_SITEMAP_REFRESH_HOURS")
+    parser.add_argument("--max-urls", type=int, default=SITEMAP_MAX_URLS, help="most URLs seeded per domain")
+    options = parser.parse_args()
+
+    setup_logging()
+    discovery = SitemapDiscovery(max_urls=options.max_urls)
+    try:
+        discovery.run(discovery.domain_ids(options.domains, options.force))
+    finally:
+        discovery.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,82 @@
-from db_handler import DatabaseHandler
-
-class DomainHandler:
-    def __init__(self):
-        self.db_handler = DatabaseHandler()
-        self.domains_collection = self.db_handler.db["domains"]
-
-    def get_domain_list(self):
-        """Retrieve all domains with their IDs and URLs."""
-        return list(self.domains_collection.find({}, {"_id": 1, "url": 1}))
-    
-
-if __name__ == "__main__":
-    domain_handler = DomainHandler()
-    print("✅ Domain list:", domain_handler.get_domain_list())
-
-
-
-
-
-
-    
\ No newline at end of file
+from datetime import datetime, UTC
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from db_handler import DatabaseHandler
+from canonical import canonicalize, host
+from interception import PROFILES
+from link_writer import DUPLICATE_KEY_ERROR
+
+
+def normalize_domain(domain_name):
+    """Returns (normalized_domain, homepage_url) for a bare domain or any URL on it, or (None, None)."""
+    url = canonicalize(domain_name)
+    if url is None:
+        return None, None
+    scheme, _, rest = url.partition("://")
+    return host(url), f"{scheme}://{rest.split('/', 1)[0]}/"
+
+
+def build_domain_upsert(normalized_domain, homepage, now, notes=None):
+    """Upsert keyed on normalized_domain; an existing domain keeps its _id and homepage."""
+    update = {"$setOnInsert": {
+        "normalized_domain": normalized_domain,
+        "url": homepage,
+        "status": "active",
+        "created_at": now,
+    }, "$set": {"last_seen": now}}
+    if notes:
+        update["$set"]["notes"] = notes
+    return {"normalized_domain": normalized_domain}, update
+
+
+class DomainHandler:
+    def __init__(self, db_handler=None):
+        self.db_handler = db_handler or DatabaseHandler()
+        self.domains_collection = self.db_handler.db["domains"]
+
+    def get_domain_list(self):
+        """Retrieve all domains with their IDs and URLs."""
+        return list(self.domains_collection.find({}, {"_id": 1, "url": 1}))
+
+    def add_domain(self, domain_name, notes=None):
+        """Adds a domain (or finds the existing one) and returns its _id, or None if the name isn't usable."""
+        normalized_domain, homepage = normalize_domain(domain_name)
+        if normalized_domain is None:
+            return None
+        domain_filter, update = build_domain_upsert(normalized_domain, homepage, datetime.now(UTC), notes)
+        doc = self.domains_collection.find_one_and_update(
+            domain_filter, update, projection={"_id": 1}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return doc["_id"]
+
+    def set_interception_profile(self, domain_name, profile=None):
+        """Pins the browser interception profile for a domain (None goes back to the default); True if it exists."""
+        if profile is not None and profile not in PROFILES:
+            raise ValueError(f"Unknown interception profile {profile!r}, expected one of {sorted(PROFILES)}")
+        normalized_domain, _ = normalize_domain(domain_name)
+        update = {"$set": {"interception_profile": profile}} if profile else {"$unset": {"interception_profile": ""}}
+        return self.domains_collection.update_one({"normalized_domain": normalized_domain}, update).matched_count > 0
+
+    def bulk_add_domains(self, domains):
+        """Upserts {normalized_domain: (homepage, notes)} in one unordered bulk write; returns {normalized_domain: _id}."""
+        if not domains:
+            return {}
+        now = datetime.now(UTC)
+        try:
+            self.domains_collection.bulk_write([
+                UpdateOne(*build_domain_upsert(name, homepage, now, notes), upsert=True)
+                for name, (homepage, notes) in domains.items()
+            ], ordered=False)
+        except BulkWriteError as e:
+            # Concurrent upserts of one new domain race on the unique index; the loser's domain exists anyway
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details["writeErrors"]):
+                raise
+        cursor = self.domains_collection.find(
+            {"normalized_domain": {"$in": list(domains)}}, {"_id": 1, "normalized_domain": 1}
+        )
+        return {doc["normalized_domain"]: doc["_id"] for doc in cursor}
+
+
+if __name__ == "__main__":
+    domain_handler = DomainHandler()
+    print("✅ Domain list:", domain_handler.get_domain_list())
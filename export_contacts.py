@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+"""
+Exports the emails and person names extracted from crawled pages, grouped per domain, to JSONL or
+Parquet (pyarrow). Pages are read a domain at a time through a projected, batched cursor, so page
+bodies are never loaded and memory stays bounded by one domain's contacts plus one output row group.
+Each run only exports pages crawled since the previous run's high-water mark on last_crawled;
+output is written as numbered part files that appear only once complete, and an interrupted run
+resumes after the last completed part when started again.
+Usage: python export_contacts.py [--output-dir DIR] [--format jsonl|parquet] [--rows domains|pages]
+       [--batch-size N] [--part-rows N] [--full]
+"""
+
+import argparse
+import json
+import os
+import resource
+import time
+from datetime import datetime, timedelta, UTC
+from bson import json_util
+from db_handler import DatabaseHandler
+
+STATE_FILE = "export_state.json"
+DOMAIN_PAGE_SIZE = 1000
+# The window ends a little in the past: a crawler may stamp last_crawled just before its write lands
+SETTLE_TIME = timedelta(minutes=1)
+
+PROJECTION = {"_id": 0, "url": 1, "last_crawled": 1, "emails": 1, "person_names": 1}
+HAS_CONTACTS = {"$or": [{"emails.0": {"$exists": True}}, {"person_names.0": {"$exists": True}}]}
+
+
+def build_export_filter(domain_id, since, until):
+    """Pages of one domain crawled in (since, until] that have at least one contact."""
+    crawled = {"$lte": until}
+    if since is not None:
+        crawled["$gt"] = since
+    return {"domain_id": domain_id, "last_crawled": crawled, **HAS_CONTACTS}
+
+
+class ExportState:
+    """High-water mark of the last complete export, plus the progress of one that was interrupted."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json_util.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+
+    def save(self, state):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json_util.dumps(state))
+        os.replace(tmp_path, self.path)
+
+
+class JSONLWriter:
+    extension = "jsonl"
+
+    def __init__(self, path, rows):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, record):
+        last_crawled = record["last_crawled"]
+        record = dict(record, last_crawled=last_crawled.replace(tzinfo=UTC).isoformat() if last_crawled else None)
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """Buffers records into row groups of row_group_size and writes them with pyarrow."""
+
+    extension = "parquet"
+
+    def __init__(self, path, rows, row_group_size=50_000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet export needs: pip install pyarrow") from e
+        self.pa = pa
+        strings = pa.list_(pa.string())
+        fields = [("domain_id", pa.string()), ("domain", pa.string())]
+        if rows == "pages":
+            fields.append(("url", pa.string()))
+        else:
+            fields.append(("pages", pa.int64()))
+        fields += [("last_crawled", pa.timestamp("ms", tz="UTC")), ("emails", strings), ("person_names", strings)]
+        self.schema = pa.schema(fields)
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        self.row_group_size = row_group_size
+        self.buffer = []
+
+    def write(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.writer.write_table(self.pa.Table.from_pylist(self.buffer, schema=self.schema))
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+WRITERS = {"jsonl": JSONLWriter, "parquet": ParquetWriter}
+
+
+class ContactExporter:
+    """Streams contacts out of the urls collection, one domain at a time."""
+
+    def __init__(self, output_dir, fmt="jsonl", rows="domains", batch_size=5000, part_rows=1_000_000,
+                 db_handler=None):
+        self.db_handler = db_handler or DatabaseHandler()
+        self.urls_collection = self.db_handler.urls_collection
+        self.domains_collection = self.db_handler.domains_collection
+        self.output_dir = output_dir
+        self.writer_class = WRITERS[fmt]
+        self.rows = rows
+        self.batch_size = batch_size
+        self.part_rows = part_rows
+        self.state = ExportState(os.path.join(output_dir, STATE_FILE))
+        self.pages = 0
+        self.domains = 0
+        self.records = 0
+
+    def domain_batches(self, after):
+        """Domain documents in _id order, a page at a time, so no cursor stays open while exporting."""
+        while True:
+            query = {"_id": {"$gt": after}} if after is not None else {}
+            batch = list(self.domains_collection.find(query, {"_id": 1, "normalized_domain": 1})
+                         .sort("_id", 1).limit(DOMAIN_PAGE_SIZE))
+            if not batch:
+                return
+            yield batch
+            after = batch[-1]["_id"]
+
+    def domain_records(self, domain, since, until):
+        """Yields one record per page, or a single per-domain record with deduplicated contacts."""
+        cursor = self.urls_collection.find(
+            build_export_filter(domain["_id"], since, until), PROJECTION, batch_size=self.batch_size
+        )
+        base = {"domain_id": str(domain["_id"]), "domain": domain.get("normalized_domain")}
+        emails, names = {}, {}  # dicts keep first-seen order, unlike sets
+        pages = 0
+        last_crawled = None
+        for page in cursor:
+            pages += 1
+            if self.rows == "pages":
+                yield {**base, "url": page["url"], "last_crawled": page.get("last_crawled"),
+                       "emails": sorted(set(page.get("emails") or [])), "person_names": page.get("person_names") or []}
+                continue
+            emails.update(dict.fromkeys(page.get("emails") or []))
+            names.update(dict.fromkeys(page.get("person_names") or []))
+            if page.get("last_crawled") and (last_crawled is None or page["last_crawled"] > last_crawled):
+                last_crawled = page["last_crawled"]
+        self.pages += pages
+        if self.rows == "domains" and pages:
+            yield {**base, "pages": pages, "last_crawled": last_crawled,
+                   "emails": sorted(emails), "person_names": list(names)}
+
+    def open_part(self, stamp, part):
+        path = os.path.join(self.output_dir, f"contacts_{stamp}_part{part:04d}.{self.writer_class.extension}")
+        return path, self.writer_class(f"{path}.tmp", self.rows)
+
+    def run(self, full=False):
+        os.makedirs(self.output_dir, exist_ok=True)
+        state = self.state.load()
+        if state.get("window_end"):
+            print(f"Resuming export up to {state['window_end']:%Y-%m-%d %H:%M:%S} after part {state['parts']}")
+        else:
+            state = {
+                "high_water": None if full else state.get("high_water"),
+                "window_end": datetime.now(UTC) - SETTLE_TIME,
+                "last_domain_id": None,
+                "parts": 0,
+            }
+        since, until = state["high_water"], state["window_end"]
+        stamp = until.strftime("%Y%m%dT%H%M%S")
+        print(f"Exporting pages crawled after {since or 'the beginning'} up to {until}")
+
+        start = last_report = time.perf_counter()
+        part_path, writer = self.open_part(stamp, state["parts"] + 1)
+        part_records = 0
+        for batch in self.domain_batches(state["last_domain_id"]):
+            for domain in batch:
+                for record in self.domain_records(domain, since, until):
+                    writer.write(record)
+                    part_records += 1
+                    self.records += 1
+                self.domains += 1
+                # Parts only change hands between domains, so a resumed run never splits or repeats one
+                if part_records >= self.part_rows:
+                    self.finish_part(writer, part_path, state, domain["_id"])
+                    part_path, writer = self.open_part(stamp, state["parts"] + 1)
+                    part_records = 0
+                if time.perf_counter() - last_report >= 5:
+                    last_report = time.perf_counter()
+                    self.report(last_report - start)
+
+        if part_records:
+            self.finish_part(writer, part_path, state, None)
+        else:
+            writer.close()
+            os.remove(f"{part_path}.tmp")
+        self.state.save({"high_water": until})
+        self.report(time.perf_counter() - start)
+
+    def finish_part(self, writer, path, state, last_domain_id):
+        writer.close()
+        os.replace(f"{path}.tmp", path)
+        state["parts"] += 1
+        state["last_domain_id"] = last_domain_id
+        self.state.save(state)
+        print(f"✅ Wrote {path}")
+
+    def report(self, elapsed):
+        # ru_maxrss is in KB on Linux
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{self.pages:,} pages from {self.domains:,} domains -> {self.records:,} records in {elapsed:.1f}s "
+              f"({self.pages / max(elapsed, 1e-9):,.0f} pages/sec), peak RSS {peak_mb:.0f} MB")
+
+
+def main():
+    """Main function to export extracted contacts."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output-dir", default="exports")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="jsonl")
+    parser.add_argument("--rows", choices=["domains", "pages"], default="domains",
+                        help="one record per domain with deduplicated contacts, or one per page")
+    parser.add_argument("--batch-size", type=int, default=5000, help="documents per cursor batch")
+    parser.add_argument("--part-rows", type=int, default=1_000_000, help="records per output file")
+    parser.add_argument("--full", action="store_true", help="ignore the high-water mark and export everything")
+    options = parser.parse_args()
+
+    ContactExporter(
+        options.output_dir, options.format, options.rows, options.batch_size, options.part_rows
+    ).run(full=options.full)
+
+
+if __name__ == "__main__":
+    main()
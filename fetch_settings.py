@@ -0,0 +1,90 @@
+"""
+Per-domain fetch tier decisions shared by the threaded (url.py) and async (async_crawler.py) crawlers:
+whether a domain's pages need a browser (`requires_js`) and which interception profile its browser
+fetches use (`interception_profile`), both cached from the domains collection.
+"""
+
+from datetime import datetime, UTC
+from http_fetcher import javascript_verdict
+from interception import get_profile
+
+FETCH_SETTINGS_PROJECTION = {"requires_js": 1, "interception_profile": 1}
+
+
+class DomainFetchSettings:
+    """Caches each domain's fetch settings and records what plain-HTTP fetches reveal about it."""
+
+    def __init__(self, domains_collection):
+        self.domains_collection = domains_collection
+        self._requires_js = {}  # domain_id -> bool, mirrors `requires_js` in the domains collection
+        self._profiles = {}  # domain_id -> `interception_profile` override from the domains collection
+
+    def _cache(self, domain_id, domain):
+        self._requires_js.setdefault(domain_id, domain.get("requires_js") if domain else None)
+        self._profiles[domain_id] = domain.get("interception_profile") if domain else None
+
+    def _settle(self, domain_id, result):
+        """Whether a plain-HTTP result stands, plus the domains update to persist (or None)."""
+        if result.status_code == 304 or result.outcome:
+            return True, None
+        requires_js = javascript_verdict(result)
+        update = None
+        # None means only this URL goes to the browser; the domain's flag is left alone
+        if requires_js is not None and domain_id and self._requires_js.get(domain_id) != requires_js:
+            self._requires_js[domain_id] = requires_js
+            update = (
+                {"_id": domain_id},
+                {"$set": {"requires_js": requires_js, "requires_js_checked_at": datetime.now(UTC)}},
+            )
+        return requires_js is False, update
+
+    def requires_js(self, domain_id):
+        """The stored `requires_js` flag for a domain, or None if it hasn't been probed yet."""
+        if not domain_id:
+            return None
+        if domain_id not in self._requires_js:
+            self._cache(domain_id, self.domains_collection.find_one({"_id": domain_id}, FETCH_SETTINGS_PROJECTION))
+        return self._requires_js[domain_id]
+
+    def profile(self, domain_id):
+        """The browser interception profile for a domain: its own override, else based on `requires_js`."""
+        if not domain_id:
+            return get_profile()
+        if domain_id not in self._profiles:
+            self._cache(domain_id, self.domains_collection.find_one({"_id": domain_id}, FETCH_SETTINGS_PROJECTION))
+        return get_profile(self._profiles[domain_id], self._requires_js.get(domain_id))
+
+    def accept(self, domain_id, result):
+        """True if a plain-HTTP FetchResult is the final answer; False sends the URL to the browser.
+
+        The tier decision is persisted so later URLs on the domain skip the probe.
+        """
+        accepted, update = self._settle(domain_id, result)
+        if update:
+            self.domains_collection.update_one(*update)
+        return accepted
+
+    async def async_requires_js(self, domain_id):
+        """requires_js() for Motor collections."""
+        if not domain_id:
+            return None
+        if domain_id not in self._requires_js:
+            domain = await self.domains_collection.find_one({"_id": domain_id}, FETCH_SETTINGS_PROJECTION)
+            self._cache(domain_id, domain)
+        return self._requires_js[domain_id]
+
+    async def async_profile(self, domain_id):
+        """profile() for Motor collections."""
+        if not domain_id:
+            return get_profile()
+        if domain_id not in self._profiles:
+            domain = await self.domains_collection.find_one({"_id": domain_id}, FETCH_SETTINGS_PROJECTION)
+            self._cache(domain_id, domain)
+        return get_profile(self._profiles[domain_id], self._requires_js.get(domain_id))
+
+    async def async_accept(self, domain_id, result):
+        """accept() for Motor collections."""
+        accepted, update = self._settle(domain_id, result)
+        if update:
+            await self.domains_collection.update_one(*update)
+        return accepted
@@ -0,0 +1,33 @@
+import hashlib
+import re
+
+WORD = re.compile(r"\w+", re.UNICODE)
+SHINGLE_SIZE = 3
+FINGERPRINT_BITS = 64
+
+
+def simhash(text):
+    """64-bit SimHash of the text's word 3-grams, as 16 hex digits; near-identical texts differ in few bits.
+
+    Text without any words has no fingerprint (None), so textless pages never look alike.
+    """
+    words = WORD.findall(text.lower()) if text else []
+    if not words:
+        return None
+    shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 1))]
+
+    weights = [0] * FINGERPRINT_BITS
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return f"{fingerprint:016x}"
+
+
+def hamming_distance(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
@@ -0,0 +1,225 @@
+import os
+import time
+import socket
+from collections import Counter
+from datetime import datetime, timedelta, UTC
+from pymongo import ASCENDING
+from crawler_config import LEASE_SECONDS, CLAIM_PER_DOMAIN
+from scheduler import build_exhausted_domains_filter, build_budget_charge
+from metrics import CLAIM_SECONDS, CLAIMED_URLS
+
+CLAIM_PROJECTION = {
+    "_id": 1, "url": 1, "domain_id": 1, "locked_by": 1,
+    # What the previous crawl left behind, for conditional recrawls
+    "etag": 1, "last_modified": 1, "content_fingerprint": 1,
+    # Input to the revisit scheduler
+    "revisit_interval": 1, "revisit_history": 1, "revisit_checked_at": 1,
+}
+# Most overdue first; documents without next_crawl_at (never scheduled) sort ahead of everything
+CLAIM_SORT = [("next_crawl_at", ASCENDING)]
+
+# Every branch of the claim $or is an equality on status plus a range on next_crawl_at, so each branch
+# is a scan of the first index that already returns documents in claim order and the planner merges
+# them without a blocking SORT. Expired leases are reclaimed separately, over the second index.
+CLAIM_INDEXES = [
+    [("status", ASCENDING), ("next_crawl_at", ASCENDING)],
+    [("status", ASCENDING), ("locked_at", ASCENDING)],
+]
+# The same, behind the partition equality, for workers that claim from a partitioned frontier
+PARTITION_CLAIM_INDEXES = [[("partition", ASCENDING), *index] for index in CLAIM_INDEXES]
+
+
+def get_locked_by(pid=None):
+    """Unique identifier for this process (or the given pid), stored in `locked_by` while it holds URLs."""
+    process_id = f"crawler_{pid or os.getpid()}"
+    hostname = socket.gethostname()
+    return process_id + hostname
+
+
+def build_claim_filter(now, exclude_domains=(), partitions=None):
+    """Filter for URLs that are due for a crawl.
+
+    With partitions, only URLs whose `partition` is one of them qualify.
+    """
+    query = {
+        "$or": [
+            {"status": {"$in": ["pending", "", None]}},                   # New, or no status at all
+            {"status": "completed", "next_crawl_at": {"$lte": now}},      # Scheduled revisit is due
+            {"status": "completed", "next_crawl_at": None},               # Crawled before scheduling existed
+            {"status": "deferred", "next_crawl_at": {"$lte": now}},       # Likely trap (url_policy.py), now due
+        ],
+        "domain_id": {"$nin": [0, *exclude_domains]}
+    }
+    if partitions is not None:
+        query["partition"] = {"$in": partitions}
+    return query
+
+
+def build_expired_filter(now, lease=timedelta(seconds=LEASE_SECONDS), partitions=None):
+    """URLs whose lease ran out, e.g. because the worker holding them crashed."""
+    query = {"status": "processing", "locked_at": {"$lt": now - lease}}
+    if partitions is not None:
+        query["partition"] = {"$in": partitions}
+    return query
+
+
+# Puts a leased URL back in the pending queue (released, or its lease expired)
+RECLAIM_UPDATE = {"$set": {"status": "pending", "locked_at": None, "locked_by": None}}
+
+
+def build_claim_update(now, locked_by):
+    return {
+        "$set": {
+            "status": "processing",
+            "locked_at": now,
+            "locked_by": locked_by,
+        },
+        "$inc": {"claim_count": 1}
+    }
+
+
+class Frontier:
+    """Work queue over the urls collection; claims are guarded updates, so a URL goes to one worker at a time."""
+
+    def __init__(self, urls_collection, domains_collection=None, lease_seconds=LEASE_SECONDS,
+                 per_domain=CLAIM_PER_DOMAIN, membership=None):
+        self.urls_collection = urls_collection
+        # Per-domain crawl budgets are only enforced when the domains collection is given
+        self.domains_collection = domains_collection
+        self.lease = timedelta(seconds=lease_seconds)
+        self.per_domain = per_domain
+        # A partition.NodeMembership scopes claims to the partitions this worker owns
+        self.membership = membership
+
+    def _candidates(self, now, saturated, partitions, limit):
+        """find() arguments for the next due URLs, most overdue first; only _id and domain_id are read."""
+        return dict(
+            filter=build_claim_filter(now, saturated, partitions),
+            projection={"_id": 1, "domain_id": 1},
+            sort=CLAIM_SORT,
+            limit=limit,
+        )
+
+    def _pick(self, candidates, per_domain, saturated):
+        """The candidate ids to try for, keeping to per_domain URLs per domain_id across the whole batch."""
+        picked, counts = [], Counter(per_domain)
+        for doc in candidates:
+            if doc["domain_id"] in saturated or (self.per_domain and counts[doc["domain_id"]] >= self.per_domain):
+                continue
+            picked.append(doc["_id"])
+            counts[doc["domain_id"]] += 1
+        return picked
+
+    def _take(self, won, picked, claimed, per_domain, saturated):
+        order = {doc_id: position for position, doc_id in enumerate(picked)}
+        for doc in sorted(won, key=lambda doc: order[doc["_id"]]):
+            claimed.append(doc)
+            per_domain[doc["domain_id"]] += 1
+            # Once a domain has its share, later rounds skip it so one big site can't fill the batch
+            if self.per_domain and per_domain[doc["domain_id"]] >= self.per_domain:
+                saturated.append(doc["domain_id"])
+
+    def claim(self, locked_by, num_of_urls):
+        """Leases up to num_of_urls due URLs to locked_by, most overdue first.
+
+        At most per_domain URLs come from any one domain_id, and domains that used up
+        their crawl budget are skipped until their window rolls over. With a membership,
+        only URLs in the partitions this worker owns are claimed.
+
+        Each round is three round trips whatever its size: find the most overdue ids,
+        update_many them guarded on the claim filter (so URLs another worker got first
+        are left alone), and read back the ones this worker won. Rounds repeat only
+        when other workers won some of the candidates or a domain hit its share.
+        """
+        start = time.perf_counter()
+        now = datetime.now(UTC)
+        claimed, per_domain, saturated = [], Counter(), []
+        partitions = self.membership.owned() if self.membership is not None else None
+        if partitions == []:
+            return claimed
+        self.urls_collection.update_many(build_expired_filter(now, self.lease, partitions), RECLAIM_UPDATE)
+        if self.domains_collection is not None:
+            cursor = self.domains_collection.find(build_exhausted_domains_filter(now), {"_id": 1})
+            saturated.extend(d["_id"] for d in cursor)
+        while len(claimed) < num_of_urls:
+            wanted = num_of_urls - len(claimed)
+            candidates = list(self.urls_collection.find(**self._candidates(now, saturated, partitions, wanted)))
+            picked = self._pick(candidates, per_domain, saturated)
+            if not picked:
+                break
+            self.urls_collection.update_many(
+                {"_id": {"$in": picked}, **build_claim_filter(now, saturated, partitions)},
+                build_claim_update(now, locked_by),
+            )
+            won = list(self.urls_collection.find(
+                {"_id": {"$in": picked}, "status": "processing", "locked_by": locked_by}, CLAIM_PROJECTION
+            ))
+            self._take(won, picked, claimed, per_domain, saturated)
+            if len(candidates) < wanted:
+                break
+        if self.domains_collection is not None:
+            for domain_id, fetches in per_domain.items():
+                self.domains_collection.update_one({"_id": domain_id}, build_budget_charge(now, fetches))
+        self._record(start, claimed)
+        return claimed
+
+    async def async_claim(self, locked_by, num_of_urls):
+        """claim() for Motor collections."""
+        start = time.perf_counter()
+        now = datetime.now(UTC)
+        claimed, per_domain, saturated = [], Counter(), []
+        partitions = self.membership.owned() if self.membership is not None else None
+        if partitions == []:
+            return claimed
+        await self.urls_collection.update_many(build_expired_filter(now, self.lease, partitions), RECLAIM_UPDATE)
+        if self.domains_collection is not None:
+            cursor = self.domains_collection.find(build_exhausted_domains_filter(now), {"_id": 1})
+            saturated.extend([d["_id"] async for d in cursor])
+        while len(claimed) < num_of_urls:
+            wanted = num_of_urls - len(claimed)
+            cursor = self.urls_collection.find(**self._candidates(now, saturated, partitions, wanted))
+            candidates = [doc async for doc in cursor]
+            picked = self._pick(candidates, per_domain, saturated)
+            if not picked:
+                break
+            await self.urls_collection.update_many(
+                {"_id": {"$in": picked}, **build_claim_filter(now, saturated, partitions)},
+                build_claim_update(now, locked_by),
+            )
+            cursor = self.urls_collection.find(
+                {"_id": {"$in": picked}, "status": "processing", "locked_by": locked_by}, CLAIM_PROJECTION
+            )
+            self._take([doc async for doc in cursor], picked, claimed, per_domain, saturated)
+            if len(candidates) < wanted:
+                break
+        if self.domains_collection is not None:
+            for domain_id, fetches in per_domain.items():
+                await self.domains_collection.update_one({"_id": domain_id}, build_budget_charge(now, fetches))
+        self._record(start, claimed)
+        return claimed
+
+    @staticmethod
+    def _record(start, claimed):
+        CLAIM_SECONDS.observe(time.perf_counter() - start)
+        CLAIMED_URLS.inc(len(claimed))
+
+    def renew(self, locked_by):
+        """Pushes locked_at forward on everything locked_by still holds, so long batches keep their lease."""
+        return self.urls_collection.update_many(
+            {"status": "processing", "locked_by": locked_by},
+            {"$set": {"locked_at": datetime.now(UTC)}}
+        ).modified_count
+
+    async def async_renew(self, locked_by):
+        """renew() for Motor collections."""
+        result = await self.urls_collection.update_many(
+            {"status": "processing", "locked_by": locked_by},
+            {"$set": {"locked_at": datetime.now(UTC)}}
+        )
+        return result.modified_count
+
+    def release(self, locked_by):
+        """Hands unfinished URLs back to the queue, e.g. when a worker shuts down."""
+        return self.urls_collection.update_many(
+            {"status": "processing", "locked_by": locked_by}, RECLAIM_UPDATE
+        ).modified_count
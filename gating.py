@@ -0,0 +1,71 @@
+"""
+Decides whether a URL is worth downloading before its body is read: by file extension, by the
+Content-Type/Content-Length a server announces, and by a cap on the bytes actually streamed.
+Gated URLs are recorded with a compact crawl_outcome instead of a page body.
+"""
+
+import posixpath
+from urllib.parse import urlsplit
+from crawler_config import MAX_PAGE_BYTES
+
+SKIPPED_CONTENT_TYPE = "skipped_content_type"
+TRUNCATED = "truncated"
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# Extensions that are never HTML; the URL is recorded without any request being made
+SKIP_EXTENSIONS = frozenset({
+    # Documents and data
+    "pdf", "doc", "docx", "xls", "xlsx", "ppt", "pptx", "odt", "ods", "odp", "rtf", "csv", "epub",
+    # Archives, packages and disk images
+    "zip", "gz", "tgz", "bz2", "xz", "7z", "rar", "tar", "exe", "msi", "dmg", "iso", "apk", "deb", "rpm", "bin",
+    # Images and fonts
+    "jpg", "jpeg", "png", "gif", "webp", "svg", "bmp", "ico", "tif", "tiff", "psd", "eps",
+    "woff", "woff2", "ttf", "otf", "eot",
+    # Audio and video
+    "mp3", "wav", "flac", "ogg", "m4a", "aac", "mp4", "m4v", "mov", "avi", "wmv", "flv", "mkv", "webm",
+    # Page assets
+    "css", "js",
+})
+
+
+def skip_by_extension(url):
+    """True if url's path ends in an extension that is never an HTML page."""
+    try:
+        path = urlsplit(url).path
+    except ValueError:
+        return False
+    extension = posixpath.splitext(path)[1]
+    return extension[1:].lower() in SKIP_EXTENSIONS
+
+
+def is_html(content_type):
+    """True for HTML content types, and when the server didn't say (the body will tell)."""
+    if not content_type:
+        return True
+    return content_type.split(";", 1)[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+def content_length(headers):
+    try:
+        return int(headers.get("Content-Length"))
+    except (TypeError, ValueError):
+        return None
+
+
+def gate_headers(headers, max_bytes=MAX_PAGE_BYTES):
+    """The outcome announced response headers already decide (non-HTML or declared oversize), else None."""
+    if not is_html(headers.get("Content-Type")):
+        return SKIPPED_CONTENT_TYPE
+    length = content_length(headers)
+    if max_bytes and length is not None and length > max_bytes:
+        return TRUNCATED
+    return None
+
+
+def gate_response(headers, body, max_bytes=MAX_PAGE_BYTES):
+    """gate_headers, plus the byte cap checked against a body that has been read."""
+    outcome = gate_headers(headers, max_bytes)
+    if outcome is None and max_bytes and len(body) > max_bytes:
+        return TRUNCATED
+    return outcome
@@ -0,0 +1,190 @@
+import codecs
+import re
+from collections import namedtuple
+from urllib.parse import urljoin
+import requests
+from requests.adapters import HTTPAdapter
+from crawler_config import HTTP_TIMEOUT_SECONDS, HTTP_POOL_SIZE, MAX_PAGE_BYTES, USER_AGENT
+from gating import TRUNCATED, gate_headers
+
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 10
+
+# outcome is set when the body was gated out (gating.SKIPPED_CONTENT_TYPE, gating.TRUNCATED); html is None then
+FetchResult = namedtuple(
+    "FetchResult", ["html", "status_code", "final_url", "redirect_chain", "headers", "outcome"], defaults=(None,)
+)
+READ_CHUNK_BYTES = 64 * 1024
+
+SCRIPT_TAG = re.compile(r"<script\b", re.IGNORECASE)
+STRIP_BLOCKS = re.compile(r"<(script|style|noscript|template)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+STRIP_TAGS = re.compile(r"<[^>]+>")
+EMPTY_APP_ROOT = re.compile(
+    r"<div[^>]+id=[\"'](root|app|__next|__nuxt|svelte)[\"'][^>]*>\s*</div>", re.IGNORECASE
+)
+NOSCRIPT_WARNING = re.compile(
+    r"<noscript[^>]*>[^<]*(enable|requires?|turn on)\s+javascript", re.IGNORECASE
+)
+
+CHARSET_PARAM = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+# <meta charset="..."> and <meta http-equiv="Content-Type" content="text/html; charset=...">
+META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE)
+# Browsers look for a <meta> charset in the first 1024 bytes; a few more tolerate long <head> preambles
+SNIFF_BYTES = 4096
+
+# Pages with less visible text than this that still ship scripts are assumed to be rendered client side
+MIN_VISIBLE_TEXT = 200
+
+
+def needs_javascript(html, headers):
+    """Guesses whether a plain-HTTP response only becomes useful after running its scripts."""
+    content_type = headers.get("Content-Type", "")
+    if content_type and "html" not in content_type:
+        return False
+    if not html:
+        return True
+    if EMPTY_APP_ROOT.search(html) or NOSCRIPT_WARNING.search(html):
+        return True
+
+    visible_text = STRIP_TAGS.sub(" ", STRIP_BLOCKS.sub(" ", html))
+    return len(" ".join(visible_text.split())) < MIN_VISIBLE_TEXT and bool(SCRIPT_TAG.search(html))
+
+
+def javascript_verdict(result):
+    """What a plain-HTTP FetchResult says about rendering its domain.
+
+    False: the page is usable as fetched. True: it is a client-side app shell, so the
+    domain needs a browser. None: only this URL should be retried in a browser; an empty
+    body, an error page or a merely thin page says nothing about the rest of the domain.
+    """
+    if not needs_javascript(result.html, result.headers):
+        return False
+    if result.html and result.html.strip() and 200 <= (result.status_code or 0) < 300:
+        if EMPTY_APP_ROOT.search(result.html) or NOSCRIPT_WARNING.search(result.html):
+            return True
+    return None
+
+
+def _known_codec(name):
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def response_encoding(headers, body):
+    """Charset of an HTML body: the Content-Type parameter, a BOM, a <meta> declaration, else UTF-8 if it decodes.
+
+    requests' own fallback for text/* without a charset is ISO-8859-1 (RFC 2616), which turns
+    every UTF-8 page that doesn't declare its charset in the header into mojibake.
+    """
+    match = CHARSET_PARAM.search(headers.get("Content-Type", ""))
+    if match and _known_codec(match.group(1)):
+        return match.group(1)
+    if body.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    match = META_CHARSET.search(body[:SNIFF_BYTES])
+    if match and _known_codec(match.group(1).decode("ascii", errors="ignore")):
+        return match.group(1).decode("ascii")
+    try:
+        body.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        # What browsers assume for undeclared legacy pages
+        return "windows-1252"
+
+
+class HTTPFetcher:
+    """Plain HTTP client with pooled keep-alive connections for pages that don't need a browser."""
+
+    def __init__(self, timeout=HTTP_TIMEOUT_SECONDS, pool_size=HTTP_POOL_SIZE, max_bytes=MAX_PAGE_BYTES):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+            # requests only decodes br when the brotli package is installed
+            "Accept-Encoding": "gzip, deflate, br",
+        })
+
+    def fetch(self, url, validators=None):
+        """Follows redirects by hand so every hop lands in redirect_chain like the browser path.
+
+        validators may carry the "etag" and "last_modified" stored from the previous crawl;
+        they are sent as a conditional request and a 304 comes back with html=None.
+        The body is streamed: non-HTML responses and bodies over max_bytes are abandoned
+        as soon as that is known and come back with html=None and an outcome.
+        """
+        redirect_chain = []
+        current_url = url
+        conditional_headers = {}
+        if validators and validators.get("etag"):
+            conditional_headers["If-None-Match"] = validators["etag"]
+        if validators and validators.get("last_modified"):
+            conditional_headers["If-Modified-Since"] = validators["last_modified"]
+
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self.session.get(
+                current_url, allow_redirects=False, timeout=self.timeout, headers=conditional_headers, stream=True
+            )
+            redirect_chain.append({
+                "url": response.url,
+                "status": response.status_code
+            })
+
+            location = response.headers.get("Location")
+            if response.status_code in REDIRECT_STATUSES and location:
+                response.close()
+                current_url = urljoin(response.url, location)
+                continue
+
+            with response:
+                if response.status_code == 304:
+                    return FetchResult(None, 304, response.url, redirect_chain, response.headers)
+                outcome = gate_headers(response.headers, self.max_bytes)
+                html = None if outcome else self._read_text(response)
+                if outcome is None and html is None:
+                    outcome = TRUNCATED
+                return FetchResult(html, response.status_code, response.url, redirect_chain, response.headers, outcome)
+
+        raise requests.TooManyRedirects(f"More than {MAX_REDIRECTS} redirects for {url}")
+
+    def _read_text(self, response):
+        """Decoded body, or None once it grows past max_bytes (the rest is never downloaded)."""
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(READ_CHUNK_BYTES):
+            size += len(chunk)
+            if self.max_bytes and size > self.max_bytes:
+                return None
+            chunks.append(chunk)
+        body = b"".join(chunks)
+        return body.decode(response_encoding(response.headers, body), errors="replace")
+
+    def head(self, url):
+        """Cheap look at what url serves before committing a browser to it: a gating outcome, or None.
+
+        Servers that reject HEAD or fail are given the benefit of the doubt.
+        """
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        if response.status_code >= 400:
+            return None
+        return gate_headers(response.headers, self.max_bytes)
+
+    def close(self):
+        self.session.close()
+
+
+def response_validators(headers):
+    """The cache validators worth storing for the next conditional recrawl."""
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+    }
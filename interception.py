@@ -0,0 +1,122 @@
+"""
+Request interception profiles for browser fetches. Only page.content() is read, so images, fonts,
+media, stylesheets and analytics/ad requests are aborted through Playwright routing before they
+are downloaded. A domain document may name its own profile in `interception_profile`.
+"""
+
+import logging
+from urllib.parse import urlsplit
+from crawler_config import BROWSER_INTERCEPTION_PROFILE
+from metrics import BLOCKED_REQUESTS, BLOCKED_BYTES, BLOCKED_PER_PAGE
+
+logger = logging.getLogger(__name__)
+
+# Playwright resource types that never affect the DOM we read
+MEDIA_TYPES = frozenset({"image", "media", "font", "stylesheet", "texttrack", "manifest"})
+SCRIPT_TYPES = frozenset({"script", "xhr", "fetch", "eventsource", "websocket"})
+
+# Hosts (and their subdomains) serving analytics, ads and tag managers
+TRACKER_HOSTS = frozenset({
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com", "googleadservices.com",
+    "doubleclick.net", "adservice.google.com", "connect.facebook.net", "facebook.net", "analytics.twitter.com",
+    "ads-twitter.com", "snap.licdn.com", "bat.bing.com", "clarity.ms", "hotjar.com", "cdn.segment.com",
+    "segment.io", "mixpanel.com", "amplitude.com", "fullstory.com", "newrelic.com", "nr-data.net",
+    "optimizely.com", "quantserve.com", "scorecardresearch.com", "taboola.com", "outbrain.com",
+    "criteo.com", "criteo.net", "adnxs.com", "amazon-adsystem.com", "hubspot.com", "hs-analytics.net",
+    "hs-scripts.com", "intercom.io", "crazyegg.com", "mouseflow.com", "mc.yandex.ru",
+})
+
+# Median transfer size per resource type (HTTP Archive, rounded); aborted requests have no real size,
+# so bytes saved are an estimate
+ESTIMATED_BYTES = {
+    "image": 40_000, "media": 500_000, "font": 30_000, "stylesheet": 20_000, "script": 30_000,
+    "xhr": 5_000, "fetch": 5_000, "texttrack": 2_000, "manifest": 1_000,
+}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+
+class InterceptionProfile:
+    """Which requests a browser page may make: resource types to abort, and whether tracker hosts are aborted."""
+
+    def __init__(self, name, blocked_types, block_trackers=True):
+        self.name = name
+        self.blocked_types = frozenset(blocked_types)
+        self.block_trackers = block_trackers
+
+    @property
+    def intercepts(self):
+        return bool(self.blocked_types) or self.block_trackers
+
+    def block_reason(self, resource_type, url):
+        """Why the request should be aborted ("type" or "tracker"), or None; the page document is never blocked."""
+        if resource_type == "document":
+            return None
+        if resource_type in self.blocked_types:
+            return "type"
+        if self.block_trackers and is_tracker(url):
+            return "tracker"
+        return None
+
+
+PROFILES = {
+    # Static HTML: nothing but the document and its frames
+    "html-only": InterceptionProfile("html-only", MEDIA_TYPES | SCRIPT_TYPES | {"other"}),
+    # Sites that render with JavaScript: scripts and their API calls run, everything visual is dropped
+    "scripts": InterceptionProfile("scripts", MEDIA_TYPES),
+    # No interception at all, for sites that break even without images or trackers
+    "full": InterceptionProfile("full", (), block_trackers=False),
+}
+
+
+def is_tracker(url):
+    try:
+        host = (urlsplit(url).hostname or "").lower()
+    except ValueError:
+        return False
+    while host:
+        if host in TRACKER_HOSTS:
+            return True
+        _, _, host = host.partition(".")
+    return False
+
+
+def get_profile(name=None, requires_js=None):
+    """The profile a domain asked for, "scripts" for domains known to need JavaScript, else the configured default."""
+    if name in PROFILES:
+        return PROFILES[name]
+    if name:
+        logger.warning("Unknown interception profile %r, using the default", name)
+    if requires_js:
+        return PROFILES["scripts"]
+    return PROFILES.get(BROWSER_INTERCEPTION_PROFILE, PROFILES["html-only"])
+
+
+class InterceptionStats:
+    """Requests one page had aborted, and the bytes that saved (estimated)."""
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.allowed = 0
+        self.blocked = 0
+        self.bytes_saved = 0
+
+    def allow(self, request):
+        """Route decision for one request: True to continue it, False to abort it (and count it)."""
+        reason = self.profile.block_reason(request.resource_type, request.url)
+        if reason is None:
+            self.allowed += 1
+            return True
+        estimate = ESTIMATED_BYTES.get(request.resource_type, DEFAULT_ESTIMATED_BYTES)
+        self.blocked += 1
+        self.bytes_saved += estimate
+        BLOCKED_REQUESTS.inc(resource_type=request.resource_type, reason=reason)
+        BLOCKED_BYTES.inc(estimate, profile=self.profile.name)
+        return False
+
+    def finish(self):
+        """Records the per-page totals once the page is done."""
+        BLOCKED_PER_PAGE.observe(self.blocked, profile=self.profile.name)
+
+    def as_dict(self):
+        return {"profile": self.profile.name, "allowed": self.allowed, "blocked": self.blocked,
+                "bytes_saved": self.bytes_saved}
@@ -0,0 +1,83 @@
+import logging
+import time
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from crawler_config import LINK_BATCH_SIZE, LINK_FLUSH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class LinkWriter:
+    """Buffers discovered-link upserts across pages and writes them with unordered bulk_write."""
+
+    def __init__(self, collection, max_ops=LINK_BATCH_SIZE, max_delay=LINK_FLUSH_SECONDS):
+        self.collection = collection
+        self.max_ops = max_ops
+        self.max_delay = max_delay
+        self._ops = []
+        self._pending = set()
+        self._oldest = None
+        self.inserted = 0
+        self.matched = 0
+
+    def add(self, link_filter, link_update):
+        """Queues one upsert; returns True once the buffer is due for a flush."""
+        md5_url = link_filter["md5_url"]
+        if md5_url not in self._pending:
+            self._pending.add(md5_url)
+            self._ops.append(UpdateOne(link_filter, link_update, upsert=True))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+        return self.due()
+
+    def due(self):
+        return bool(self._ops) and (
+            len(self._ops) >= self.max_ops or time.monotonic() - self._oldest >= self.max_delay
+        )
+
+    def _take(self):
+        ops = self._ops
+        self._ops = []
+        self._pending = set()
+        self._oldest = None
+        return ops
+
+    def _record(self, upserted, matched, duplicates=0):
+        # Another worker inserting the same md5_url first is the unique index doing its job
+        self.inserted += upserted
+        self.matched += matched + duplicates
+        return upserted, matched + duplicates
+
+    def _record_error(self, error):
+        details = error.details
+        duplicates = 0
+        for write_error in details.get("writeErrors", []):
+            if write_error.get("code") != DUPLICATE_KEY_ERROR:
+                logger.error("Link write failed: %s", write_error.get("errmsg"))
+            else:
+                duplicates += 1
+        return self._record(details.get("nUpserted", 0), details.get("nMatched", 0), duplicates)
+
+    def flush(self):
+        """Writes the buffered upserts; returns (inserted, matched) for this flush."""
+        ops = self._take()
+        if not ops:
+            return 0, 0
+        try:
+            result = self.collection.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            return self._record_error(e)
+        return self._record(result.upserted_count, result.matched_count)
+
+    async def async_flush(self):
+        """flush() for a Motor collection."""
+        ops = self._take()
+        if not ops:
+            return 0, 0
+        try:
+            result = await self.collection.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            return self._record_error(e)
+        return self._record(result.upserted_count, result.matched_count)
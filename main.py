@@ -1,14 +1,20 @@
-from url import URLHandler
-
-def main():
-    """Main function to manage crawling process."""
-    url_handler = URLHandler()
-
-    url_handler.initialize_homepage_urls()
-    
-    # Process URLs older than 48 hours
-    url_handler.get_url_list_last_crawled_48hrs_before(100)
-    print("Crawling process completed.")
-
-if __name__ == "__main__":
+from url import URLHandler
+from metrics import setup_logging, start_metrics
+
+def main():
+    """Main function to manage crawling process."""
+    setup_logging()
+    start_metrics()
+    url_handler = URLHandler()
+
+    try:
+        url_handler.initialize_homepage_urls()
+
+        # Process URLs older than 48 hours
+        url_handler.get_url_list_last_crawled_48hrs_before(100)
+    finally:
+        url_handler.close()
+    print("Crawling process completed.")
+
+if __name__ == "__main__":
         main()
\ No newline at end of file
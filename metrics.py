@@ -0,0 +1,301 @@
+import atexit
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pymongo import monitoring
+from crawler_config import LOG_LEVEL, METRICS_PORT, METRICS_JSON_PATH, METRICS_JSON_SECONDS
+
+# Seconds; covers a cached regex match up to a slow browser fetch
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+logger = logging.getLogger(__name__)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _snapshot_key(key):
+    return ",".join(f"{name}={value}" for name, value in key) or "total"
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in key) + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def total(self):
+        """Sum over every label combination."""
+        with self._lock:
+            return sum(self._values.values())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def snapshot(self):
+        with self._lock:
+            return {_snapshot_key(key): value for key, value in self._values.items()}
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class Histogram(Metric):
+    """Fixed-bucket latency histogram, Prometheus style."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            state["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def total(self):
+        with self._lock:
+            return sum(state["count"] for state in self._values.values())
+
+    def _quantile(self, state, fraction):
+        """Upper bound of the bucket holding the given fraction of observations."""
+        rank = fraction * state["count"]
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), state["counts"]):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, state in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), state["counts"]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    samples.append((f"{self.name}_bucket", key + (("le", le),), cumulative))
+                samples.append((f"{self.name}_sum", key, state["sum"]))
+                samples.append((f"{self.name}_count", key, state["count"]))
+        return samples
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                _snapshot_key(key): {
+                    "count": state["count"],
+                    "mean": state["sum"] / state["count"] if state["count"] else 0.0,
+                    "p50": self._quantile(state, 0.5),
+                    "p99": self._quantile(state, 0.99),
+                }
+                for key, state in self._values.items()
+            }
+
+
+class Registry:
+    """Every metric of this process, rendered as Prometheus text or a JSON-friendly dict."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.started_at = time.time()
+
+    def _get(self, cls, name, help, **kwargs):
+        if name not in self.metrics:
+            self.metrics[name] = cls(name, help, **kwargs)
+        return self.metrics[name]
+
+    def counter(self, name, help):
+        return self._get(Counter, name, help)
+
+    def gauge(self, name, help):
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name, help, buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+
+REGISTRY = Registry()
+
+FETCH_SECONDS = REGISTRY.histogram("crawler_fetch_seconds", "Page fetch latency by tier (http, head, browser)")
+FETCHED_BYTES = REGISTRY.counter("crawler_fetched_bytes_total", "Bytes of HTML fetched")
+PAGES = REGISTRY.counter("crawler_pages_total", "Crawled pages by outcome (changed, unchanged, failed, skipped_content_type, truncated, disallowed)")
+PARSE_SECONDS = REGISTRY.histogram("crawler_parse_seconds", "lxml parse time per page")
+EXTRACT_SECONDS = REGISTRY.histogram("crawler_extract_seconds", "Extractor latency by method")
+STORE_LINKS_SECONDS = REGISTRY.histogram("crawler_store_links_seconds", "Time to queue and flush one page's links")
+LINKS = REGISTRY.counter("crawler_links_total", "Discovered links by result (new, known, skipped, disallowed)")
+TRAPPED_LINKS = REGISTRY.counter(
+    "crawler_trapped_links_total", "Discovered links dropped or deferred as likely crawler traps, by reason and action"
+)
+PARAM_DECISIONS = REGISTRY.counter(
+    "crawler_param_decisions_total", "Query parameters learned per domain, by result (ignorable, significant)"
+)
+CLAIM_SECONDS = REGISTRY.histogram("crawler_claim_seconds", "Frontier claim latency per batch")
+CLAIMED_URLS = REGISTRY.counter("crawler_claimed_urls_total", "URLs leased from the frontier")
+OWNED_PARTITIONS = REGISTRY.gauge("crawler_owned_partitions", "Frontier partitions this worker currently claims from")
+REBALANCES = REGISTRY.counter("crawler_rebalances_total", "Frontier partition reassignments seen by this worker")
+MONGO_COMMANDS = REGISTRY.counter("crawler_mongo_commands_total", "MongoDB commands sent, by command name")
+BROWSER_LAUNCHES = REGISTRY.counter("crawler_browser_launches_total", "Chromium launches, including recycles")
+BLOCKED_REQUESTS = REGISTRY.counter(
+    "crawler_browser_blocked_requests_total", "Browser subresource requests aborted, by resource type and reason"
+)
+BLOCKED_BYTES = REGISTRY.counter(
+    "crawler_browser_blocked_bytes_total", "Estimated bytes not downloaded thanks to aborted requests, by profile"
+)
+BLOCKED_PER_PAGE = REGISTRY.histogram(
+    "crawler_browser_blocked_per_page", "Requests aborted per browser page, by profile",
+    buckets=(0, 1, 5, 10, 25, 50, 100, 250),
+)
+
+
+def timed(histogram, **labels):
+    """Decorator recording each call's duration in histogram."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MongoCommandCounter(monitoring.CommandListener):
+    """Counts every command a client sends; pass it in the client's event_listeners."""
+
+    def started(self, event):
+        MONGO_COMMANDS.inc(command=event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+MONGO_LISTENER = MongoCommandCounter()
+
+
+def stats():
+    """Registry snapshot plus the derived rates the JSON stats file reports."""
+    pages = PAGES.total()
+    elapsed = time.time() - REGISTRY.started_at
+    return {
+        "pid": os.getpid(),
+        "uptime_seconds": elapsed,
+        "pages_per_second": pages / elapsed if elapsed else 0.0,
+        "mongo_ops_per_page": MONGO_COMMANDS.total() / pages if pages else 0.0,
+        "metrics": REGISTRY.snapshot(),
+    }
+
+
+def write_stats(path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(stats(), f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/stats.json":
+            body, content_type = json.dumps(stats(), default=str).encode(), "application/json"
+        else:
+            body, content_type = REGISTRY.render().encode(), "text/plain; version=0.0.4"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes would otherwise log a line each
+
+
+def start_metrics(port=METRICS_PORT, json_path=METRICS_JSON_PATH, interval=METRICS_JSON_SECONDS):
+    """Serves /metrics on localhost:port and/or rewrites json_path every interval seconds; 0/"" disables each.
+
+    json_path may contain {pid} so several worker processes don't share one file.
+    """
+    if port:
+        server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsRequestHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info("Metrics served on http://127.0.0.1:%d/metrics", port)
+    if json_path:
+        path = json_path.format(pid=os.getpid())
+
+        def write_periodically():
+            while True:
+                time.sleep(interval)
+                try:
+                    write_stats(path)
+                except OSError as e:
+                    logger.warning("Could not write stats file %s: %s", path, e)
+
+        threading.Thread(target=write_periodically, name="metrics-json", daemon=True).start()
+        atexit.register(write_stats, path)  # Final numbers, so short runs leave a file too
+        logger.info("Writing stats to %s every %ss", path, interval)
+
+
+def setup_logging(level=LOG_LEVEL):
+    """Leveled logging for the crawl; per-link detail is DEBUG, so the default INFO leaves it out."""
+    logging.basicConfig(
+        level=getattr(logging, str(level).upper(), logging.INFO),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
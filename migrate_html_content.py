@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Script to move html_content out of existing urls documents into the content store.
+Reports collection size and claim-query latency before and after.
+Usage: python migrate_html_content.py [--batch N] [--compact]
+"""
+
+import sys
+import time
+from datetime import datetime, UTC
+from pymongo import UpdateOne
+from db_handler import DatabaseHandler
+from content_store import get_content_store
+from frontier import build_claim_filter, CLAIM_SORT
+
+def collection_size(db):
+    stats = db.command("collStats", "urls")
+    return stats["size"], stats["storageSize"], stats.get("avgObjSize", 0)
+
+def claim_query_latency(urls_collection, runs=20):
+    """Median time to read one claim batch (100 full documents) in claim order."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        list(urls_collection.find(build_claim_filter(datetime.now(UTC))).sort(CLAIM_SORT).limit(100))
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+def report(label, db):
+    size, storage_size, avg_size = collection_size(db)
+    latency = claim_query_latency(db["urls"])
+    print(f"{label}: data {size / 1e6:.1f} MB, storage {storage_size / 1e6:.1f} MB, "
+          f"avg doc {avg_size / 1024:.1f} KB, claim query p50 {latency * 1000:.1f} ms")
+
+def migrate(db, content_store, batch_size):
+    """Stores every inline body and replaces it with content_hash/size; safe to re-run."""
+    urls_collection = db["urls"]
+    migrated = 0
+    while True:
+        docs = list(urls_collection.find(
+            {"html_content": {"$type": "string"}}, {"html_content": 1}
+        ).limit(batch_size))
+        if not docs:
+            break
+
+        ops = []
+        for doc in docs:
+            content = content_store.put(doc["html_content"])
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": content, "$unset": {"html_content": ""}}))
+        urls_collection.bulk_write(ops, ordered=False)
+        migrated += len(ops)
+        print(f"Migrated {migrated} documents")
+    return migrated
+
+def main():
+    """Main function to migrate page bodies."""
+    batch_size = int(sys.argv[sys.argv.index("--batch") + 1]) if "--batch" in sys.argv else 500
+    db = DatabaseHandler().db
+
+    report("Before", db)
+    migrated = migrate(db, get_content_store(db), batch_size)
+    # WiredTiger only hands freed space back to the OS after a compact
+    if "--compact" in sys.argv:
+        db.command("compact", "urls")
+    report("After", db)
+    print(f"✅ {migrated} documents migrated")
+
+if __name__ == "__main__":
+    main()
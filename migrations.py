@@ -0,0 +1,151 @@
+import os
+import socket
+import time
+from datetime import datetime, timedelta, UTC
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+from frontier import CLAIM_INDEXES, PARTITION_CLAIM_INDEXES
+from partition import partition_of
+
+MIGRATIONS_COLLECTION = "schema_migrations"
+LOCK_ID = "lock"
+# A lock older than this was left by a migrator that died
+LOCK_TIMEOUT = timedelta(minutes=30)
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Registers func(db) as the migration to `version`; versions must be applied in order and never change."""
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return func
+    return decorator
+
+
+@migration(1, "collections and base indexes")
+def create_base_indexes(db):
+    existing = set(db.list_collection_names())
+    for name in ("domains", "urls"):
+        if name not in existing:
+            db.create_collection(name)
+
+    domains = db["domains"]
+    domains.create_index([("normalized_domain", ASCENDING)], unique=True)
+    domains.create_index([("status", ASCENDING)])
+    domains.create_index([("last_seen", DESCENDING)])
+
+    urls = db["urls"]
+    # md5_url replaced the old index on the full url string, which can exceed the index key limit
+    if "url_1" in urls.index_information():
+        urls.drop_index("url_1")
+    urls.create_index([("md5_url", ASCENDING)], unique=True)
+    urls.create_index([("domain_id", ASCENDING)])
+    urls.create_index([("normalized_domain", ASCENDING)])
+    urls.create_index([("last_crawled", ASCENDING)])
+
+
+@migration(2, "frontier claim indexes")
+def create_claim_indexes(db):
+    urls = db["urls"]
+    # status alone is covered by the claim indexes' prefix
+    if "status_1" in urls.index_information():
+        urls.drop_index("status_1")
+    for index in CLAIM_INDEXES:
+        urls.create_index(index)
+
+
+@migration(3, "per-domain last_crawled index for contact exports")
+def create_domain_crawled_index(db):
+    urls = db["urls"]
+    urls.create_index([("domain_id", ASCENDING), ("last_crawled", ASCENDING)])
+    # domain_id alone is the new index's prefix
+    if "domain_id_1" in urls.index_information():
+        urls.drop_index("domain_id_1")
+
+
+@migration(4, "frontier partitions and the crawler_nodes registry")
+def create_partitions(db):
+    urls = db["urls"]
+    for index in PARTITION_CLAIM_INDEXES:
+        urls.create_index(index)
+    # Nodes that leave without deregistering (killed hosts) are cleaned up eventually
+    db["crawler_nodes"].create_index([("heartbeat_at", ASCENDING)], expireAfterSeconds=3600)
+    for group in urls.aggregate([{"$match": {"partition": {"$exists": False}}}, {"$group": {"_id": "$domain_id"}}]):
+        domain_id = group["_id"]
+        urls.update_many(
+            {"domain_id": domain_id, "partition": {"$exists": False}},
+            {"$set": {"partition": partition_of(domain_id)}},
+        )
+
+
+@migration(5, "learned query parameters per domain")
+def create_url_param_indexes(db):
+    db["url_params"].create_index([("domain_id", ASCENDING), ("param", ASCENDING)], unique=True)
+    # Comparison samples nobody has linked to for 30 days are dropped
+    db["url_param_samples"].create_index([("seen_at", ASCENDING)], expireAfterSeconds=30 * 24 * 3600)
+
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(db):
+    """Highest migration recorded in the database, 0 for a new database."""
+    doc = db[MIGRATIONS_COLLECTION].find_one(
+        {"_id": {"$type": "number"}}, {"_id": 1}, sort=[("_id", DESCENDING)]
+    )
+    return doc["_id"] if doc else 0
+
+
+def _acquire_lock(db):
+    collection = db[MIGRATIONS_COLLECTION]
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        now = datetime.now(UTC)
+        try:
+            collection.insert_one({"_id": LOCK_ID, "owner": owner, "locked_at": now})
+            return
+        except DuplicateKeyError:
+            stale = collection.delete_one({"_id": LOCK_ID, "locked_at": {"$lt": now - LOCK_TIMEOUT}})
+            if not stale.deleted_count:
+                print("⏳ Another process is migrating the database, waiting...")
+                time.sleep(2)
+
+
+def migrate(db, target=SCHEMA_VERSION):
+    """Applies every migration above the recorded version, up to target; returns the versions applied."""
+    _acquire_lock(db)
+    applied = []
+    try:
+        version = current_version(db)
+        for migration_version, description, func in MIGRATIONS:
+            if migration_version <= version or migration_version > target:
+                continue
+            start = time.perf_counter()
+            func(db)
+            db[MIGRATIONS_COLLECTION].insert_one({
+                "_id": migration_version,
+                "description": description,
+                "applied_at": datetime.now(UTC),
+                "seconds": time.perf_counter() - start,
+            })
+            print(f"✅ Applied migration {migration_version}: {description}")
+            applied.append(migration_version)
+    finally:
+        db[MIGRATIONS_COLLECTION].delete_one({"_id": LOCK_ID})
+    return applied
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def check_schema(db):
+    """Raises SchemaVersionError unless the database has every migration this code expects."""
+    version = current_version(db)
+    if version < SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"Database schema is at version {version}, this code needs {SCHEMA_VERSION}; run python init_db.py"
+        )
+    return version
@@ -0,0 +1,133 @@
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from crawler_config import (
+    NER_ENABLED, NER_BACKEND, NER_BATCH_SIZE, NER_MAX_TOKENS, NER_STRIDE, NER_WORKERS, NER_EXECUTOR,
+)
+
+NER_MODEL = "dslim/bert-base-NER"
+PERSON_LABELS = ("PER", "PERSON")
+
+# transformers/torch are imported on first use so link-only crawls and CLI tools never load them
+_ner_pipeline = None
+_ner_pipeline_lock = threading.Lock()
+
+
+def load_ner_pipeline(backend=NER_BACKEND):
+    """Builds the NER pipeline for the configured CPU backend: "torch", "quantized" or "onnx"."""
+    from transformers import pipeline, AutoTokenizer
+
+    if backend == "torch":
+        return pipeline("ner", model=NER_MODEL, grouped_entities=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(NER_MODEL)
+    if backend == "quantized":
+        import torch
+        from transformers import AutoModelForTokenClassification
+
+        model = AutoModelForTokenClassification.from_pretrained(NER_MODEL)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForTokenClassification
+        except ImportError as e:
+            raise ImportError("The onnx NER backend needs: pip install optimum[onnxruntime]") from e
+        model = ORTModelForTokenClassification.from_pretrained(NER_MODEL, export=True)
+    else:
+        raise ValueError(f"Unknown NER backend: {backend}")
+
+    return pipeline("ner", model=model, tokenizer=tokenizer, grouped_entities=True)
+
+
+def get_ner_pipeline():
+    """Returns the process-wide NER pipeline, loading it on first call."""
+    global _ner_pipeline
+    if _ner_pipeline is None:
+        with _ner_pipeline_lock:
+            if _ner_pipeline is None:
+                _ner_pipeline = load_ner_pipeline()
+    return _ner_pipeline
+
+
+def chunk_text(text, max_tokens=NER_MAX_TOKENS, stride=NER_STRIDE):
+    """Splits text into windows of at most max_tokens tokens that overlap by stride tokens."""
+    encoding = get_ner_pipeline().tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+    offsets = encoding["offset_mapping"]
+    if not offsets:
+        return []
+
+    windows = []
+    step = max(max_tokens - stride, 1)
+    for start in range(0, len(offsets), step):
+        end = min(start + max_tokens, len(offsets))
+        windows.append(text[offsets[start][0]:offsets[end - 1][1]])
+        if end == len(offsets):
+            break
+    return windows
+
+
+def clean_name(word):
+    return " ".join(word.replace(" ##", "").replace("##", "").split())
+
+
+def dedupe_names(names):
+    """Drops repeats and fragments, e.g. "John" cut off at a window edge when "John Doe" was also found."""
+    unique = {clean_name(name) for name in names}
+    unique.discard("")
+    token_lists = {name: name.split() for name in unique}
+
+    def is_fragment(name):
+        tokens = token_lists[name]
+        for other, other_tokens in token_lists.items():
+            if other == name or len(other_tokens) <= len(tokens):
+                continue
+            for i in range(len(other_tokens) - len(tokens) + 1):
+                if other_tokens[i:i + len(tokens)] == tokens:
+                    return True
+        return False
+
+    return [name for name in unique if not is_fragment(name)]
+
+
+def extract_person_names_batch(texts, batch_size=NER_BATCH_SIZE, max_tokens=NER_MAX_TOKENS, stride=NER_STRIDE):
+    """Runs NER over the chunks of many pages at once and returns one name list per text."""
+    if not NER_ENABLED:
+        return [[] for _ in texts]
+
+    chunks = []
+    owners = []
+    for index, text in enumerate(texts):
+        for chunk in chunk_text(text, max_tokens, stride):
+            chunks.append(chunk)
+            owners.append(index)
+
+    names = [[] for _ in texts]
+    if not chunks:
+        return names
+
+    for owner, entities in zip(owners, get_ner_pipeline()(chunks, batch_size=batch_size)):
+        for ent in entities:
+            if ent["entity_group"] in PERSON_LABELS:
+                names[owner].append(ent["word"])
+
+    return [dedupe_names(page_names) for page_names in names]
+
+
+class NERBatcher:
+    """Runs batched NER on a thread or process pool so callers can keep fetching meanwhile."""
+
+    def __init__(self, workers=NER_WORKERS, executor=NER_EXECUTOR, batch_size=NER_BATCH_SIZE):
+        self.enabled = NER_ENABLED
+        self.batch_size = batch_size
+        if executor == "process":
+            # Forked children would inherit the parent's threads and Mongo/browser handles mid-use
+            self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def submit(self, texts):
+        """Returns a future resolving to one list of person names per text."""
+        return self.executor.submit(extract_person_names_batch, texts, self.batch_size)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,70 @@
+import lxml.html
+from lxml import etree
+from metrics import PARSE_SECONDS
+
+NON_VISIBLE_TAGS = {"script", "style", "noscript", "template"}
+
+
+class ParsedPage:
+    """A fetched page parsed once with lxml; registered extractors all read the same tree."""
+
+    extractors = {}
+
+    @classmethod
+    def register(cls, name):
+        """Decorator registering func(page) as the extractor for `name`."""
+        def decorator(func):
+            cls.extractors[name] = func
+            return func
+        return decorator
+
+    def __init__(self, html, base_url=None):
+        self.html = html
+        self.base_url = base_url
+        self._tree = None
+        self._text = None
+        self._results = {}
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            with PARSE_SECONDS.time():
+                self._tree = self._parse()
+        return self._tree
+
+    def _parse(self):
+        try:
+            return lxml.html.document_fromstring(self.html)
+        except ValueError:
+            # lxml refuses str input that carries an XML encoding declaration
+            return lxml.html.document_fromstring(self.html.encode("utf-8"))
+        except etree.ParserError:
+            return lxml.html.document_fromstring("<html></html>")
+
+    @property
+    def hrefs(self):
+        """Raw href values of every <a> tag, in document order."""
+        return [a.get("href") for a in self.tree.iter("a") if a.get("href") is not None]
+
+    @property
+    def text(self):
+        """Visible text joined with single spaces, skipping scripts, styles and comments."""
+        if self._text is None:
+            parts = []
+            for element in self.tree.iter():
+                if isinstance(element.tag, str) and element.tag not in NON_VISIBLE_TAGS and element.text:
+                    parts.append(element.text)
+                if element.tail and element is not self.tree:
+                    parts.append(element.tail)
+            self._text = " ".join(part.strip() for part in parts if part.strip())
+        return self._text
+
+    def extract(self, name):
+        """Runs the named extractor once and caches its result on the page."""
+        if name not in self._results:
+            self._results[name] = self.extractors[name](self)
+        return self._results[name]
+
+    def release(self):
+        """Drops the parse tree once every extractor that needs it has run."""
+        self._tree = None
@@ -0,0 +1,121 @@
+"""
+Partitioned frontier. Every url document carries `partition`, a fixed hash of its domain_id, and the
+partitions are spread over the live workers with a consistent hash ring. Workers register in the
+`crawler_nodes` collection and heartbeat from a background thread; when a node joins, leaves or stops
+heartbeating, every worker recomputes its share and only the partitions on the changed ring segments
+move. A worker's claims then only touch its own partitions, so each domain is crawled by one worker
+at a time and its politeness state and caches stay local.
+"""
+
+import bisect
+import logging
+import threading
+from datetime import datetime, timedelta, UTC
+from hashlib import md5
+from crawler_config import NODE_HEARTBEAT_SECONDS, NODE_TIMEOUT_SECONDS
+from metrics import OWNED_PARTITIONS, REBALANCES
+
+logger = logging.getLogger(__name__)
+
+# Written into every url document, so it can only change together with a backfill of `partition`
+PARTITION_COUNT = 256
+VIRTUAL_NODES = 100
+
+
+def _hash(value):
+    return int.from_bytes(md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+def partition_of(domain_id):
+    """The frontier partition of a domain; stable across processes and hosts."""
+    return _hash(str(domain_id)) % PARTITION_COUNT
+
+
+class HashRing:
+    """Consistent hash ring with VIRTUAL_NODES points per node."""
+
+    def __init__(self, nodes, virtual_nodes=VIRTUAL_NODES):
+        points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(virtual_nodes))
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def owner(self, key):
+        if not self._nodes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+    def partitions_of(self, node, partitions=PARTITION_COUNT):
+        return [partition for partition in range(partitions) if self.owner(f"partition:{partition}") == node]
+
+
+class NodeMembership:
+    """This worker's entry in `crawler_nodes` and the partitions it currently owns."""
+
+    def __init__(self, nodes_collection, node_id, heartbeat_seconds=NODE_HEARTBEAT_SECONDS,
+                 timeout_seconds=NODE_TIMEOUT_SECONDS, partitions=PARTITION_COUNT):
+        self.nodes_collection = nodes_collection
+        self.node_id = node_id
+        self.heartbeat_seconds = heartbeat_seconds
+        self.timeout = timedelta(seconds=timeout_seconds)
+        self.partitions = partitions
+        self.nodes = ()
+        self._owned = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def join(self):
+        """Registers this node, computes its share and starts heartbeating."""
+        now = datetime.now(UTC)
+        self.nodes_collection.update_one(
+            {"_id": self.node_id},
+            {"$set": {"heartbeat_at": now}, "$setOnInsert": {"joined_at": now}},
+            upsert=True,
+        )
+        self.refresh()
+        self._thread = threading.Thread(target=self._heartbeat_loop, name="node-heartbeat", daemon=True)
+        self._thread.start()
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            try:
+                self.nodes_collection.update_one(
+                    {"_id": self.node_id}, {"$set": {"heartbeat_at": datetime.now(UTC)}}, upsert=True
+                )
+                self.refresh()
+            except Exception as e:
+                logger.warning("Node heartbeat failed: %s", e)
+
+    def live_nodes(self):
+        cutoff = datetime.now(UTC) - self.timeout
+        return sorted(doc["_id"] for doc in self.nodes_collection.find({"heartbeat_at": {"$gt": cutoff}}, {"_id": 1}))
+
+    def refresh(self):
+        """Re-reads the live nodes and, if they changed, this node's partitions."""
+        nodes = tuple(self.live_nodes())
+        if self.node_id not in nodes:
+            # Our own heartbeat is always current from our point of view, even if the last write was slow
+            nodes = tuple(sorted((*nodes, self.node_id)))
+        if nodes == self.nodes:
+            return False
+        owned = HashRing(nodes).partitions_of(self.node_id, self.partitions)
+        with self._lock:
+            before = set(self._owned)
+            self.nodes, self._owned = nodes, owned
+        REBALANCES.inc()
+        OWNED_PARTITIONS.set(len(owned))
+        logger.info("Frontier rebalanced over %d nodes: own %d partitions (+%d, -%d)",
+                    len(nodes), len(owned), len(set(owned) - before), len(before - set(owned)))
+        return True
+
+    def owned(self):
+        with self._lock:
+            return list(self._owned)
+
+    def leave(self):
+        """Stops heartbeating and removes this node, so the others take over its partitions right away."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.heartbeat_seconds)
+        self.nodes_collection.delete_one({"_id": self.node_id})
@@ -0,0 +1,112 @@
+import math
+from datetime import timedelta, UTC
+from crawler_config import (
+    REVISIT_INITIAL_HOURS, REVISIT_MIN_HOURS, REVISIT_MAX_HOURS, REVISIT_FETCH_COST_HOURS, REVISIT_MAX_OVERDUE,
+    REVISIT_HISTORY, DOMAIN_DAILY_BUDGET,
+)
+
+BUDGET_WINDOW = timedelta(days=1)
+# Change rates considered possible, per hour: from once a year to every few minutes, log-uniform a priori
+RATE_RANGE = (1 / (365 * 24), 24)
+RATE_STEPS = 32
+INTERVAL_STEPS = 24
+
+
+def _log_space(low, high, steps):
+    return [math.exp(math.log(low) + (math.log(high) - math.log(low)) * i / (steps - 1)) for i in range(steps)]
+
+
+class RevisitScheduler:
+    """Picks a revisit interval per URL from the change rate its past crawls suggest.
+
+    Each crawl records (seconds since the previous one, changed?) in `revisit_history`. Those
+    observations give a posterior over the page's Poisson change rate λ; the interval I is the one
+    maximising expected freshness (1 - e^(-λI)) / λI minus fetch_cost_hours / I, the trade-off of
+    Cho & Garcia-Molina's freshness-optimal revisit policy. Pages changing faster than any affordable
+    interval could keep up with gain nothing from visits and drift to max_hours instead of soaking up
+    fetches. A crawl that arrives later than scheduled means the frontier is behind, and the fetch
+    cost for that URL is scaled by the lateness, up to max_overdue times.
+    """
+
+    def __init__(self, initial_hours=REVISIT_INITIAL_HOURS, min_hours=REVISIT_MIN_HOURS,
+                 max_hours=REVISIT_MAX_HOURS, fetch_cost_hours=REVISIT_FETCH_COST_HOURS,
+                 max_overdue=REVISIT_MAX_OVERDUE, history=REVISIT_HISTORY):
+        self.initial = initial_hours * 3600
+        self.min = min_hours * 3600
+        self.max = max_hours * 3600
+        self.fetch_cost = fetch_cost_hours * 3600
+        self.max_overdue = max_overdue
+        self.history = history
+        self.rates = [rate / 3600 for rate in _log_space(*RATE_RANGE, RATE_STEPS)]
+        self.intervals = _log_space(self.min, self.max, INTERVAL_STEPS)
+        # Expected freshness of every candidate interval at every candidate rate
+        self.freshness = [[-math.expm1(-rate * interval) / (rate * interval) for rate in self.rates]
+                          for interval in self.intervals]
+
+    def posterior(self, history):
+        """Weights over self.rates given [elapsed seconds, changed] observations."""
+        log_weights = [0.0] * len(self.rates)
+        for elapsed, changed in history:
+            for i, rate in enumerate(self.rates):
+                exposure = rate * max(elapsed, 1)
+                # P(changed) = 1 - e^(-λt); for very fast rates that is 1 to float precision
+                log_weights[i] += math.log(-math.expm1(-exposure)) if changed else -exposure
+        top = max(log_weights)
+        weights = [math.exp(weight - top) for weight in log_weights]
+        total = sum(weights)
+        return [weight / total for weight in weights]
+
+    def interval(self, history, previous=None):
+        """Next revisit interval in seconds; history is empty for a first crawl."""
+        if not history:
+            return self.initial
+        fetch_cost = self.fetch_cost
+        if previous:
+            fetch_cost *= min(max(history[-1][0] / previous, 1), self.max_overdue)
+        weights = self.posterior(history)
+
+        def value(option):
+            interval, freshness = option
+            return sum(weight * fresh for weight, fresh in zip(weights, freshness)) - fetch_cost / interval
+
+        return max(zip(self.intervals, self.freshness), key=value)[0]
+
+    def schedule(self, url, changed, now):
+        """Fields to $set on the urls document after a crawl finished at `now`.
+
+        changed is None when the crawl failed or never saw the body, which says nothing about the page.
+        """
+        history = list(url.get("revisit_history") or [])
+        checked_at = url.get("revisit_checked_at")
+        fields = {}
+        if changed is not None:
+            if checked_at is not None:
+                if checked_at.tzinfo is None:
+                    checked_at = checked_at.replace(tzinfo=UTC)
+                history = (history + [[(now - checked_at).total_seconds(), bool(changed)]])[-self.history:]
+                fields["revisit_history"] = history
+            fields["revisit_checked_at"] = now
+        interval = self.interval(history, url.get("revisit_interval"))
+        return {
+            **fields,
+            "revisit_interval": interval,
+            "next_crawl_at": now + timedelta(seconds=interval),
+        }
+
+
+def build_exhausted_domains_filter(now, default_budget=DOMAIN_DAILY_BUDGET):
+    """Domains that used up their crawl budget in the current window."""
+    return {
+        "budget_window_start": {"$gt": now - BUDGET_WINDOW},
+        "$expr": {"$gte": ["$budget_used", {"$ifNull": ["$crawl_budget", default_budget]}]},
+    }
+
+
+def build_budget_charge(now, fetches):
+    """Pipeline update adding `fetches` to a domain's budget, starting a new window when the old one expired."""
+    # A missing window start compares lower than any date, so first charges start a window too
+    window_expired = {"$lte": ["$budget_window_start", now - BUDGET_WINDOW]}
+    return [{"$set": {
+        "budget_used": {"$cond": [window_expired, fetches, {"$add": ["$budget_used", fetches]}]},
+        "budget_window_start": {"$cond": [window_expired, now, "$budget_window_start"]},
+    }}]
@@ -0,0 +1,211 @@
+import logging
+import math
+import os
+import random
+import struct
+from collections import OrderedDict
+from crawler_config import (
+    SEEN_LRU_SIZE, SEEN_BLOOM_CAPACITY, SEEN_BLOOM_ERROR_RATE, SEEN_VERIFY_RATE, SEEN_SNAPSHOT_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"SEENv1"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over md5 hex digests."""
+
+    def __init__(self, capacity, error_rate, bits=None, count=0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    def _positions(self, md5_hex):
+        # md5_url is already uniformly distributed, so its halves serve as the two base hashes
+        h1 = int(md5_hex[:16], 16)
+        h2 = int(md5_hex[16:], 16) | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, md5_hex):
+        for pos in self._positions(md5_hex):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, md5_hex):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(md5_hex))
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+    def estimated_error_rate(self):
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class ScalableBloomFilter:
+    """Chain of Bloom filters that grows as items are added while keeping the overall error rate bounded."""
+
+    GROWTH = 2
+    TIGHTENING = 0.5
+
+    def __init__(self, initial_capacity=SEEN_BLOOM_CAPACITY, error_rate=SEEN_BLOOM_ERROR_RATE):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.filters = []
+
+    def _add_filter(self):
+        index = len(self.filters)
+        self.filters.append(BloomFilter(
+            self.initial_capacity * self.GROWTH ** index,
+            self.error_rate * (1 - self.TIGHTENING) * self.TIGHTENING ** index,
+        ))
+
+    def add(self, md5_hex):
+        if not self.filters or self.filters[-1].full:
+            self._add_filter()
+        self.filters[-1].add(md5_hex)
+
+    def __contains__(self, md5_hex):
+        return any(md5_hex in bloom for bloom in self.filters)
+
+    def __len__(self):
+        return sum(bloom.count for bloom in self.filters)
+
+    def estimated_error_rate(self):
+        miss = 1.0
+        for bloom in self.filters:
+            miss *= 1 - bloom.estimated_error_rate()
+        return 1 - miss
+
+
+class SeenURLFilter:
+    """Per-worker record of md5_urls already stored, so known links skip the database entirely.
+
+    An LRU set answers exact hits for recently seen links; anything older falls through
+    to a scalable Bloom filter. A small sample of Bloom-only hits is checked against the
+    database to measure the real false-positive rate (sync collections only; pass
+    verify_rate=0 with Motor).
+    """
+
+    def __init__(self, urls_collection=None, lru_size=SEEN_LRU_SIZE, verify_rate=SEEN_VERIFY_RATE,
+                 snapshot_path=SEEN_SNAPSHOT_PATH):
+        self.urls_collection = urls_collection
+        self.lru_size = lru_size
+        self.verify_rate = verify_rate
+        self.snapshot_path = snapshot_path
+        self.recent = OrderedDict()
+        self.bloom = ScalableBloomFilter()
+        self.lru_hits = 0
+        self.bloom_hits = 0
+        self.misses = 0
+        self.verified = 0
+        self.false_positives = 0
+
+    def _remember_recent(self, md5_url):
+        self.recent[md5_url] = None
+        self.recent.move_to_end(md5_url)
+        if len(self.recent) > self.lru_size:
+            self.recent.popitem(last=False)
+
+    def add(self, md5_url):
+        if md5_url not in self.recent:
+            self.bloom.add(md5_url)
+        self._remember_recent(md5_url)
+
+    def seen(self, md5_url):
+        """True if md5_url is (very probably) already stored."""
+        if md5_url in self.recent:
+            self.recent.move_to_end(md5_url)
+            self.lru_hits += 1
+            return True
+
+        if md5_url in self.bloom:
+            if self.urls_collection is not None and random.random() < self.verify_rate:
+                self.verified += 1
+                if self.urls_collection.find_one({"md5_url": md5_url}, {"_id": 1}) is None:
+                    self.false_positives += 1
+                    self.misses += 1
+                    return False
+            self.bloom_hits += 1
+            self._remember_recent(md5_url)
+            return True
+
+        self.misses += 1
+        return False
+
+    def stats(self):
+        lookups = self.lru_hits + self.bloom_hits + self.misses
+        return {
+            "items": len(self.bloom),
+            "lookups": lookups,
+            "lru_hits": self.lru_hits,
+            "bloom_hits": self.bloom_hits,
+            "misses": self.misses,
+            "hit_rate": (self.lru_hits + self.bloom_hits) / lookups if lookups else 0.0,
+            "verified": self.verified,
+            "false_positives": self.false_positives,
+            "observed_false_positive_rate": self.false_positives / self.verified if self.verified else 0.0,
+            "estimated_false_positive_rate": self.bloom.estimated_error_rate(),
+        }
+
+    def warm_start(self):
+        """Loads the snapshot file if there is one, otherwise scans md5_url from the urls collection."""
+        if self.snapshot_path and self.load_snapshot():
+            logger.info("Seen-URL filter loaded %d URLs from %s", len(self.bloom), self.snapshot_path)
+            return
+        if self.urls_collection is None:
+            return
+        for doc in self.urls_collection.find({}, {"_id": 0, "md5_url": 1}).batch_size(10000):
+            if doc.get("md5_url"):
+                self.bloom.add(doc["md5_url"])
+        logger.info("Seen-URL filter warmed with %d URLs from the urls collection", len(self.bloom))
+
+    async def async_warm_start(self):
+        """warm_start() for a Motor collection."""
+        if self.snapshot_path and self.load_snapshot():
+            logger.info("Seen-URL filter loaded %d URLs from %s", len(self.bloom), self.snapshot_path)
+            return
+        async for doc in self.urls_collection.find({}, {"_id": 0, "md5_url": 1}).batch_size(10000):
+            if doc.get("md5_url"):
+                self.bloom.add(doc["md5_url"])
+        logger.info("Seen-URL filter warmed with %d URLs from the urls collection", len(self.bloom))
+
+    def save_snapshot(self, path=None):
+        """Writes the Bloom filters to disk atomically."""
+        path = path or self.snapshot_path
+        if not path:
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack("<IdI", self.bloom.initial_capacity, self.bloom.error_rate, len(self.bloom.filters)))
+            for bloom in self.bloom.filters:
+                f.write(struct.pack("<QdQQ", bloom.capacity, bloom.error_rate, bloom.count, len(bloom.bits)))
+                f.write(bloom.bits)
+        os.replace(tmp_path, path)
+
+    def load_snapshot(self, path=None):
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                    return False
+                initial_capacity, error_rate, num_filters = struct.unpack("<IdI", f.read(struct.calcsize("<IdI")))
+                bloom = ScalableBloomFilter(initial_capacity, error_rate)
+                for _ in range(num_filters):
+                    capacity, rate, count, size = struct.unpack("<QdQQ", f.read(struct.calcsize("<QdQQ")))
+                    bits = bytearray(f.read(size))
+                    if len(bits) != size:
+                        raise struct.error("truncated filter")
+                    bloom.filters.append(BloomFilter(capacity, rate, bits, count))
+        except (OSError, struct.error) as e:
+            logger.warning("Ignoring unreadable seen-URL snapshot %s: %s", path, e)
+            return False
+        self.bloom = bloom
+        return True
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Multi-process crawl entry point: runs CRAWLER_WORKERS worker processes, each looping over
+claim/fetch/extract until stopped, and restarts any worker that crashes.
+SIGTERM (or Ctrl-C) drains: workers finish the pages in hand, hand the rest of their
+claim back to the queue and exit.
+Usage: python supervisor.py [workers]
+"""
+
+import os
+import sys
+import time
+import signal
+import logging
+import multiprocessing
+from crawler_config import WORKERS, WORKER_BATCH, WORKER_IDLE_SECONDS, WORKER_DRAIN_SECONDS, METRICS_PORT
+from db_handler import DatabaseHandler
+from frontier import Frontier, get_locked_by
+from metrics import setup_logging, start_metrics
+
+logger = logging.getLogger(__name__)
+
+# A worker that dies sooner than this after starting is restarted only after the same delay,
+# so a persistent failure (Mongo down, browser missing) doesn't turn into a fork loop
+MIN_RESTART_SECONDS = 10
+POLL_SECONDS = 1
+
+# Browser fetching stays in the worker processes; NER gets its own process pool per worker
+# unless .env picked an executor explicitly
+os.environ.setdefault("CRAWLER_NER_EXECUTOR", "process")
+
+
+def run_worker(slot, batch_size, idle_seconds):
+    """Worker process body: claim and crawl batches until SIGTERM."""
+    from url import URLHandler
+
+    setup_logging()
+    # Each worker has its own registry, so each gets its own port
+    start_metrics(port=METRICS_PORT + slot if METRICS_PORT else 0)
+    # Ctrl-C reaches the whole process group; only the supervisor reacts to it and forwards SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    url_handler = URLHandler()
+
+    def request_stop(signum, frame):
+        url_handler.stop_requested = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    logger.info("Worker %s started", os.getpid())
+    try:
+        while not url_handler.stop_requested:
+            if url_handler.get_url_list_last_crawled_48hrs_before(batch_size):
+                continue
+            deadline = time.monotonic() + idle_seconds
+            while not url_handler.stop_requested and time.monotonic() < deadline:
+                time.sleep(POLL_SECONDS)
+    finally:
+        url_handler.frontier.release(get_locked_by())
+        url_handler.close()
+    logger.info("Worker %s stopped", os.getpid())
+
+
+class Supervisor:
+    """Keeps a fixed number of worker processes alive and shuts them down cleanly."""
+
+    def __init__(self, workers=WORKERS, batch_size=WORKER_BATCH, idle_seconds=WORKER_IDLE_SECONDS,
+                 drain_seconds=WORKER_DRAIN_SECONDS):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.idle_seconds = idle_seconds
+        self.drain_seconds = drain_seconds
+        # Playwright and pymongo don't survive fork, so workers start from a fresh interpreter
+        self.context = multiprocessing.get_context("spawn")
+        self.processes = [None] * workers
+        self.started_at = [0.0] * workers
+        self.restarts = 0
+        self.stopping = False
+        db_handler = DatabaseHandler()
+        self.frontier = Frontier(db_handler.urls_collection)
+        self.nodes_collection = db_handler.db["crawler_nodes"]
+
+    def start_worker(self, slot):
+        process = self.context.Process(
+            target=run_worker, args=(slot, self.batch_size, self.idle_seconds), name=f"crawler-worker-{slot}"
+        )
+        process.start()
+        self.processes[slot] = process
+        self.started_at[slot] = time.monotonic()
+
+    def reap(self, slot):
+        """Handles a worker that exited: frees whatever it still held and restarts it."""
+        process = self.processes[slot]
+        released = self.frontier.release(get_locked_by(process.pid))
+        # A dead worker's partitions go to the others now rather than after its heartbeat times out
+        self.nodes_collection.delete_one({"_id": get_locked_by(process.pid)})
+        if self.stopping:
+            return
+        logger.warning("Worker %s exited with code %s; released %d URLs, restarting",
+                       process.pid, process.exitcode, released)
+        if time.monotonic() - self.started_at[slot] < MIN_RESTART_SECONDS:
+            time.sleep(MIN_RESTART_SECONDS)
+            if self.stopping:
+                return
+        self.restarts += 1
+        self.start_worker(slot)
+
+    def request_stop(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info("Received signal %s, draining %d workers", signum, self.workers)
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    def drain(self):
+        """Waits for workers to finish their pages, killing any that overrun the drain timeout."""
+        deadline = time.monotonic() + self.drain_seconds
+        for slot, process in enumerate(self.processes):
+            process.join(max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("Worker %s didn't stop in %.0fs, killing it", process.pid, self.drain_seconds)
+                process.kill()
+                process.join()
+            self.reap(slot)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        for slot in range(self.workers):
+            self.start_worker(slot)
+        logger.info("Supervisor %s running %d workers", os.getpid(), self.workers)
+
+        while not self.stopping:
+            for slot, process in enumerate(self.processes):
+                if not self.stopping and not process.is_alive():
+                    self.reap(slot)
+            time.sleep(POLL_SECONDS)
+
+        self.drain()
+        logger.info("Crawling process completed. Workers restarted %d times.", self.restarts)
+
+
+def main():
+    """Main function to run the crawler across worker processes."""
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else WORKERS
+    setup_logging()
+    Supervisor(workers).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,225 +1,445 @@
-import socket
-import os
-from playwright.sync_api import sync_playwright
-from extractor import Extractor
-from db_handler import DatabaseHandler
-from datetime import datetime, timedelta, UTC
-from utils import parse_domain, generate_md5
-
-class URLHandler:
-
-    def __init__(self):
-        self.db_handler = DatabaseHandler()
-        self.urls_collection = self.db_handler.db["urls"]
-        self.domains_collection = self.db_handler.db["domains"]
-
-    def fetch_html(self, url):
-        """Fetches the HTML content of a URL."""
-        try:
-            redirect_chain_info = []
-
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                context = browser.new_context(user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64)')
-                page = context.new_page()
-
-                seen_urls = set()
-
-                def handle_response(response):
-                    req = response.request
-                    if req.resource_type != "document":
-                        return
-                    
-                    redirected_from = req.redirected_from
-
-                    if redirected_from:
-                        orig_url = redirected_from.url
-                        if orig_url not in seen_urls:
-                            seen_urls.add(orig_url)
-                            orig_resp = redirected_from.response()
-                            redirect_chain_info.append({
-                                "url": orig_url,
-                                "status": orig_resp.status if orig_resp else None
-                            })
-
-                    if response.url not in seen_urls:
-                        seen_urls.add(response.url)
-                        redirect_chain_info.append({
-                            "url": response.url,
-                            "status": response.status
-                        })
-
-                page.on("response", handle_response)
-
-                response = page.goto(url, timeout=30000, wait_until='domcontentloaded')
-                html_content = page.content()
-                final_url = page.url
-                status_code = response.status if response else None
-
-                browser.close()
-                return html_content, status_code, final_url, redirect_chain_info
-
-        except Exception as e:
-            print(f" Error fetching {url}: {e}")
-            return None, None, None, []
-        
-    def initialize_homepage_urls(self):
-        domain_docs = self.domains_collection.find({})
-
-        for domain in domain_docs:
-            homepage = domain["url"].strip().lower()
-            homepage_hash = generate_md5(homepage)
-
-            # Only insert if it's not already in the collection
-            existing = self.urls_collection.find_one({"md5_url": homepage_hash})
-            if not existing:
-                self.urls_collection.insert_one({
-                    "url": homepage,
-                    "md5_url": homepage_hash,
-                    "domain_id": domain["_id"],
-                    "status": "pending"
-                })
-                print(f"✅ Homepage URL added: {homepage}")
-            else:
-                print(f"⚠️ Homepage already exists: {homepage}")
-
-    def get_url_list_last_crawled_48hrs_before(self, num_of_urls=100):
-        """Retrieve and lock URLs atomically to prevent duplicate pickups."""
-        now = datetime.now(UTC)
-        cutoff_time = now - timedelta(hours=48)
-        process_id = f"crawler_{os.getpid()}"  # Unique identifier for the process
-        hostname = socket.gethostname()
-        locked_by = process_id + hostname
-
-        urls_to_find = list(self.urls_collection.find(
-            {
-                "$or": [
-                    {"last_crawled": {"$exists": False}},    # Never crawled
-                    {"last_crawled": {"$lt": cutoff_time}},  #  Not crawled in 48+ hours
-                    {"status": {"$exists": False}},          # No status
-                    {"status": {"$in": ["pending", "","completed"]}} 
-                ],
-                "domain_id": {"$ne": 0}
-            },
-            {"_id": 1}  # Fetch only required fields
-            ).sort({ "last_crawled": 1 }).limit(num_of_urls))
-
-        print(f"Found {len(urls_to_find)} URLs to lock.")
-
-        if not urls_to_find:
-            print("No more URLs to process.")
-            return []
-
-        url_ids = [url["_id"] for url in urls_to_find]  # Step 2: Extract IDs to update
-
-        # Lock the URLs by updating their status and adding a process lock
-        self.urls_collection.update_many(
-        {
-                "$and": [
-                    { "_id": {"$in": url_ids} },
-                    {"status": { "$ne": "processing" } }
-                ]
-        },
-            {
-                "$set": {
-                    "status": "processing",
-                    "locked_at": now,
-                    "locked_by": locked_by,
-                }
-            }
-        )
-
-        locked_url_find = list(self.urls_collection.find(
-            {
-                "$and": [
-                    { "_id": {"$in": url_ids} },
-                    { "status": "processing" },
-                    { "locked_by": locked_by }
-                ]
-            },
-            {"_id": 1,"url": 1, "domain_id": 1,"locked_by": 1}  
-        ))
-
-        for url_data in locked_url_find:
-                self.process_url(url_data)
-
-    def process_url(self, url):
-        html_content, status_code, final_url, redirect_chain = self.fetch_html(url["url"])
-        if html_content:
-            emails = Extractor.extract_email(html_content)
-            names = Extractor.extract_names(html_content)
-            extracted_links = Extractor.extract_links(html_content, url["url"])
-
-            print(f"\nExtracted links from: {url['url']}")
-            print("\n[Internal Links]")
-            for link in extracted_links["internal"]:
-                print(link)
-
-            print("\n[External Links]")
-            for link in extracted_links["external"]:
-                print(link)
-            self.store_extracted_links(extracted_links["internal"], url)
-            #self.store_extracted_links(extracted_links["external"], url)
-            
-              # Update the URL status to 'completed' after processing
-            self.urls_collection.update_one(
-                {"_id": url["_id"], "locked_by": url["locked_by"]},  # Ensure only the same process updates it
-                {"$set": {
-                    "last_crawled": datetime.now(UTC),
-                    "status": "completed",
-                    "locked_at": None,
-                    "locked_by": None,
-                    "html_content":html_content,
-                    "status_code": status_code,
-                    "final_url": final_url,
-                    "redirect_chain": redirect_chain,
-                    "emails": list(set(emails)),
-                    "person_names": names["person_names"]
-                }}
-            )
-            print(f" Successfully processed and completed URL: {url['url']}")
-        else:
-            print(f"Error processing URL {url['url']}")
-            self.urls_collection.update_one(
-                {"_id": url["_id"], "locked_by": url["locked_by"]},
-                {"$set": {
-                    "status": "completed",
-                    "status_code": status_code,
-                    "locked_at": None,
-                    "final_url": None,
-                    "locked_by": None,
-                    "redirect_chain": redirect_chain
-                }}
-            )
-
-    def store_extracted_links(self, extracted_links,url):
-        domain_from_url = parse_domain(url["url"])
-        
-        for link in extracted_links:
-            # Normalize the domain of the extracted link
-            link_domain = parse_domain(link)
-
-            # Determine if this is an internal link
-            is_internal = (domain_from_url == link_domain)
-            
-            if is_internal:
-                domain_id = url["domain_id"]
-            else:
-                domain_id = 0
-
-            link = link.strip() 
-            link_hash = generate_md5(link)
-            
-            self.urls_collection.update_one(
-                    {"md5_url":link_hash},   # Find by MD5 hash
-                    {
-                        "$setOnInsert": {
-                            "md5_url": link_hash,
-                            "url": link,
-                            "domain_id": domain_id,
-                            #"is_internal": is_internal
-                        },
-                    },
-                    upsert=True  # This will insert the link if it's new
-                )
-            print(f" Link added: {link}.")
\ No newline at end of file
+import logging
+import threading
+import canonical
+from browser_pool import BrowserPool
+from http_fetcher import HTTPFetcher, FetchResult, response_validators
+from crawler_config import (
+    HTTP_FAST_PATH, NER_PAGES_PER_BATCH, SEEN_FILTER, CONDITIONAL_RECRAWL, SIMHASH_MAX_DISTANCE, GATE_HEAD_REQUESTS,
+    RESPECT_ROBOTS, FRONTIER_PARTITIONED, URL_POLICY,
+)
+from discovery import DISALLOWED, RobotsCache
+from fetch_settings import DomainFetchSettings
+from gating import SKIPPED_CONTENT_TYPE, content_length, skip_by_extension
+from fingerprint import simhash, hamming_distance
+from ner import NERBatcher
+from extractor import Extractor
+from parsed_page import ParsedPage
+from link_writer import LinkWriter
+from seen_filter import SeenURLFilter
+from db_handler import DatabaseHandler
+from frontier import Frontier, get_locked_by
+from partition import NodeMembership, partition_of
+from url_policy import URLPolicy
+from scheduler import RevisitScheduler
+from content_store import get_content_store
+from metrics import FETCH_SECONDS, FETCHED_BYTES, PAGES, STORE_LINKS_SECONDS, LINKS
+from datetime import datetime, UTC
+from utils import generate_md5
+
+logger = logging.getLogger(__name__)
+
+
+def build_completed_update(content, status_code, final_url, redirect_chain, emails, names,
+                           fingerprint=None, validators=None, schedule=None):
+    """Update written once a page has been fetched and extracted; content comes from ContentStore.put."""
+    return {"$set": {
+        **(schedule or {}),
+        "last_crawled": datetime.now(UTC),
+        "status": "completed",
+        "crawl_outcome": "changed",
+        "content_fingerprint": fingerprint,
+        **(validators or {}),
+        "locked_at": None,
+        "locked_by": None,
+        **content,
+        "status_code": status_code,
+        "final_url": final_url,
+        "redirect_chain": redirect_chain,
+        "emails": list(set(emails)),
+        "person_names": names["person_names"]
+    },
+    # The body lives in the content store; drop copies left by older crawls
+    "$unset": {"html_content": ""}}
+
+
+def build_unchanged_update(status_code, validators=None, schedule=None):
+    """Cheap update for a recrawl that found nothing new; the page's stored content is left alone."""
+    update = {
+        **(schedule or {}),
+        "last_crawled": datetime.now(UTC),
+        "status": "completed",
+        "crawl_outcome": "unchanged",
+        "status_code": status_code,
+        "locked_at": None,
+        "locked_by": None,
+    }
+    # A 304 may omit the validators; keep the stored ones in that case
+    update.update({key: value for key, value in (validators or {}).items() if value})
+    return {"$set": update}
+
+
+def build_failed_update(status_code, redirect_chain, schedule=None):
+    """$set document written when a page could not be fetched."""
+    return {"$set": {
+        **(schedule or {}),
+        "status": "completed",
+        "status_code": status_code,
+        "locked_at": None,
+        "final_url": None,
+        "locked_by": None,
+        "redirect_chain": redirect_chain
+    }}
+
+
+def build_skipped_update(outcome, status_code, final_url, redirect_chain, headers, schedule=None):
+    """Compact update for a URL gated out before its body was downloaded (see gating.py)."""
+    return {"$set": {
+        **(schedule or {}),
+        "last_crawled": datetime.now(UTC),
+        "status": "completed",
+        "crawl_outcome": outcome,
+        "status_code": status_code,
+        "final_url": final_url,
+        "redirect_chain": redirect_chain,
+        "content_type": headers.get("Content-Type"),
+        "content_length": content_length(headers),
+        "locked_at": None,
+        "locked_by": None,
+    }}
+
+
+def build_link_upsert(link, url, domain_from_url, insert_fields=None):
+    """Returns (filter, update) that inserts a discovered link unless its md5_url is already stored.
+
+    domain_from_url is the registrable domain of the page the link was found on; insert_fields
+    are added to a newly inserted document (URLPolicy uses them to defer likely traps).
+    """
+    link_domain = canonical.registrable_domain(canonical.host(link))
+
+    # Determine if this is an internal link
+    is_internal = (domain_from_url == link_domain)
+    
+    if is_internal:
+        domain_id = url["domain_id"]
+    else:
+        domain_id = 0
+
+    link = link.strip() 
+    link_hash = generate_md5(link)
+
+    return (
+        {"md5_url":link_hash},   # Find by MD5 hash
+        {
+            "$setOnInsert": {
+                "md5_url": link_hash,
+                "url": link,
+                "domain_id": domain_id,
+                "partition": partition_of(domain_id),
+                **(insert_fields or {}),
+                #"is_internal": is_internal
+            },
+        },
+    )
+
+
+class URLHandler:
+
+    def __init__(self):
+        self.db_handler = DatabaseHandler()
+        self.urls_collection = self.db_handler.db["urls"]
+        self.domains_collection = self.db_handler.db["domains"]
+        self.membership = None
+        if FRONTIER_PARTITIONED:
+            self.membership = NodeMembership(self.db_handler.db["crawler_nodes"], get_locked_by())
+            self.membership.join()
+        self.frontier = Frontier(self.urls_collection, self.domains_collection, membership=self.membership)
+        self.scheduler = RevisitScheduler()
+        self.content_store = get_content_store(self.db_handler.db)
+        self.browser_pool = BrowserPool()
+        self.http_fetcher = HTTPFetcher() if HTTP_FAST_PATH else None
+        # HEAD requests before browser fetches share the fast path's session when there is one
+        self.head_fetcher = (self.http_fetcher or HTTPFetcher()) if GATE_HEAD_REQUESTS else None
+        self.robots = RobotsCache(self.domains_collection, self.head_fetcher) if RESPECT_ROBOTS else None
+        self.url_policy = URLPolicy(self.db_handler.db) if URL_POLICY else None
+        self.fetch_settings = DomainFetchSettings(self.domains_collection)
+        self.stop_requested = False  # Set from a signal handler to stop after the current group of pages
+        self.ner_batcher = NERBatcher()
+        self.link_writer = LinkWriter(self.urls_collection)
+        self.links_lock = threading.RLock()  # The link writer and seen filter are shared by pipeline threads
+        self.seen_filter = None
+        if SEEN_FILTER:
+            self.seen_filter = SeenURLFilter(self.urls_collection)
+            self.seen_filter.warm_start()
+
+    def fetch_html(self, url, domain_id=None):
+        """Fetches the HTML content of a URL."""
+        return tuple(self.fetch_page(url, domain_id))[:4]
+
+    def fetch_page(self, url, domain_id=None, validators=None, browser_pool=None):
+        """Fetches a URL over plain HTTP unless the domain needs a browser; returns a FetchResult.
+
+        validators from the previous crawl make the plain fetch conditional, in which
+        case an unchanged page comes back as status 304 with no html. browser_pool
+        overrides the handler's own pool, e.g. one per fetch thread.
+        """
+        result = self._fetch_page(url, domain_id, validators, browser_pool)
+        if result.html:
+            FETCHED_BYTES.inc(len(result.html.encode("utf-8")))
+        return result
+
+    def _fetch_page(self, url, domain_id, validators, browser_pool):
+        if skip_by_extension(url):
+            return FetchResult(None, None, url, [], {}, SKIPPED_CONTENT_TYPE)
+        try:
+            if self.robots and not self.robots.allowed(url):
+                return FetchResult(None, None, url, [], {}, DISALLOWED)
+            headers_seen = False
+            if self.http_fetcher and not self.fetch_settings.requires_js(domain_id):
+                try:
+                    with FETCH_SECONDS.time(tier="http"):
+                        result = self.http_fetcher.fetch(url, validators)
+                except Exception as e:
+                    logger.warning("Plain fetch failed for %s, retrying in browser: %s", url, e)
+                else:
+                    if self.fetch_settings.accept(domain_id, result):
+                        return result
+                    headers_seen = True
+
+            # The plain fetch already saw this URL's headers; otherwise look before loading it in Chromium
+            if self.head_fetcher and not headers_seen:
+                with FETCH_SECONDS.time(tier="head"):
+                    outcome = self.head_fetcher.head(url)
+                if outcome:
+                    return FetchResult(None, None, url, [], {}, outcome)
+
+            profile = self.fetch_settings.profile(domain_id)
+            with FETCH_SECONDS.time(tier="browser"):
+                return (browser_pool or self.browser_pool).fetch(url, profile=profile)
+        except Exception as e:
+            logger.error("Error fetching %s: %s", url, e)
+            return FetchResult(None, None, None, [], {})
+
+    def close(self):
+        """Flushes pending links, saves the seen-URL filter and releases the browser, NER pool and HTTP session."""
+        self.flush_links()
+        if self.seen_filter:
+            logger.info("Seen-URL filter: %s", self.seen_filter.stats())
+            self.seen_filter.save_snapshot()
+        self.browser_pool.close()
+        self.ner_batcher.close()
+        if self.http_fetcher:
+            self.http_fetcher.close()
+        if self.head_fetcher and self.head_fetcher is not self.http_fetcher:
+            self.head_fetcher.close()
+        if self.robots:
+            self.robots.close()
+        if self.membership:
+            self.membership.leave()
+        
+    def initialize_homepage_urls(self):
+        domain_docs = self.domains_collection.find({})
+
+        for domain in domain_docs:
+            homepage = canonical.canonicalize(domain["url"])
+            homepage_hash = generate_md5(homepage)
+
+            # Only insert if it's not already in the collection
+            existing = self.urls_collection.find_one({"md5_url": homepage_hash})
+            if not existing:
+                self.urls_collection.insert_one({
+                    "url": homepage,
+                    "md5_url": homepage_hash,
+                    "domain_id": domain["_id"],
+                    "partition": partition_of(domain["_id"]),
+                    "status": "pending"
+                })
+                logger.info("✅ Homepage URL added: %s", homepage)
+            else:
+                logger.debug("Homepage already exists: %s", homepage)
+
+    def get_url_list_last_crawled_48hrs_before(self, num_of_urls=100):
+        """Retrieve and lock URLs atomically to prevent duplicate pickups."""
+        locked_by = get_locked_by()
+        locked_url_find = self.frontier.claim(locked_by, num_of_urls)
+
+        logger.info("Claimed %d URLs.", len(locked_url_find))
+
+        if not locked_url_find:
+            logger.info("No more URLs to process.")
+            return []
+
+        # NER for one group of pages runs on the batcher's pool while the next group is fetched
+        in_progress = None
+        for start in range(0, len(locked_url_find), NER_PAGES_PER_BATCH):
+            if self.stop_requested:
+                break
+            pages = [
+                page for page in map(self.fetch_and_extract, locked_url_find[start:start + NER_PAGES_PER_BATCH])
+                if page is not None
+            ]
+            if in_progress:
+                self.complete_pages(*in_progress)
+            self.frontier.renew(locked_by)
+            texts = [page["text"] for page in pages]
+            in_progress = (pages, self.ner_batcher.submit(texts))
+
+        if in_progress:
+            self.complete_pages(*in_progress)
+        self.flush_links()
+        if self.stop_requested:
+            released = self.frontier.release(locked_by)
+            logger.info("Stopping: released %d unfetched URLs.", released)
+        return locked_url_find
+
+    def process_url(self, url):
+        page = self.fetch_and_extract(url)
+        if page is not None:
+            self.complete_url(page, Extractor.names_from_text(page["text"]))
+
+    def fetch_and_extract(self, url):
+        """Fetches a URL and stores its links; returns the page for NER, or None if there is nothing to extract."""
+        validators = None
+        if CONDITIONAL_RECRAWL:
+            validators = {"etag": url.get("etag"), "last_modified": url.get("last_modified")}
+        page = self.extract_page(url, self.fetch_page(url["url"], url.get("domain_id"), validators))
+        if page is not None:
+            self.store_page_content(page)
+        return page
+
+    def extract_page(self, url, result):
+        """Parses a fetched page into the dict complete_url expects.
+
+        Pages that failed or haven't changed are recorded right away and give None.
+        """
+        if result.status_code == 304:
+            self.record_unchanged(url, result)
+            return None
+
+        if result.outcome:
+            self.record_skipped(url, result)
+            return None
+
+        if not result.html:
+            logger.warning("Error processing URL %s", url["url"])
+            PAGES.inc(outcome="failed")
+            self.urls_collection.update_one(
+                {"_id": url["_id"], "locked_by": url["locked_by"]},
+                build_failed_update(
+                    result.status_code, result.redirect_chain,
+                    self.scheduler.schedule(url, changed=None, now=datetime.now(UTC))
+                )
+            )
+            return None
+
+        # One parse shared by every extractor; only the visible text is kept for NER
+        parsed = ParsedPage(result.html, url["url"])
+        text = parsed.text
+        fingerprint = simhash(text)
+        if (CONDITIONAL_RECRAWL and fingerprint and url.get("content_fingerprint")
+                and hamming_distance(fingerprint, url["content_fingerprint"]) <= SIMHASH_MAX_DISTANCE):
+            self.record_unchanged(url, result)
+            return None
+
+        emails = parsed.extract("emails")
+        links = parsed.extract("links")
+        parsed.release()
+
+        return {
+            "url": url,
+            "html": result.html,
+            "links": links,
+            "status_code": result.status_code,
+            "final_url": result.final_url,
+            "redirect_chain": result.redirect_chain,
+            "emails": emails,
+            "text": text if self.ner_batcher.enabled else "",
+            "fingerprint": fingerprint,
+            "validators": response_validators(result.headers),
+        }
+
+    def store_page_content(self, page):
+        """Moves the page body to the content store and queues its links; page keeps only the content fields."""
+        url = page["url"]
+        page["content"] = self.content_store.put(page.pop("html"))
+        extracted_links = page.pop("links")
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Extracted links from %s\n[Internal Links]\n%s\n[External Links]\n%s", url["url"],
+                         "\n".join(extracted_links["internal"]), "\n".join(extracted_links["external"]))
+        if self.url_policy:
+            self.url_policy.observe(url, page["fingerprint"])
+        self.store_extracted_links(extracted_links["internal"] | extracted_links["external"], url)
+
+    def record_unchanged(self, url, result):
+        """Marks a recrawl whose page hasn't changed, skipping extraction and link storage."""
+        self.urls_collection.update_one(
+            {"_id": url["_id"], "locked_by": url["locked_by"]},
+            build_unchanged_update(
+                result.status_code, response_validators(result.headers),
+                self.scheduler.schedule(url, changed=False, now=datetime.now(UTC))
+            )
+        )
+        PAGES.inc(outcome="unchanged")
+        logger.info("Unchanged since last crawl: %s", url["url"])
+
+    def record_skipped(self, url, result):
+        """Records a URL whose body was gated out (non-HTML or over the size cap) without storing content."""
+        self.urls_collection.update_one(
+            {"_id": url["_id"], "locked_by": url["locked_by"]},
+            build_skipped_update(
+                result.outcome, result.status_code, result.final_url, result.redirect_chain, result.headers,
+                self.scheduler.schedule(url, changed=None, now=datetime.now(UTC))
+            )
+        )
+        PAGES.inc(outcome=result.outcome)
+        logger.info("Skipped %s: %s", url["url"], result.outcome)
+
+    def complete_pages(self, pages, names_future):
+        """Waits for a batch's NER results and marks each of its pages completed."""
+        try:
+            batch_names = names_future.result()
+        except Exception as e:
+            logger.error("NER failed for a batch of %d pages: %s", len(pages), e)
+            batch_names = [[] for _ in pages]
+
+        for page, person_names in zip(pages, batch_names):
+            self.complete_url(page, {"person_names": person_names})
+
+    def complete_url(self, page, names):
+        url = page["url"]
+        # Update the URL status to 'completed' after processing
+        self.urls_collection.update_one(
+            {"_id": url["_id"], "locked_by": url["locked_by"]},  # Ensure only the same process updates it
+            build_completed_update(
+                page["content"], page["status_code"], page["final_url"],
+                page["redirect_chain"], page["emails"], names,
+                page["fingerprint"], page["validators"],
+                self.scheduler.schedule(url, changed=True, now=datetime.now(UTC))
+            )
+        )
+        PAGES.inc(outcome="changed")
+        logger.info("Successfully processed and completed URL: %s", url["url"])
+
+    def store_extracted_links(self, extracted_links,url):
+        """Queues upserts for internal and external links; they are written in bulk by flush_links."""
+        domain_from_url = canonical.registrable_domain(canonical.host(url["url"]))
+        deferred = {}
+        # Outside the lock: the URL policy may load its domain state and the first link to a new origin
+        # may fetch its robots.txt
+        if self.url_policy:
+            extracted_links, deferred = self.url_policy.filter_links(extracted_links, url, domain_from_url)
+        if self.robots:
+            extracted_links = self.robots.filter_links(extracted_links, domain_from_url)
+
+        with STORE_LINKS_SECONDS.time(), self.links_lock:
+            self._store_extracted_links(extracted_links, url, domain_from_url, deferred)
+
+    def _store_extracted_links(self, extracted_links, url, domain_from_url, deferred):
+        for link in extracted_links:
+            link_filter, link_update = build_link_upsert(link, url, domain_from_url, deferred.get(link))
+            if self.seen_filter:
+                # Links this worker already knows about never reach Mongo
+                if self.seen_filter.seen(link_filter["md5_url"]):
+                    LINKS.inc(result="skipped")
+                    continue
+                self.seen_filter.add(link_filter["md5_url"])
+            if self.link_writer.add(link_filter, link_update):
+                self.flush_links()
+
+    def flush_links(self):
+        with self.links_lock:
+            inserted, matched = self.link_writer.flush()
+        if inserted or matched:
+            LINKS.inc(inserted, result="new")
+            LINKS.inc(matched, result="known")
+            logger.info("Links stored: %d new, %d already known.", inserted, matched)
@@ -0,0 +1,228 @@
+"""
+Per-domain policy for discovered links: which query parameters can be dropped, and which links are
+crawler traps. Queries are kept (minus canonical.TRACKING_PARAMS), and each domain learns which of its
+own parameters don't change the page: whenever two crawled URLs differ only in one parameter, by its
+value or by having it at all, their SimHash fingerprints are compared, and after PARAM_LEARN_SAMPLES
+comparisons the parameter is either stripped from new links or kept for good. Links with very deep or
+repeating paths or long queries are dropped, query variants of one path beyond a cap are deferred, and
+a domain stops taking new links once it holds its maximum number of URLs.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, UTC
+from urllib.parse import urlsplit
+from pymongo import ReturnDocument
+import canonical
+from crawler_config import (
+    URL_MAX_DEPTH, URL_MAX_SEGMENT_REPEATS, URL_MAX_QUERY_PARAMS, URL_MAX_QUERY_VARIANTS, URL_TRAP_DEFER_HOURS,
+    DOMAIN_MAX_URLS, PARAM_LEARN_SAMPLES, PARAM_MAX_DIFFERENT, SIMHASH_MAX_DISTANCE,
+)
+from fingerprint import hamming_distance
+from metrics import TRAPPED_LINKS, PARAM_DECISIONS
+from utils import generate_md5
+
+logger = logging.getLogger(__name__)
+
+# A domain's learned parameters and URL count are re-read this often, to pick up other workers' progress;
+# the URL cap is therefore approximate by however many links a domain gains in that time
+DOMAIN_STATE_SECONDS = 600
+# Paths whose query variants are tracked in memory, least recently used dropped first
+VARIANT_PATHS = 10_000
+
+
+def path_trap(path, max_depth=URL_MAX_DEPTH, max_repeats=URL_MAX_SEGMENT_REPEATS):
+    """"too_deep" or "repeating_segments" for a trap-like URL path (/a/b/a/b/a/b), otherwise None."""
+    segments = [segment for segment in path.split("/") if segment]
+    if len(segments) > max_depth:
+        return "too_deep"
+    if segments and Counter(segments).most_common(1)[0][1] >= max_repeats:
+        return "repeating_segments"
+    return None
+
+
+class DomainState:
+    """What the policy knows about one domain, until `expires` (monotonic)."""
+
+    def __init__(self, ignored, decided, url_count, max_urls, ttl):
+        self.ignored = ignored      # frozenset of parameters stripped from new links
+        self.decided = decided      # every parameter with a decision, ignorable or not
+        self.url_count = url_count
+        self.max_urls = max_urls
+        self.expires = time.monotonic() + ttl
+
+
+class URLPolicy:
+    """Canonicalizes and screens the links found on a domain's pages, and learns from its crawled pages."""
+
+    def __init__(self, db, max_urls=DOMAIN_MAX_URLS, max_variants=URL_MAX_QUERY_VARIANTS,
+                 defer_hours=URL_TRAP_DEFER_HOURS, learn_samples=PARAM_LEARN_SAMPLES,
+                 max_different=PARAM_MAX_DIFFERENT, state_seconds=DOMAIN_STATE_SECONDS):
+        self.urls_collection = db["urls"]
+        self.domains_collection = db["domains"]
+        self.params_collection = db["url_params"]
+        self.samples_collection = db["url_param_samples"]
+        self.max_urls = max_urls
+        self.max_variants = max_variants
+        self.defer = timedelta(hours=defer_hours)
+        self.learn_samples = learn_samples
+        self.max_different = max_different
+        self.state_seconds = state_seconds
+        self._domains = {}  # domain_id -> DomainState
+        self._variants = OrderedDict()  # (domain_id, path) -> hashes of the query variants let through
+        self._lock = threading.Lock()
+
+    def domain_state(self, domain_id):
+        with self._lock:
+            state = self._domains.get(domain_id)
+        if state and state.expires > time.monotonic():
+            return state
+        # Loaded outside the lock; two threads may both load a domain once, which is harmless
+        state = self._load(domain_id)
+        with self._lock:
+            self._domains[domain_id] = state
+        return state
+
+    def _load(self, domain_id):
+        ignored, decided = set(), set()
+        for doc in self.params_collection.find(
+            {"domain_id": domain_id, "ignorable": {"$exists": True}}, {"param": 1, "ignorable": 1}
+        ):
+            decided.add(doc["param"])
+            if doc["ignorable"]:
+                ignored.add(doc["param"])
+        domain = self.domains_collection.find_one({"_id": domain_id}, {"max_urls": 1}) or {}
+        max_urls = domain.get("max_urls", self.max_urls)
+        url_count = self.urls_collection.count_documents({"domain_id": domain_id}) if max_urls else 0
+        return DomainState(frozenset(ignored), decided, url_count, max_urls, self.state_seconds)
+
+    @staticmethod
+    def canonicalize(link, state):
+        """link without the parameters its domain has learned to ignore."""
+        base, _, query = link.partition("?")
+        if not query or not state.ignored:
+            return link
+        query = canonical.normalize_query(query, state.ignored)
+        return f"{base}?{query}" if query else base
+
+    def _new_variant_allowed(self, domain_id, path, query):
+        key = (domain_id, path)
+        digest = hash(query)
+        with self._lock:
+            variants = self._variants.get(key)
+            if variants is None:
+                variants = self._variants[key] = set()
+                if len(self._variants) > VARIANT_PATHS:
+                    self._variants.popitem(last=False)
+            else:
+                self._variants.move_to_end(key)
+            if digest in variants:
+                return True
+            if len(variants) >= self.max_variants:
+                return False
+            variants.add(digest)
+            return True
+
+    def screen(self, link, domain_id, state):
+        """Returns (link, reason, action): the link to store and, for a trap, why and "dropped" or "deferred"."""
+        link = self.canonicalize(link, state)
+        base, _, query = link.partition("?")
+        path = urlsplit(base).path
+        reason = path_trap(path)
+        if reason is None and query and len(canonical.split_query(query)) > URL_MAX_QUERY_PARAMS:
+            reason = "long_query"
+        if reason is None and state.max_urls and state.url_count >= state.max_urls:
+            reason = "domain_url_cap"
+        if reason:
+            return link, reason, "dropped"
+        # Calendars, faceted search and sort orders: the first variants of a path go in, later ones wait
+        if query and not self._new_variant_allowed(domain_id, path, query):
+            return link, "query_variants", "deferred"
+        return link, None, None
+
+    def filter_links(self, links, url, site):
+        """Screens the links found on url's page; links elsewhere than registrable domain `site` pass unchanged.
+
+        Returns (links, deferred): the links to store, and for the deferred ones the fields to
+        insert them with; status "deferred" keeps them out of the pending queue until next_crawl_at.
+        """
+        domain_id = url.get("domain_id")
+        if not domain_id:
+            return list(links), {}
+        state = None
+        kept, deferred = [], {}
+        now = datetime.now(UTC)
+        for link in links:
+            if canonical.registrable_domain(canonical.host(link)) != site:
+                kept.append(link)
+                continue
+            state = state or self.domain_state(domain_id)
+            link, reason, action = self.screen(link, domain_id, state)
+            if reason:
+                TRAPPED_LINKS.inc(reason=reason, action=action)
+                if action == "dropped":
+                    continue
+                deferred[link] = {"status": "deferred", "next_crawl_at": now + self.defer, "trap_reason": reason}
+            kept.append(link)
+        return kept, deferred
+
+    def observe(self, url, fingerprint):
+        """Learns from a crawled page by comparing it with crawled variants that differ in one query parameter.
+
+        The variant without the parameter is looked up in the urls collection; for variants with another
+        value, the first one crawled is kept in url_param_samples.
+        """
+        domain_id = url.get("domain_id")
+        base, _, query = url["url"].partition("?")
+        if not domain_id or not query or not fingerprint:
+            return
+        state = self.domain_state(domain_id)
+        pairs = canonical.split_query(query)
+        for name in {name for name, _ in pairs} - state.decided:
+            others = "&".join(pair for other, pair in pairs if other != name)
+            value = "&".join(pair for other, pair in pairs if other == name)
+            without = self.urls_collection.find_one(
+                {"md5_url": generate_md5(f"{base}?{others}" if others else base)}, {"content_fingerprint": 1}
+            )
+            if without and without.get("content_fingerprint"):
+                same = hamming_distance(without["content_fingerprint"], fingerprint) <= SIMHASH_MAX_DISTANCE
+                self._record_comparison(domain_id, name, same, state)
+                if name in state.decided:
+                    continue
+            # The first crawled URL of each (parameter, rest of the URL) is kept as the one to compare against
+            sample = self.samples_collection.find_one_and_update(
+                {"_id": generate_md5(f"{domain_id}|{name}|{base}?{others}")},
+                {"$setOnInsert": {"value": value, "fingerprint": fingerprint}, "$set": {"seen_at": datetime.now(UTC)}},
+                projection={"value": 1, "fingerprint": 1},
+                upsert=True,
+            )
+            if sample is None or sample["value"] == value:
+                continue
+            same = hamming_distance(sample["fingerprint"], fingerprint) <= SIMHASH_MAX_DISTANCE
+            self._record_comparison(domain_id, name, same, state)
+
+    def _record_comparison(self, domain_id, name, same, state):
+        doc = self.params_collection.find_one_and_update(
+            {"domain_id": domain_id, "param": name},
+            {"$inc": {"same" if same else "different": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        compared = doc.get("same", 0) + doc.get("different", 0)
+        if "ignorable" in doc or compared < self.learn_samples:
+            return
+        ignorable = doc.get("different", 0) <= compared * self.max_different
+        result = self.params_collection.update_one(
+            {"_id": doc["_id"], "ignorable": {"$exists": False}},
+            {"$set": {"ignorable": ignorable, "decided_at": datetime.now(UTC)}},
+        )
+        with self._lock:
+            state.decided.add(name)
+            if ignorable:
+                state.ignored = state.ignored | {name}
+        if result.modified_count:
+            PARAM_DECISIONS.inc(result="ignorable" if ignorable else "significant")
+            logger.info("Query parameter %r on domain %s %s after %d comparisons", name, domain_id,
+                        "is ignorable" if ignorable else "changes content", compared)